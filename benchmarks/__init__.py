@@ -0,0 +1 @@
+# Performans ölçüm araçları (python -m benchmarks.run)
@@ -0,0 +1,296 @@
+"""
+Hakediş motoru ve veritabanı sıcak yolları için benchmark.
+
+Kullanım:
+    python -m benchmarks.run                       # orta boy veri, sonuç benchmarks/results/ altına
+    python -m benchmarks.run --size small --repeat 5
+    python -m benchmarks.run --update-baseline     # mevcut sonucu referans (baseline) olarak kaydet
+    python -m benchmarks.run --threshold 0.25      # baseline'dan %25 yavaş olan ölçümler gerileme sayılır
+
+Her ölçümde en iyi süre (min) karşılaştırılır. Gerileme varsa çıkış kodu 1'dir.
+PySide6 kurulu değilse UploadWorker / RecalcWorker ölçümleri 'skipped' olarak raporlanır.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks import synthetic
+from core.hesaplama import clear_day_cache, get_day_cache_stats, hesapla_hakedis, hesapla_hakedis_batch
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_RESULTS_DIR = BENCH_DIR / "results"
+
+SIZES = {
+    # workers, months, tersaneler
+    'small': (50, 2, 2),
+    'medium': (300, 3, 3),
+    'large': (1500, 6, 4),
+}
+
+
+class Skip(Exception):
+    """Ölçüm bu ortamda çalıştırılamıyor (ör. PySide6 yok)."""
+
+
+def _time(func, repeat, setup=None):
+    times = []
+    extra = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        extra = func()
+        times.append(time.perf_counter() - start)
+    return times, extra
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR.parent,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _engine_frame(db):
+    with db.get_connection() as conn:
+        rows = conn.execute(
+            "SELECT tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat FROM gunluk_kayit"
+        ).fetchall()
+    return pd.DataFrame(rows, columns=['tarih', 'ad_soyad', 'giris', 'cikis', 'kayip'])
+
+
+def bench_hesapla_hakedis(ctx, repeat):
+    db, df, flags = ctx['db'], ctx['frame'], ctx['data']['personel']
+    cal = db.get_holiday_calendar()
+    rules = db.get_settings_cache().get('shipyard_rules')
+    records = list(df.itertuples(index=False, name=None))
+
+    def run():
+        for tarih, ad, giris, cikis, kayip in records:
+            p = flags[ad]
+            hesapla_hakedis(tarih, giris, cikis, kayip, cal.keys, cal.holiday_info,
+                            lambda _ad: p['ozel_durum'], ad, p['yevmiyeci'], settings_cache=rules)
+        return get_day_cache_stats()
+
+    times, stats = _time(run, repeat, setup=clear_day_cache)
+    return times, len(records), {'day_cache_hit_rate': round(stats['hit_rate'], 4)}
+
+
+def bench_hesapla_hakedis_batch(ctx, repeat):
+    db, df = ctx['db'], ctx['frame']
+    cal = db.get_holiday_calendar()
+    rules = db.get_settings_cache().get('shipyard_rules')
+    times, _ = _time(lambda: hesapla_hakedis_batch(df, rules, cal.keys, ctx['data']['personel'], cal.holiday_info), repeat)
+    return times, len(df), {}
+
+
+def bench_get_records_by_month(ctx, repeat):
+    db, months = ctx['db'], ctx['data']['months']
+    n = [0]
+
+    def run():
+        n[0] = 0
+        for yil, ay in months:
+            n[0] += len(db.get_records_by_month(yil, ay))
+            for tid in ctx['data']['tersane_ids']:
+                db.get_records_by_month(yil, ay, tersane_id=tid)
+
+    times, _ = _time(run, repeat)
+    return times, n[0], {'calls': len(months) * (1 + len(ctx['data']['tersane_ids']))}
+
+
+def bench_get_dashboard_data(ctx, repeat):
+    db, months = ctx['db'], ctx['data']['months']
+
+    def run():
+        for yil, ay in months:
+            db.get_dashboard_data(yil, ay)
+            for tid in ctx['data']['tersane_ids']:
+                db.get_dashboard_data(yil, ay, tersane_id=tid)
+
+    times, _ = _time(run, repeat)
+    return times, ctx['data']['rows'], {'calls': len(months) * (1 + len(ctx['data']['tersane_ids']))}
+
+
+def _require_qt():
+    try:
+        import PySide6  # noqa: F401
+    except ImportError as e:
+        raise Skip(f"PySide6 yok: {e}")
+
+
+def bench_upload(ctx, repeat):
+    _require_qt()
+    from pages.upload import UploadWorker
+    db = ctx['db']
+    csv_path = os.path.join(ctx['tmpdir'], "upload.csv")
+    workers, _months, _t = ctx['size']
+    n_rows = synthetic.write_upload_csv(csv_path, workers=workers)
+    all_personel = {ad: {'yevmiyeci': f['yevmiyeci'], 'ozel_durum': f['ozel_durum']}
+                    for ad, f in ctx['data']['personel'].items()}
+    settings_cache = db.get_settings_cache(tersane_id=ctx['data']['tersane_ids'][0])
+    errors = []
+
+    def setup():
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM gunluk_kayit WHERE import_batch_id='bench'")
+            conn.commit()
+
+    def run():
+        worker = UploadWorker([csv_path], db.db_file, all_personel, settings_cache, set(), 1,
+                              ctx['data']['tersane_ids'][0], "bench")
+        worker.error.connect(errors.append)
+        worker.run()
+
+    times, _ = _time(run, repeat, setup=setup)
+    return times, n_rows, {'errors': len(errors)}
+
+
+def bench_recalc_worker(ctx, repeat):
+    _require_qt()
+    from pages.settings import RecalcWorker
+    db = ctx['db']
+
+    def setup():
+        with db.get_connection() as conn:
+            conn.execute("UPDATE gunluk_kayit SET kural_parmak_izi=NULL")  # WHY: her tekrar tam hesaplama yapsın.
+            conn.commit()
+
+    def run():
+        worker = RecalcWorker(db)
+        worker.run()
+
+    times, _ = _time(run, repeat, setup=setup)
+    return times, ctx['data']['rows'], {}
+
+
+BENCHMARKS = [
+    ('hesapla_hakedis', bench_hesapla_hakedis),
+    ('hesapla_hakedis_batch', bench_hesapla_hakedis_batch),
+    ('get_records_by_month', bench_get_records_by_month),
+    ('get_dashboard_data', bench_get_dashboard_data),
+    ('upload_ingestion', bench_upload),
+    ('recalc_worker', bench_recalc_worker),
+]
+
+
+def run_benchmarks(size='medium', repeat=3, only=None, log=print):
+    """Sentetik veriyi üretir, seçili ölçümleri çalıştırır ve sonuç sözlüğünü döndürür."""
+    workers, months, tersaneler = SIZES[size]
+    tmpdir = tempfile.mkdtemp(prefix="puantaj_bench_")
+    try:
+        t0 = time.perf_counter()
+        data = synthetic.generate_database(os.path.join(tmpdir, "bench.db"), workers, months, tersaneler)
+        log(f"Veri üretildi: {data['rows']} kayıt, {workers} personel, {months} ay ({time.perf_counter() - t0:.1f} sn)")
+        ctx = {'db': data['db'], 'data': data, 'size': SIZES[size], 'tmpdir': tmpdir}
+        ctx['frame'] = _engine_frame(data['db'])
+        results = {}
+        for name, func in BENCHMARKS:
+            if only and name not in only:
+                continue
+            try:
+                times, rows, extra = func(ctx, repeat)
+            except Skip as e:
+                results[name] = {'status': 'skipped', 'reason': str(e)}
+                log(f"  {name:<24} atlandı ({e})")
+                continue
+            best = min(times)
+            results[name] = dict({
+                'status': 'ok',
+                'best_s': round(best, 6),
+                'mean_s': round(sum(times) / len(times), 6),
+                'rows': rows,
+                'rows_per_s': round(rows / best, 1) if best > 0 else None,
+            }, **extra)
+            log(f"  {name:<24} {best * 1000:10.1f} ms  ({results[name]['rows_per_s']} satır/sn)")
+        data['db'].close_connections()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'size': size,
+            'repeat': repeat,
+            'workers': workers,
+            'months': months,
+            'tersaneler': tersaneler,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'git': _git_revision(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Baseline'a göre gerilemeleri döndürür: [(ad, baseline_s, current_s, oran), ...].
+    Sadece her iki tarafta da 'ok' olan ve aynı boyutta çalışmış ölçümler karşılaştırılır.
+    """
+    if not baseline or baseline.get('meta', {}).get('size') != current.get('meta', {}).get('size'):
+        return []
+    regressions = []
+    for name, res in current.get('results', {}).items():
+        base = baseline.get('results', {}).get(name)
+        if not base or res.get('status') != 'ok' or base.get('status') != 'ok' or not base.get('best_s'):
+            continue
+        ratio = res['best_s'] / base['best_s']
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base['best_s'], res['best_s'], round(ratio, 3)))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puantaj hakediş/DB benchmark")
+    parser.add_argument("--size", choices=sorted(SIZES), default="medium")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", choices=[name for name, _ in BENCHMARKS])
+    parser.add_argument("--output", help="sonuç JSON dosyası (varsayılan: benchmarks/results/<zaman>.json)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="izin verilen yavaşlama oranı (0.2 = %%20)")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.size, max(1, args.repeat), args.only)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}_{args.size}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Sonuçlar: {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Baseline güncellendi: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("Baseline yok; --update-baseline ile oluşturun.")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get('meta', {}).get('size') != args.size:
+        print(f"Baseline farklı boyutta ({baseline.get('meta', {}).get('size')}); karşılaştırma yapılmadı.")
+        return 0
+    regressions = compare(current, baseline, args.threshold)
+    for name, base_s, cur_s, ratio in regressions:
+        print(f"GERİLEME: {name}: {base_s * 1000:.1f} ms -> {cur_s * 1000:.1f} ms (x{ratio})")
+    if not regressions:
+        print("Gerileme yok.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark için sentetik puantaj verisi.
+
+generate_database: N personel × M ay, birden çok tersane, yevmiyeci/maktu karışımı,
+resmi tatiller ve avanslarla dolu bir SQLite veritabanı oluşturur.
+write_upload_csv: UploadWorker'ın okuyabileceği (Tarih, Ad Soyad, Giriş, Çıkış, Kayıp) CSV dosyası yazar.
+Aynı seed ile her çalıştırmada aynı veri üretilir.
+"""
+import calendar
+import csv
+import random
+
+import pandas as pd
+
+from core.database import Database
+from core.hesaplama import hesapla_hakedis_batch
+
+GIRIS_SAATLERI = ["07:55", "08:00", "08:00", "08:05", "08:10", "08:25", "08:40", "09:15"]
+CIKIS_SAATLERI = ["16:45", "17:00", "17:00", "17:05", "17:40", "18:00", "18:30", "19:30", "20:15"]
+KAYIP_SURELERI = ["", "", "", "", "00:30", "01:00", "01:30"]
+DINI_TATILLER = [("2025-03-31", "Ramazan Bayramı"), ("2025-06-06", "Kurban Bayramı"), ("2025-06-07", "Kurban Bayramı")]
+
+
+def month_range(start, months):
+    """'YYYY-MM' başlangıcından itibaren (yil, ay) listesi."""
+    yil, ay = (int(p) for p in start.split("-"))
+    out = []
+    for _ in range(months):
+        out.append((yil, ay))
+        ay += 1
+        if ay > 12:
+            yil, ay = yil + 1, 1
+    return out
+
+
+def person_names(workers):
+    return [f"Personel {i:05d}" for i in range(workers)]
+
+
+def daily_rows(names, months, seed=42, gelmedi_orani=0.05):
+    """(tarih, ad, giris, cikis, kayip) satırları; Pazar günleri çoğunlukla boş."""
+    rnd = random.Random(seed)
+    rows = []
+    for yil, ay in months:
+        for gun in range(1, calendar.monthrange(yil, ay)[1] + 1):
+            tarih = f"{yil}-{ay:02d}-{gun:02d}"
+            pazar = calendar.weekday(yil, ay, gun) == 6
+            for ad in names:
+                if rnd.random() < (0.85 if pazar else gelmedi_orani):
+                    rows.append((tarih, ad, "", "", ""))
+                    continue
+                rows.append((tarih, ad, rnd.choice(GIRIS_SAATLERI), rnd.choice(CIKIS_SAATLERI), rnd.choice(KAYIP_SURELERI)))
+    return rows
+
+
+def generate_database(db_path, workers=200, months=3, tersaneler=2, yevmiyeci_orani=0.3, start="2025-01", seed=42):
+    """
+    Benchmark veritabanını oluşturur ve doldurur.
+    Dönüş: {'db': Database, 'tersane_ids': [...], 'months': [(yil, ay), ...], 'rows': gunluk_kayit satır sayısı}
+    """
+    rnd = random.Random(seed)
+    db = Database(db_path)
+    tersane_ids = [db.add_tersane(f"Bench Tersane {i + 1}") for i in range(tersaneler)]
+    for tarih, ad in DINI_TATILLER:
+        db.add_holiday(tarih, ad, 7.5, 7.5, "")
+    month_list = month_range(start, months)
+    names = person_names(workers)
+    personel = []
+    for i, ad in enumerate(names):
+        yev = 1 if rnd.random() < yevmiyeci_orani else 0
+        ozel = "Cumartesi Gelmez" if rnd.random() < 0.05 else None
+        personel.append((ad, 1500.0 if yev else 45000.0, f"Ekip {i % 12}", ozel, yev, tersane_ids[i % len(tersane_ids)]))
+    flags = {p[0]: {'yevmiyeci': p[4], 'ozel_durum': p[3]} for p in personel}
+    tersane_by_name = {p[0]: p[5] for p in personel}
+
+    rows = daily_rows(names, month_list, seed=seed)
+    df = pd.DataFrame(rows, columns=['tarih', 'ad_soyad', 'giris', 'cikis', 'kayip'])
+    calendar_ = db.get_holiday_calendar()
+    res = hesapla_hakedis_batch(df, db.get_settings_cache().get('shipyard_rules'), calendar_.keys, flags,
+                                calendar_.holiday_info)
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO personel (ad_soyad, maas, ekip_adi, ozel_durum, yevmiyeci_mi, tersane_id) VALUES (?,?,?,?,?,?)",
+            personel)
+        conn.executemany(
+            "INSERT INTO gunluk_kayit (tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, "
+            "hesaplanan_normal, hesaplanan_mesai, aciklama, tersane_id, firma_id) VALUES (?,?,?,?,?,?,?,?,?,1)",
+            ((r[0], r[1], r[2], r[3], r[4], n, m, a, tersane_by_name[r[1]])
+             for r, n, m, a in zip(rows, res['normal'].tolist(), res['mesai'].tolist(), res['aciklama'].tolist())))
+        avanslar = [(f"{yil}-{ay:02d}-15", ad, "Avans", float(rnd.randrange(500, 5000, 250)), "")
+                    for yil, ay in month_list for ad in names if rnd.random() < 0.3]
+        conn.executemany("INSERT INTO avans_kesinti (tarih, ad_soyad, tur, tutar, aciklama) VALUES (?,?,?,?,?)", avanslar)
+        conn.commit()
+    return {'db': db, 'tersane_ids': tersane_ids, 'months': month_list, 'rows': len(rows), 'personel': flags}
+
+
+def write_upload_csv(path, workers=200, months=1, start="2025-04", seed=7):
+    """UploadWorker için Excel dışa aktarımına benzer CSV (gg.aa.yyyy tarih) yazar; satır sayısını döndürür."""
+    rows = daily_rows(person_names(workers), month_range(start, months), seed=seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Tarih", "Ad Soyad", "Giriş", "Çıkış", "Kayıp Süre", "Görevi"])
+        for tarih, ad, giris, cikis, kayip in rows:
+            yil, ay, gun = tarih.split("-")
+            w.writerow([f"{gun}.{ay}.{yil}", ad, giris, cikis, kayip, "Kaynakçı"])
+    return len(rows)
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 import shutil
 import os
@@ -6,13 +7,38 @@ import threading
 import unicodedata
 from datetime import datetime, timedelta
 from pathlib import Path
-from core.hesaplama import hesapla_hakedis, NORMAL_GUNLUK_SAAT
+import pandas as pd
+from core.hesaplama import hesapla_hakedis_batch, KatsayiIndex, KURAL_PARMAK_IZI_KEY, NORMAL_GUNLUK_SAAT, SABAH_TOLERANS_DK
+from core.holiday_calendar import HolidayCalendar
+from core.recalc_scope import rules_fingerprint, row_fingerprints
+from core.upload_registry import (UPLOAD_CHECKPOINT_KEY, UPLOAD_PROGRESS_KEY, join_checkpoint, progress_json,
+                                  split_checkpoint)
 import migrations
+from migrations.migrations import AD_KEY_REPLACEMENTS, minute_sql
 try:
     import bcrypt
 except Exception:
     bcrypt = None
 
+_AD_KEY_TABLE = str.maketrans({**{chr(c): chr(c + 32) for c in range(ord('A'), ord('Z') + 1)},
+                                **dict(AD_KEY_REPLACEMENTS)})
+
+
+def ad_key(ad_soyad):
+    """ad_key kolonunun Python karşılığı (migration_014 ifadesiyle birebir): kırpılmış, Türkçe küçük harf."""
+    return str(ad_soyad or '').strip(' ').translate(_AD_KEY_TABLE)  # WHY: SQLite trim() yalnızca boşluğu kırpar.
+
+
+# WHY: tek kişiyi hedefleyen sorgular (yazmalar, kart ve kayıt okumaları) eski TRIM(ad_soyad)=TRIM(?) eşleşmesini korur.
+# ad_key indeksi satırları daraltır, TRIM karşılaştırması yalnızca "ali veli"/"ALİ VELİ" gibi ayrı kişileri ayırır.
+AD_EXACT_SQL = "ad_key=? AND TRIM(ad_soyad)=TRIM(?)"
+
+
+def ad_exact_params(ad_soyad):
+    """AD_EXACT_SQL parametreleri: (ad_key, ham ad)."""
+    return (ad_key(ad_soyad), ad_soyad)
+
+
 def get_default_db_path():
     appdata = os.getenv('APPDATA') or os.path.expanduser('~/.config')
     path = Path(appdata) / "SaralGroup" / "PuantajApp"
@@ -30,6 +56,7 @@ def backup_database(keep_days=7):
         today_str = datetime.now().strftime("%Y-%m-%d")
         backup_file = backup_dir / f"puantaj_{today_str}.db"
         if not backup_file.exists():
+            _checkpoint_wal(db_path)
             shutil.copy2(db_path, backup_file)
         # Eski yedekleri temizle (keep_days günden eskiler)
         cutoff = datetime.now() - timedelta(days=keep_days)
@@ -43,6 +70,18 @@ def backup_database(keep_days=7):
     except Exception:
         pass  # Yedekleme hatası uygulamayı durdurmasın
 
+def _checkpoint_wal(db_file):
+    """WAL içeriğini ana dosyaya yazar; dosya kopyalamalı yedek güncel veriyi içersin."""
+    # WHY: havuzlanan bağlantılar açık kaldığı için WAL otomatik olarak boşaltılmayabilir.
+    try:
+        conn = sqlite3.connect(str(db_file))
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass  # SAFEGUARD: checkpoint hatası yedeklemeyi engellemesin.
+
 def relocate_old_db_if_present(target_db):
     possible_old = [
         Path.cwd() / "puantaj.db",
@@ -82,9 +121,123 @@ def _check_bcrypt(password, hashed):
     except Exception:
         return False
 
+# --- BAĞLANTI HAVUZU ---
+# WHY: her metot çağrısında sqlite3.connect açıp kapatmak sıcak yollarda (satır başına
+# get_holiday_info/get_setting) pahalı; bağlantılar thread başına havuzlanıp tekrar kullanılır.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",  # ~20 MB sayfa önbelleği (negatif değer = KiB)
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
+POOL_MAX_IDLE_PER_THREAD = 4
+
+
+class _PooledConnection(sqlite3.Connection):
+    """with bloğu bittiğinde veya close() çağrıldığında kapanmaz, havuza geri döner."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._depth = 0  # WHY: iç içe 'with conn:' blokları; en dıştaki bitince iade edilir.
+
+    def __enter__(self):
+        self._depth += 1
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            return super().__exit__(exc_type, exc_value, tb)  # SAFE: commit/rollback davranışı aynı.
+        finally:
+            self._depth = max(0, self._depth - 1)
+            if self._depth == 0:
+                self._release()
+
+    def close(self):
+        self._depth = 0
+        self._release()
+
+    def _release(self):
+        if self._pool is None:
+            super().close()
+        else:
+            self._pool.release(self)
+
+    def close_for_real(self):
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Thread başına SQLite bağlantı havuzu.
+    Ödünç verilen bağlantı iade edilene kadar başka çağrıya verilmez; iç içe get_connection()
+    çağrıları eskisi gibi ayrı bağlantı alır. PRAGMA'lar bağlantı açılırken bir kez uygulanır.
+    """
+
+    def __init__(self, db_file, max_idle=POOL_MAX_IDLE_PER_THREAD):
+        self.db_file = db_file
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _idle(self):
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def acquire(self):
+        idle = self._idle()
+        if idle:
+            conn = idle.pop()
+            with self._stats_lock:
+                self.reused += 1
+            return conn
+        conn = sqlite3.connect(self.db_file, factory=_PooledConnection)
+        for pragma in SQLITE_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error:
+                pass  # SAFEGUARD: desteklenmeyen PRAGMA (ör. salt okunur dosya) bağlantıyı engellemesin.
+        conn._pool = self
+        with self._stats_lock:
+            self.opened += 1
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # WHY: eski davranışta bağlantı kapanınca commit edilmemiş iş geri alınırdı.
+            conn.row_factory = None
+        except sqlite3.ProgrammingError:
+            return  # SAFE: farklı thread'den iade edilen bağlantı havuza alınmaz.
+        idle = self._idle()
+        if any(c is conn for c in idle):
+            return
+        if len(idle) < self.max_idle:
+            idle.append(conn)
+        else:
+            conn.close_for_real()
+
+    def close_all(self):
+        """Bu thread'in boştaki bağlantılarını kapatır."""
+        idle = self._idle()
+        while idle:
+            idle.pop().close_for_real()
+
+    def stats(self):
+        with self._stats_lock:
+            return {'opened': self.opened, 'reused': self.reused}
+
+
 class Database:
     _init_lock = threading.RLock()  # WHY: protect one-time schema bootstrap from concurrent page/thread starts.
     _initialized_db_files = set()  # WHY: avoid rerunning heavy init/migrations for same DB in one process.
+    _holiday_versions = {}  # WHY: tatil değişince aynı DB'yi kullanan tüm instance'ların takvimi yenilensin.
     # --- AY KİLİT API ---
     def is_month_locked(self, year, month, firma_id):
         from migrations.ay_kilit import AyKilitDB
@@ -131,6 +284,10 @@ class Database:
             'settings_cache': {},
             'personnel_list': {},
         }
+        # WHY: havuz instance'a aittir; use_cache=False worker instance'ları kendi bağlantılarını kullanır.
+        self._conn_pool = ConnectionPool(self.db_file)
+        self._holiday_calendar = None
+        self._holiday_calendar_version = None
         self._ensure_schema_initialized()
 
     @staticmethod
@@ -165,6 +322,14 @@ class Database:
         self.ensure_trash_schema()  # NEW: keep trash tables aligned with daily record schema.
         self.ensure_izin_backup_schema()  # NEW: keep pre-leave snapshot for safe leave delete/restore.
         self.ensure_gunluk_kayit_batch_cols()  # NEW: import_batch_id gibi batch kolonlarını garantile.
+        self.ensure_schema_migrations()  # NEW: performans kolonları/indeksleri (idempotent migration'lar).
+
+    def ensure_schema_migrations(self):
+        """migrations.IDEMPOTENT_SCHEMA_MIGRATIONS listesini sırayla uygular (tekrar çalıştırmak güvenli)."""
+        from migrations.migrations import IDEMPOTENT_SCHEMA_MIGRATIONS
+        with self.get_connection() as conn:
+            for mig in IDEMPOTENT_SCHEMA_MIGRATIONS:
+                mig(conn)
 
     def ensure_gunluk_kayit_batch_cols(self):
         """gunluk_kayit tablosuna import_batch_id yoksa ekler. Migration versiyonundan bağımsız güvenli yol."""
@@ -532,7 +697,15 @@ class Database:
 
 
     def get_connection(self):
-        return sqlite3.connect(self.db_file)
+        return self._conn_pool.acquire()
+
+    def get_connection_stats(self):
+        """Havuz sayaçları: {'opened': açılan bağlantı, 'reused': tekrar kullanılan bağlantı}."""
+        return self._conn_pool.stats()
+
+    def close_connections(self):
+        """Bu thread'deki boştaki havuz bağlantılarını kapatır (ör. dosya silinmeden/yedek dönmeden önce)."""
+        self._conn_pool.close_all()
 
 
     def init_db(self):
@@ -643,7 +816,18 @@ class Database:
                                 old_ucret      REAL,
                                 old_durum      TEXT,
                                 changed_at     TEXT,
-                                PRIMARY KEY (batch_id, ad_soyad))'''
+                                PRIMARY KEY (batch_id, ad_soyad))''',
+                "upload_import_registry": '''CREATE TABLE IF NOT EXISTS upload_import_registry (
+                                file_hash    TEXT NOT NULL,
+                                sheet        TEXT NOT NULL DEFAULT '',
+                                firma_filter TEXT NOT NULL DEFAULT '',
+                                tersane_id   INTEGER NOT NULL DEFAULT 0,
+                                firma_id     INTEGER,
+                                batch_id     TEXT,
+                                file_name    TEXT,
+                                row_count    INTEGER DEFAULT 0,
+                                imported_at  TEXT,
+                                PRIMARY KEY (file_hash, sheet, firma_filter, tersane_id))'''
             }
             
             for sql in tables.values():
@@ -789,6 +973,11 @@ class Database:
             if cached:
                 return dict(cached)  # SAFE: shallow copy prevents accidental mutation of cached dict.
         rules = self.get_shipyard_rules(tersane_id=tersane_id, fallback_global=True)
+        # NEW: katsayı bantları bir kez derlenir; hesapla_mesai_tutar bisect ile arar.
+        rules['mesai_katsayi_index'] = KatsayiIndex(rules.get('mesai_katsayilari'))
+        rules['yevmiye_katsayi_index'] = KatsayiIndex(rules.get('yevmiye_katsayilari'))
+        # NEW: kural özeti; hesapla_hakedis gün sonucu önbelleğini bu anahtarla ayırır.
+        rules[KURAL_PARMAK_IZI_KEY] = rules_fingerprint(rules)
         cache = dict(rules)  # SAFE: copy to keep original keys for legacy callers.
         cache['shipyard_rules'] = rules  # NEW: explicit shipyard_rules dict for dynamic rule access.
         if use_cache:
@@ -805,6 +994,7 @@ class Database:
             conn.execute("INSERT OR REPLACE INTO resmi_tatiller (tarih, tur, normal_saat, mesai_saat, aciklama) VALUES (?, ?, ?, ?, ?)",
                             (tarih, tur, normal_saat, mesai_saat, aciklama))
             conn.commit()
+        self._invalidate_holiday_calendar()
         self.update_records_for_holiday(tarih)
 
 
@@ -813,15 +1003,31 @@ class Database:
             return conn.execute("SELECT tarih, tur, normal_saat, mesai_saat, aciklama FROM resmi_tatiller ORDER BY tarih").fetchall()
 
 
+    def _holiday_version_key(self):
+        return self._db_init_key(self.db_file) or id(self)  # SAFE: in-memory DB instance'a özeldir.
+
+    def _invalidate_holiday_calendar(self):
+        """Tatil tablosu değişti; bu DB'yi kullanan tüm instance'ların takvimi yeniden yüklensin."""
+        key = self._holiday_version_key()
+        with type(self)._init_lock:
+            versions = type(self)._holiday_versions
+            versions[key] = versions.get(key, 0) + 1
+        self._holiday_calendar = None
+
+    def get_holiday_calendar(self):
+        """resmi_tatiller tablosunu bir kez okuyup bellek içi HolidayCalendar döndürür."""
+        version = type(self)._holiday_versions.get(self._holiday_version_key(), 0)
+        cal = self._holiday_calendar
+        if cal is None or self._holiday_calendar_version != version:
+            with self.get_connection() as conn:
+                cal = HolidayCalendar.from_connection(conn)
+            self._holiday_calendar = cal
+            self._holiday_calendar_version = version
+        return cal
+
     def get_holiday_info(self, tarih):
-        try: dt = datetime.strptime(tarih, "%Y-%m-%d"); tarih_key = dt.strftime("%m-%d")
-        except Exception: tarih_key = tarih
-        with self.get_connection() as conn:
-            # Önce tam tarih (YYYY-MM-DD) ile ara (dini tatiller), sonra MM-DD (sabit tatiller)
-            row = conn.execute("SELECT tur, normal_saat, mesai_saat FROM resmi_tatiller WHERE tarih=?", (tarih,)).fetchone()
-            if row:
-                return row
-            return conn.execute("SELECT tur, normal_saat, mesai_saat FROM resmi_tatiller WHERE tarih=?", (tarih_key,)).fetchone()
+        # Önce tam tarih (YYYY-MM-DD) ile ara (dini tatiller), sonra MM-DD (sabit tatiller)
+        return self.get_holiday_calendar().holiday_info(tarih)
 
 
     def delete_holiday(self, tarih):
@@ -837,12 +1043,12 @@ class Database:
                     delete_key = tarih
             conn.execute("DELETE FROM resmi_tatiller WHERE tarih=?", (delete_key,))
             conn.commit()
+        self._invalidate_holiday_calendar()
         self.update_records_for_holiday(delete_key)
         
 
     def get_holidays(self):
-        with self.get_connection() as conn:
-            return {row[0] for row in conn.execute("SELECT tarih FROM resmi_tatiller").fetchall()}
+        return set(self.get_holiday_calendar().keys)
 
 
     def init_resmi_tatiller(self):
@@ -869,6 +1075,7 @@ class Database:
                     (d, "Resmi Tatil", 7.5, 0, t),
                 )
             conn.commit()
+        self._invalidate_holiday_calendar()
 
     def seed_dini_tatiller(self, year: int) -> int:
         """Belirtilen yıl için Ramazan/Kurban tatil tarihlerini ekler (Diyanet takvimi). Mevcut kayıtlar korunur."""
@@ -963,109 +1170,122 @@ class Database:
                 )
                 count += cur.rowcount
             conn.commit()
+        if count:
+            self._invalidate_holiday_calendar()
         return count  # WHY: caller shows how many were actually inserted (0 if all already existed).
 
     # --- PERFORMANS VE HESAPLAMA ---
 
     def update_records_for_holiday(self, tarih):
         # NEW: per-tersane settings_cache to avoid cross-shipyard mixing.
-        settings_cache_by_tersane = {}  # SAFE: memoize by tersane_id to keep performance.
         with self.get_connection() as conn:
             c = conn.cursor()
-            sql = "SELECT id, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, tarih FROM gunluk_kayit WHERE "
+            sql = "SELECT id, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, giris_dk, cikis_dk, kayip_dk, tarih FROM gunluk_kayit WHERE "
             if len(tarih) == 5 and tarih[2] == "-": sql += "substr(tarih,6,5)=?"
             else: sql += "tarih=?"
             sql += " AND COALESCE(manuel_kilit,0)=0"
             # NEW: try to include tersane_id column; fallback to legacy schema if needed.
             try:
                 rows = c.execute(sql.replace("tarih", "tarih, tersane_id", 1), (tarih,)).fetchall()
-                has_tersane_col = True
             except Exception:
-                rows = c.execute(sql, (tarih,)).fetchall()
-                has_tersane_col = False
-
-            for rec in rows:
-                if has_tersane_col:
-                    rec_id, ad, giris, cikis, kayip, rec_tarih, rec_tersane_id = rec
-                else:
-                    rec_id, ad, giris, cikis, kayip, rec_tarih = rec
-                    rec_tersane_id = 0  # SAFE: legacy rows treated as global.
-                p_res = c.execute("SELECT yevmiyeci_mi, ozel_durum FROM personel WHERE ad_soyad=?", (ad,)).fetchone()
-                yevmiyeci = p_res[0] if p_res else 0
-                ozel_durum = p_res[1] if p_res else None
-
-                # NEW: choose correct settings_cache by tersane_id (0 = global).
-                tid = rec_tersane_id or 0
-                if tid not in settings_cache_by_tersane:
-                    settings_cache_by_tersane[tid] = self.get_settings_cache(tersane_id=tid) if tid else self.get_settings_cache()
-                settings_cache = settings_cache_by_tersane[tid]
-                
-                normal, mesai, notlar = hesapla_hakedis(
-                    rec_tarih, giris, cikis, kayip, {rec_tarih},
-                    self.get_holiday_info, lambda x: ozel_durum, ad, yevmiyeci, 
-                    db=self, settings_cache=settings_cache.get('shipyard_rules', settings_cache) if settings_cache else None
-                )
-                c.execute("UPDATE gunluk_kayit SET hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=? WHERE id=?", 
-                            (normal, mesai, notlar, rec_id))
+                rows = [tuple(r) + (0,) for r in c.execute(sql, (tarih,)).fetchall()]  # SAFE: legacy rows treated as global.
+            if not rows:
+                return
+            personnel = self._load_personnel_flags(c)
+            df = pd.DataFrame(rows, columns=['id', 'ad_soyad', 'giris', 'cikis', 'kayip', 'giris_dk', 'cikis_dk', 'kayip_dk',
+                                             'tarih', 'tersane_id'])
+            # WHY: güncel tatil listesi kullanılır; silinen tatil artık tatil sayılmaz.
+            updates = self._recalc_frame(df, personnel, self.get_holidays(), skip_matching=False)
+            c.executemany("UPDATE gunluk_kayit SET hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=?, kural_parmak_izi=? WHERE id=?", updates)
             conn.commit()
 
 
     def update_records_for_person(self, ad_soyad, start_date=None, end_date=None, tersane_id=None):
         # NEW: tersane_id optional; per-shipyard cache avoids mixing across shipyards.
-        settings_cache_by_tersane = {}  # SAFE: memoize by tersane_id for performance.
         with self.get_connection() as conn:
             c = conn.cursor()
             # NEW: try to read person's tersane_id for fallback (keeps old behavior if missing).
             try:
-                c.execute("SELECT yevmiyeci_mi, ozel_durum, tersane_id FROM personel WHERE TRIM(ad_soyad)=TRIM(?)", (ad_soyad,))
+                c.execute("SELECT yevmiyeci_mi, ozel_durum, tersane_id FROM personel WHERE " + AD_EXACT_SQL, ad_exact_params(ad_soyad))
                 pres = c.fetchone()
                 yevmiyeci = pres[0] if pres else 0
                 ozel_durum = pres[1] if pres else None
                 person_tersane_id = pres[2] if pres and len(pres) > 2 else 0
             except Exception:
-                c.execute("SELECT yevmiyeci_mi, ozel_durum FROM personel WHERE TRIM(ad_soyad)=TRIM(?)", (ad_soyad,))
+                c.execute("SELECT yevmiyeci_mi, ozel_durum FROM personel WHERE " + AD_EXACT_SQL, ad_exact_params(ad_soyad))
                 pres = c.fetchone()
                 yevmiyeci = pres[0] if pres else 0
                 ozel_durum = pres[1] if pres else None
                 person_tersane_id = 0  # SAFE: legacy fallback.
             
             # NEW: try to include tersane_id in record query; fallback to legacy schema if needed.
-            sql = "SELECT id, tarih, giris_saati, cikis_saati, kayip_sure_saat, tersane_id FROM gunluk_kayit WHERE TRIM(ad_soyad)=TRIM(?) AND COALESCE(manuel_kilit,0)=0"
-            params = [ad_soyad]
+            sql = "SELECT id, tarih, giris_saati, cikis_saati, kayip_sure_saat, giris_dk, cikis_dk, kayip_dk, tersane_id, kural_parmak_izi FROM gunluk_kayit WHERE " + AD_EXACT_SQL + " AND COALESCE(manuel_kilit,0)=0"
+            params = list(ad_exact_params(ad_soyad))
             if start_date and end_date:
                 sql += " AND tarih BETWEEN ? AND ?"
                 params.extend([start_date, end_date])
             try:
                 rows = c.execute(sql, tuple(params)).fetchall()
-                has_tersane_col = True
             except Exception:
-                rows = c.execute(sql.replace(", tersane_id", ""), tuple(params)).fetchall()
-                has_tersane_col = False
-                
-            for rec in rows:
-                if has_tersane_col:
-                    rec_id, tarih, giris, cikis, kayip, rec_tersane_id = rec
-                else:
-                    rec_id, tarih, giris, cikis, kayip = rec
-                    rec_tersane_id = 0
-                holiday_info = self.get_holiday_info(tarih)
-                holiday_set = {tarih} if holiday_info else set()
-
-                # NEW: choose the most specific tersane_id available.
-                effective_tid = tersane_id if (tersane_id and tersane_id > 0) else (rec_tersane_id or person_tersane_id or 0)
-                if effective_tid not in settings_cache_by_tersane:
-                    settings_cache_by_tersane[effective_tid] = self.get_settings_cache(tersane_id=effective_tid) if effective_tid else self.get_settings_cache()
-                settings_cache = settings_cache_by_tersane[effective_tid]
-                
-                normal, mesai, notlar = hesapla_hakedis(
-                    tarih, giris, cikis, kayip, holiday_set,
-                    self.get_holiday_info, lambda x: ozel_durum, ad_soyad, yevmiyeci, 
-                    db=self, settings_cache=settings_cache.get('shipyard_rules', settings_cache) if settings_cache else None
-                )
-                c.execute("UPDATE gunluk_kayit SET hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=? WHERE id=?", 
-                            (normal, mesai, notlar, rec_id))
+                rows = [tuple(r) + (0, None) for r in c.execute(sql.replace(", tersane_id, kural_parmak_izi", ""), tuple(params)).fetchall()]
+            if not rows:
+                return
+
+            df = pd.DataFrame(rows, columns=['id', 'tarih', 'giris', 'cikis', 'kayip', 'giris_dk', 'cikis_dk', 'kayip_dk',
+                                             'tersane_id', 'kural_parmak_izi'])
+            # NEW: choose the most specific tersane_id available.
+            if tersane_id and tersane_id > 0:
+                df['tersane_id'] = tersane_id
+            else:
+                df['tersane_id'] = df['tersane_id'].fillna(0).astype(int).replace(0, person_tersane_id or 0)
+            df['yevmiyeci'] = bool(yevmiyeci)
+            df['ozel_durum'] = ozel_durum
+            updates = self._recalc_frame(df, None, self.get_holidays())  # WHY: parmak izi eşleşen satırlar atlanır.
+            if updates:
+                c.executemany("UPDATE gunluk_kayit SET hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=?, kural_parmak_izi=? WHERE id=?", updates)
             conn.commit()
 
+    def _load_personnel_flags(self, cursor):
+        """Toplu hesaplama için personel yevmiyeci/özel durum bilgisini tek sorguda okur (TRIM'li ad anahtarı)."""
+        personnel = {}
+        for ad, yevmiyeci, ozel_durum in cursor.execute("SELECT ad_soyad, yevmiyeci_mi, ozel_durum FROM personel").fetchall():
+            key = (ad or "").strip()
+            if key not in personnel:  # WHY: TRIM eşleşmesinde ilk satır kazanır (tekil sorgu davranışı).
+                personnel[key] = {'yevmiyeci': yevmiyeci or 0, 'ozel_durum': ozel_durum}
+        return personnel
+
+    def _recalc_frame(self, df, personnel, holiday_set, settings_cache_by_tersane=None, skip_matching=True):
+        """
+        df satırlarını tersane bazında hesapla_hakedis_batch ile hesaplar.
+        df kolonları: id, tarih, giris, cikis, kayip, tersane_id (+ ad_soyad veya yevmiyeci/ozel_durum,
+        opsiyonel kural_parmak_izi).
+        skip_matching: kayıtlı parmak izi güncel kurallarla aynı olan satırlar atlanır.
+        Dönüş: executemany için (normal, mesai, aciklama, kural_parmak_izi, id) listesi.
+        """
+        if settings_cache_by_tersane is None:
+            settings_cache_by_tersane = {}  # SAFE: memoize by tersane_id to keep performance.
+        if personnel is not None and 'ad_soyad' in df.columns:
+            df = df.assign(ad_soyad=df['ad_soyad'].map(lambda v: v.strip() if isinstance(v, str) else v))
+        updates = []
+        tids = df['tersane_id'].fillna(0).astype(int)
+        for tid, part in df.groupby(tids, sort=False):
+            tid = int(tid or 0)
+            if tid not in settings_cache_by_tersane:
+                settings_cache_by_tersane[tid] = self.get_settings_cache(tersane_id=tid) if tid else self.get_settings_cache()
+            settings_cache = settings_cache_by_tersane[tid]
+            rules = settings_cache.get('shipyard_rules', settings_cache) if settings_cache else None
+            fps = row_fingerprints(part, rules_fingerprint(rules), self.get_holiday_info, personnel)
+            if skip_matching and 'kural_parmak_izi' in part.columns:
+                stale = [fp != old for fp, old in zip(fps, part['kural_parmak_izi'].tolist())]
+                part = part[stale]
+                fps = [fp for fp, keep in zip(fps, stale) if keep]
+                if part.empty:
+                    continue
+            res = hesapla_hakedis_batch(part, rules, holiday_set, personnel, self.get_holiday_info, db=self)
+            updates.extend(zip(res['normal'].tolist(), res['mesai'].tolist(), res['aciklama'].tolist(),
+                               fps, part['id'].astype(int).tolist()))
+        return updates
+
     # --- PERSONEL VE KAYIT FONKSİYONLARI ---
 
     def get_all_personnel(self):
@@ -1107,8 +1327,8 @@ class Database:
         record_filter = ""
         params = [tid, tid]
         if year and month:
-            record_filter = " AND strftime('%Y', g.tarih)=? AND strftime('%m', g.tarih)=?"  # WHY: filter by active period if provided.
-            params += [str(year), f"{month:02d}"]
+            record_filter = " AND g.yil_ay = ?"  # WHY: filter by active period if provided (idx_gunluk_tersane_yil_ay).
+            params.append(f"{year}-{month:02d}")
         sql = (
             "SELECT DISTINCT TRIM(p.ad_soyad) FROM personel p WHERE p.tersane_id = ? "
             "UNION "
@@ -1127,13 +1347,13 @@ class Database:
                 record_filter = " AND g.tersane_id = ?"  # WHY: use selected tersane from daily records, not personel card.
                 record_params = [tersane_id]  # WHY: parameterize tersane filter for safety.
                 if year and month:
-                    record_filter += " AND strftime('%Y', g.tarih) = ? AND strftime('%m', g.tarih) = ?"  # WHY: apply period filter on actual work records.
-                    record_params += [str(year), f"{month:02d}"]  # WHY: keep same date formatting as elsewhere.
+                    record_filter += " AND g.yil_ay = ?"  # WHY: apply period filter on actual work records.
+                    record_params.append(f"{year}-{month:02d}")  # WHY: keep same date formatting as elsewhere.
                 c.execute("""SELECT p.ad_soyad, p.maas, p.ekip_adi, p.ozel_durum, p.ekstra_odeme, p.yillik_izin_hakki, p.ise_baslangic, p.cikis_tarihi,
                                 COALESCE(p.ekstra_odeme_not, ''), COALESCE(p.avans_not, ''), COALESCE(p.yevmiyeci_mi, 0), COALESCE(p.gorevi, '')
                                 FROM personel p
-                                WHERE TRIM(p.ad_soyad) IN (
-                                    SELECT DISTINCT TRIM(g.ad_soyad)
+                                WHERE p.personel_id IN (
+                                    SELECT DISTINCT g.personel_id
                                     FROM gunluk_kayit g
                                     WHERE 1=1""" + record_filter + """
                                 )
@@ -1156,11 +1376,11 @@ class Database:
                     tersane_filter = " AND p.tersane_id = ?"  # WHY: preserve strict filtering by tersane when requested.
                     tersane_params = [tersane_id]  # WHY: keep parameterized query for selected tersane.
             if year and month:
-                c.execute("""SELECT DISTINCT p.ad_soyad, p.maas, p.ekip_adi, p.ozel_durum, p.ekstra_odeme, p.yillik_izin_hakki, p.ise_baslangic, p.cikis_tarihi,
+                c.execute("""SELECT p.ad_soyad, p.maas, p.ekip_adi, p.ozel_durum, p.ekstra_odeme, p.yillik_izin_hakki, p.ise_baslangic, p.cikis_tarihi,
                         COALESCE(p.ekstra_odeme_not, ''), COALESCE(p.avans_not, ''), COALESCE(p.yevmiyeci_mi, 0), COALESCE(p.gorevi, '')
-                        FROM personel p INNER JOIN gunluk_kayit g ON p.ad_soyad = g.ad_soyad
-                        WHERE strftime('%Y', g.tarih) = ? AND strftime('%m', g.tarih) = ?""" + tersane_filter +
-                        " ORDER BY p.ad_soyad", tuple([str(year), f"{month:02d}"] + tersane_params))
+                        FROM personel p
+                        WHERE p.personel_id IN (SELECT g.personel_id FROM gunluk_kayit g WHERE g.yil_ay = ?)""" + tersane_filter +
+                        " ORDER BY p.ad_soyad", tuple([f"{year}-{month:02d}"] + tersane_params))
             else:
                 c.execute("""SELECT p.ad_soyad, p.maas, p.ekip_adi, p.ozel_durum, p.ekstra_odeme, p.yillik_izin_hakki, p.ise_baslangic, p.cikis_tarihi,
                                 COALESCE(p.ekstra_odeme_not, ''), COALESCE(p.avans_not, ''), COALESCE(p.yevmiyeci_mi, 0), COALESCE(p.gorevi, '') FROM personel p WHERE 1=1""" + tersane_filter +
@@ -1170,7 +1390,7 @@ class Database:
 
     def get_personnel(self, ad_soyad):
         with self.get_connection() as conn:
-            row = conn.execute("SELECT ad_soyad, maas, ekip_adi, ozel_durum, ekstra_odeme, yillik_izin_hakki, ise_baslangic, cikis_tarihi, ekstra_odeme_not, avans_not, yevmiyeci_mi FROM personel WHERE TRIM(ad_soyad)=TRIM(?)", (ad_soyad,)).fetchone()
+            row = conn.execute("SELECT ad_soyad, maas, ekip_adi, ozel_durum, ekstra_odeme, yillik_izin_hakki, ise_baslangic, cikis_tarihi, ekstra_odeme_not, avans_not, yevmiyeci_mi FROM personel WHERE " + AD_EXACT_SQL, ad_exact_params(ad_soyad)).fetchone()
             if not row: return None
             cols = ['ad_soyad', 'maas', 'ekip_adi', 'ozel_durum', 'ekstra_odeme', 'yillik_izin_hakki', 'ise_baslangic', 'cikis_tarihi', 'ekstra_odeme_not', 'avans_not', 'yevmiyeci_mi']
             return dict(zip(cols, row))
@@ -1178,7 +1398,7 @@ class Database:
 
     def get_personnel_special_status(self, ad_soyad):
         with self.get_connection() as conn:
-            res = conn.execute("SELECT ozel_durum FROM personel WHERE TRIM(ad_soyad)=TRIM(?)", (ad_soyad,)).fetchone()
+            res = conn.execute("SELECT ozel_durum FROM personel WHERE " + AD_EXACT_SQL, ad_exact_params(ad_soyad)).fetchone()
             return res[0] if res else None
 
 
@@ -1216,8 +1436,8 @@ class Database:
             for ad, gorevi in ad_gorev_pairs:
                 if gorevi and gorevi.strip():
                     conn.execute(
-                        "UPDATE personel SET gorevi=? WHERE TRIM(ad_soyad)=TRIM(?) AND (gorevi IS NULL OR TRIM(gorevi)='')",
-                        (gorevi.strip(), ad)
+                        "UPDATE personel SET gorevi=? WHERE " + AD_EXACT_SQL + " AND (gorevi IS NULL OR TRIM(gorevi)='')",
+                        (gorevi.strip(), *ad_exact_params(ad))
                     )
             conn.commit()
         self._invalidate_cache(groups=['personnel_list'])
@@ -1251,7 +1471,7 @@ class Database:
 
     def delete_unused_personnel(self):
         with self.get_connection() as conn:
-            conn.execute("DELETE FROM personel WHERE ad_soyad NOT IN (SELECT DISTINCT ad_soyad FROM gunluk_kayit)"); conn.commit()
+            conn.execute("DELETE FROM personel WHERE NOT EXISTS (SELECT 1 FROM gunluk_kayit g WHERE g.personel_id = personel.personel_id)"); conn.commit()
         self._invalidate_cache(groups=['personnel_list'])  # WHY: personel listesi değişti, cache tazelenmeli.
 
 
@@ -1274,10 +1494,12 @@ class Database:
     def get_records_by_month(self, year, month, tersane_id=None):
         month_str = f"{year}-{month:02d}"
         sql = """SELECT g.id, g.tarih, g.ad_soyad, g.giris_saati, g.cikis_saati,
-                        g.kayip_sure_saat, g.hesaplanan_normal, g.hesaplanan_mesai, g.aciklama, p.ekip_adi
-                    FROM gunluk_kayit g LEFT JOIN personel p ON g.ad_soyad = p.ad_soyad
-                    WHERE g.tarih LIKE ?"""
-        params = [f"{month_str}%"]
+                        g.kayip_sure_saat, g.hesaplanan_normal, g.hesaplanan_mesai, g.aciklama, p.ekip_adi,
+                        g.giris_dk > ? AS gec_mi
+                    FROM gunluk_kayit g LEFT JOIN personel p ON p.personel_id = g.personel_id
+                    WHERE g.yil_ay = ?"""
+        # WHY: geç bayrağı sorguda hesaplanır; giris_dk NULL ise (ayrıştırılamayan saat) gec_mi da NULL döner.
+        params = [SABAH_TOLERANS_DK, month_str]
         if tersane_id and tersane_id > 0:
             sql += " AND g.tersane_id = ?"
             params.append(tersane_id)
@@ -1291,11 +1513,11 @@ class Database:
                         g.kayip_sure_saat, g.hesaplanan_normal, g.hesaplanan_mesai, g.aciklama,
                         p.ekip_adi
                     FROM gunluk_kayit g
-                    LEFT JOIN personel p ON g.ad_soyad = p.ad_soyad
+                    LEFT JOIN personel p ON p.personel_id = g.personel_id
                     WHERE g.tarih BETWEEN ? AND ?"""
         params = [start_date, end_date]
         if team: sql += " AND p.ekip_adi = ?"; params.append(team)
-        if person: sql += " AND TRIM(g.ad_soyad) = TRIM(?)"; params.append(person)
+        if person: sql += " AND g.ad_key = ? AND TRIM(g.ad_soyad) = TRIM(?)"; params.extend(ad_exact_params(person))  # WHY: AD_EXACT_SQL, g. önekli (personel de ad_key taşır).
         if tersane_id and tersane_id > 0: sql += " AND g.tersane_id = ?"; params.append(tersane_id)
         sql += " ORDER BY g.tarih, g.ad_soyad"
         with self.get_connection() as conn:
@@ -1305,7 +1527,7 @@ class Database:
     def get_records_between_like(self, start_date, end_date, team=None, person_like=None, tersane_id=None):
         sql = """SELECT g.id, g.tarih, g.ad_soyad, g.giris_saati, g.cikis_saati,
                         g.kayip_sure_saat, g.hesaplanan_normal, g.hesaplanan_mesai, g.aciklama, p.ekip_adi
-                    FROM gunluk_kayit g LEFT JOIN personel p ON g.ad_soyad = p.ad_soyad
+                    FROM gunluk_kayit g LEFT JOIN personel p ON p.personel_id = g.personel_id
                     WHERE g.tarih BETWEEN ? AND ?"""
         params = [start_date, end_date]
         if team: sql += " AND p.ekip_adi = ?"; params.append(team)
@@ -1486,6 +1708,40 @@ class Database:
         except Exception:
             pass  # SAFEGUARD: metadata write failure must not block the UI.
 
+    def get_upload_checkpoint(self):
+        """Yarım kalan yüklemenin kontrol noktası (app_meta; ayarlar + ilerleme); yoksa veya okunamazsa None."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT value FROM app_meta WHERE key=?", (UPLOAD_CHECKPOINT_KEY,)).fetchone()
+                prog = conn.execute("SELECT value FROM app_meta WHERE key=?", (UPLOAD_PROGRESS_KEY,)).fetchone()
+            return join_checkpoint(row[0], prog[0] if prog else None) if row and row[0] else None
+        except Exception:
+            return None
+
+    def save_upload_checkpoint(self, checkpoint):
+        """Yükleme kontrol noktasını (ayarlar + ilerleme) app_meta'ya yazar; yükleme başında bir kez."""
+        static_json, progress_json = split_checkpoint(checkpoint)
+        with self.get_connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+                             [(UPLOAD_CHECKPOINT_KEY, static_json), (UPLOAD_PROGRESS_KEY, progress_json)])
+            conn.commit()
+
+    def save_upload_progress(self, checkpoint):
+        """Yalnızca dosya başına ilerlemeyi yazar (skip_keys dahil ayarlar yeniden yazılmaz)."""
+        with self.get_connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+                         (UPLOAD_PROGRESS_KEY, progress_json(checkpoint)))
+            conn.commit()
+
+    def clear_upload_checkpoint(self, batch_id=None):
+        """Kontrol noktasını siler; batch_id verilirse yalnızca o yüklemeye aitse."""
+        checkpoint = self.get_upload_checkpoint()
+        if checkpoint is None or (batch_id and checkpoint.get('batch_id') != batch_id):
+            return
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM app_meta WHERE key IN (?, ?)", (UPLOAD_CHECKPOINT_KEY, UPLOAD_PROGRESS_KEY))
+            conn.commit()
+
     def snapshot_personel_for_batch(self, batch_id, ad_soyad_list):
         """Yükleme öncesi personel tersane/firma bilgisini log tablosuna kaydeder."""
         if not ad_soyad_list:
@@ -1512,6 +1768,114 @@ class Database:
                 )
                 conn.commit()
 
+    def find_conflicting_keys(self, keys, tersane_id=None):
+        """
+        Yüklenecek (tarih, ad_soyad) anahtarlarından bu tersanede zaten kaydı olanları döndürür.
+        Anahtarlar geçici tabloya yüklenir ve idx_gunluk_unique_tersane üzerinden tek sorguda
+        eşleştirilir; tarih aralığındaki tüm kayıtlar belleğe çekilmez. Sıra girdi sırasıdır.
+        """
+        if not keys:
+            return []
+        with self.get_connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS upload_key_staging (tarih TEXT, ad_soyad TEXT)")
+            conn.execute("DELETE FROM temp.upload_key_staging")
+            conn.executemany("INSERT INTO temp.upload_key_staging VALUES (?,?)", keys)
+            rows = conn.execute(
+                "SELECT s.tarih, s.ad_soyad FROM temp.upload_key_staging s "
+                "WHERE EXISTS (SELECT 1 FROM gunluk_kayit g WHERE g.tarih=s.tarih AND g.ad_soyad=s.ad_soyad "
+                "AND COALESCE(g.tersane_id, -1)=COALESCE(?, -1)) ORDER BY s.rowid",
+                (tersane_id,)
+            ).fetchall()
+            conn.execute("DELETE FROM temp.upload_key_staging")
+            conn.commit()
+        return [(r[0], r[1]) for r in rows]
+
+    def merge_upload_rows(self, rows, firma_id=None, tersane_id=None, batch_id=None, checkpoint=None):
+        """
+        Hesaplanmış yükleme satırlarını gunluk_kayit'a tek transaction'da birleştirir.
+        rows: (tarih, ad_soyad, giris, cikis, kayip, normal, mesai, aciklama) demetleri.
+        Satırlar önce geçici staging tablosuna yüklenir, sonra tek INSERT ... ON CONFLICT DO UPDATE
+        ile yazılır: var olan kaydın id'si korunur (eski INSERT OR REPLACE silip yeniden ekliyordu).
+        Personel tersane ataması da tek UPDATE ile yapılır. Yazılan satır sayısını döndürür.
+        checkpoint verilirse (yükleme kontrol noktası) aynı transaction'da app_meta'ya yazılır.
+        """
+        if not rows:
+            return 0
+        with self.get_connection() as conn:
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS gunluk_kayit_staging ("
+                "tarih TEXT, ad_soyad TEXT, giris_saati TEXT, cikis_saati TEXT, kayip_sure_saat TEXT, "
+                "hesaplanan_normal REAL, hesaplanan_mesai REAL, aciklama TEXT)"
+            )
+            conn.execute("DELETE FROM temp.gunluk_kayit_staging")
+            conn.executemany("INSERT INTO temp.gunluk_kayit_staging VALUES (?,?,?,?,?,?,?,?)", rows)
+            cols = ("tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, "
+                    "hesaplanan_normal, hesaplanan_mesai, aciklama, firma_id, tersane_id, import_batch_id, "
+                    "giris_dk, cikis_dk, kayip_dk")
+            # WHY: dakika kolonları burada yazılır; tetikleyici değerleri doğru bulup ek UPDATE yapmaz.
+            select = ("SELECT tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, "
+                      "hesaplanan_normal, hesaplanan_mesai, aciklama, ?, ?, ?, " + ", ".join(minute_sql()) +
+                      " FROM temp.gunluk_kayit_staging WHERE true ORDER BY rowid")  # WHY: aynı anahtarda son satır kazanır.
+            has_key = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_gunluk_unique_tersane'"
+            ).fetchone()
+            if has_key:
+                conn.execute(
+                    f"INSERT INTO gunluk_kayit ({cols}) {select} "
+                    "ON CONFLICT(tarih, ad_soyad, COALESCE(tersane_id, -1)) DO UPDATE SET "
+                    "giris_saati=excluded.giris_saati, cikis_saati=excluded.cikis_saati, "
+                    "kayip_sure_saat=excluded.kayip_sure_saat, hesaplanan_normal=excluded.hesaplanan_normal, "
+                    "hesaplanan_mesai=excluded.hesaplanan_mesai, aciklama=excluded.aciklama, "
+                    "firma_id=excluded.firma_id, tersane_id=excluded.tersane_id, "
+                    "import_batch_id=excluded.import_batch_id, manuel_kilit=0, kural_parmak_izi=NULL, "
+                    "giris_dk=excluded.giris_dk, cikis_dk=excluded.cikis_dk, kayip_dk=excluded.kayip_dk",
+                    (firma_id, tersane_id, batch_id)
+                )
+            else:
+                # SAFE: anahtar index'i yoksa (mükerrer eski veri) upsert hedefi de yok; eski davranış.
+                conn.execute(f"INSERT OR REPLACE INTO gunluk_kayit ({cols}) {select}", (firma_id, tersane_id, batch_id))
+            # Personelleri secilen tersane ile iliskilendir
+            if tersane_id:
+                conn.execute(
+                    "UPDATE personel SET tersane_id=? "
+                    "WHERE (tersane_id IS NULL OR tersane_id != ?) "
+                    "AND ad_soyad IN (SELECT ad_soyad FROM temp.gunluk_kayit_staging)",
+                    (tersane_id, tersane_id)
+                )
+            conn.execute("DELETE FROM temp.gunluk_kayit_staging")
+            if checkpoint is not None:
+                # WHY: satırlar ve 'buraya kadar yazıldı' bilgisi birlikte commit olur; çökmede ikisi tutarlı kalır.
+                # Yalnızca ilerleme yazılır; skip_keys'li ayarlar yükleme başında bir kez kaydedildi.
+                conn.execute("INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+                             (UPLOAD_PROGRESS_KEY, progress_json(checkpoint)))
+            conn.commit()
+        return len(rows)
+
+    def find_upload_import(self, file_hash, sheet='', firma_filter='', tersane_id=0):
+        """Aynı içerik + sayfa + firma filtresi + tersane daha önce yüklendiyse kayıt sözlüğü, yoksa None."""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT batch_id, file_name, row_count, imported_at FROM upload_import_registry "
+                "WHERE file_hash=? AND sheet=? AND firma_filter=? AND tersane_id=?",
+                (file_hash, sheet or '', firma_filter or '', tersane_id or 0)
+            ).fetchone()
+        if not row:
+            return None
+        return {'batch_id': row[0], 'file_name': row[1], 'row_count': row[2], 'imported_at': row[3]}
+
+    def record_upload_import(self, file_hash, sheet='', firma_filter='', tersane_id=0,
+                             firma_id=None, batch_id=None, file_name=None, row_count=0):
+        """Başarılı yüklemeyi kayıt defterine yazar (aynı anahtar varsa günceller)."""
+        with self.get_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO upload_import_registry "
+                "(file_hash, sheet, firma_filter, tersane_id, firma_id, batch_id, file_name, row_count, imported_at) "
+                "VALUES (?,?,?,?,?,?,?,?,?)",
+                (file_hash, sheet or '', firma_filter or '', tersane_id or 0, firma_id, batch_id,
+                 file_name, row_count, datetime.now().isoformat())
+            )
+            conn.commit()
+
     def rollback_upload_batch_full(self, batch_id, firma_id=None):
         """
         Bir yükleme batch'ini tamamen geri alır:
@@ -1606,6 +1970,14 @@ class Database:
 
                 # 5) Log ve meta temizle
                 c.execute("DELETE FROM upload_batch_log_personel WHERE batch_id=?", (batch_id,))
+                c.execute("DELETE FROM upload_import_registry WHERE batch_id=?", (batch_id,))  # WHY: geri alınan dosya tekrar yüklenebilsin.
+                cp_row = c.execute("SELECT value FROM app_meta WHERE key=?", (UPLOAD_CHECKPOINT_KEY,)).fetchone()
+                try:
+                    if cp_row and json.loads(cp_row[0]).get('batch_id') == batch_id:
+                        c.execute("DELETE FROM app_meta WHERE key IN (?, ?)",
+                                  (UPLOAD_CHECKPOINT_KEY, UPLOAD_PROGRESS_KEY))  # WHY: yarım yükleme geri alındı.
+                except (TypeError, ValueError):
+                    pass
                 c.execute(
                     "DELETE FROM app_meta WHERE key='last_upload_batch_id' AND value=?",
                     (batch_id,)
@@ -1628,10 +2000,10 @@ class Database:
             with self.get_connection() as conn:
                 return conn.execute(
                     "SELECT a.id, a.tarih, a.ad_soyad, a.tur, a.tutar, a.aciklama FROM avans_kesinti a "
-                    "WHERE TRIM(a.ad_soyad) IN ("
-                    "SELECT DISTINCT TRIM(ad_soyad) FROM personel WHERE tersane_id = ? "
+                    "WHERE a.ad_key IN ("
+                    "SELECT ad_key FROM personel WHERE tersane_id = ? "
                     "UNION "
-                    "SELECT DISTINCT TRIM(ad_soyad) FROM gunluk_kayit WHERE tersane_id = ?"
+                    "SELECT ad_key FROM gunluk_kayit WHERE tersane_id = ?"
                     ") ORDER BY a.tarih DESC LIMIT ?",
                     (tersane_id, tersane_id, limit)
                 ).fetchall()  # WHY: include assigned or worked personnel for selected tersane.
@@ -1655,7 +2027,7 @@ class Database:
         )
         params: list = []
         if tersane_id and tersane_id > 0:
-            sql += " WHERE ad_soyad IN (SELECT DISTINCT ad_soyad FROM personel WHERE tersane_id=?)"
+            sql += " WHERE personel_id IN (SELECT personel_id FROM personel WHERE tersane_id=?)"
             params.append(tersane_id)
         sql += (
             " GROUP BY ad_soyad"
@@ -1699,23 +2071,27 @@ class Database:
         month_str = f"{year}-{month:02d}"
         with self.get_connection() as conn:
             c = conn.cursor()
-            sql_puantaj = """SELECT g.ad_soyad, p.maas, p.ekip_adi, p.ekstra_odeme, COALESCE(p.yevmiyeci_mi, 0),
-                    SUM(g.hesaplanan_normal), SUM(g.hesaplanan_mesai),
-                    SUM(CASE WHEN g.hesaplanan_normal > 0 THEN 1 ELSE 0 END)
-                    FROM gunluk_kayit g LEFT JOIN personel p ON g.ad_soyad = p.ad_soyad
-                    WHERE g.tarih LIKE ?"""
-            params_p = [f"{month_str}%"]
+            # WHY: önce kişi başına toplanır, personel kişi başına bir kez personel_id ile birleştirilir.
+            where_p = "yil_ay = ?"
+            params_p = [month_str]
             if tersane_id and tersane_id > 0:
-                sql_puantaj += " AND g.tersane_id = ?"
+                where_p += " AND tersane_id = ?"
                 params_p.append(tersane_id)
-            sql_puantaj += " GROUP BY g.ad_soyad"
+            sql_puantaj = f"""SELECT g.ad_soyad, p.maas, p.ekip_adi, p.ekstra_odeme, COALESCE(p.yevmiyeci_mi, 0),
+                    g.top_normal, g.top_mesai, g.calisan_gun
+                    FROM (SELECT ad_soyad, MAX(personel_id) AS personel_id,
+                            SUM(hesaplanan_normal) AS top_normal, SUM(hesaplanan_mesai) AS top_mesai,
+                            SUM(CASE WHEN hesaplanan_normal > 0 THEN 1 ELSE 0 END) AS calisan_gun
+                          FROM gunluk_kayit WHERE {where_p} GROUP BY ad_soyad) g
+                    LEFT JOIN personel p ON p.personel_id = g.personel_id
+                    ORDER BY g.ad_soyad"""
             puantaj = c.execute(sql_puantaj, tuple(params_p)).fetchall()
 
             sql_avans = """SELECT a.ad_soyad, SUM(CASE WHEN a.tur IN ('Avans', 'Kesinti') THEN a.tutar ELSE 0 END) FROM avans_kesinti a
-                                WHERE a.tarih LIKE ?"""
-            params_a = [f"{month_str}%"]
+                                WHERE a.yil_ay = ?"""
+            params_a = [month_str]
             if tersane_id and tersane_id > 0:
-                sql_avans += " AND a.ad_soyad IN (SELECT ad_soyad FROM personel WHERE tersane_id = ?)"
+                sql_avans += " AND a.personel_id IN (SELECT personel_id FROM personel WHERE tersane_id = ?)"
                 params_a.append(tersane_id)
             sql_avans += " GROUP BY a.ad_soyad"
             avans = c.execute(sql_avans, tuple(params_a)).fetchall()
@@ -1755,12 +2131,12 @@ class Database:
             if tersane_id and tersane_id > 0:
                 return conn.execute(
                     "SELECT ad_soyad, calisilan_gun_sayisi, gunluk_tutar, aylik_bes_tutari FROM bes_hesaplama "
-                    "WHERE ay_yil=? AND TRIM(ad_soyad) IN ("
-                    "SELECT DISTINCT TRIM(ad_soyad) FROM personel WHERE tersane_id = ? "
+                    "WHERE ay_yil=? AND ad_key IN ("
+                    "SELECT ad_key FROM personel WHERE tersane_id = ? "
                     "UNION "
-                    "SELECT DISTINCT TRIM(ad_soyad) FROM gunluk_kayit WHERE tersane_id = ? AND tarih LIKE ?"
+                    "SELECT ad_key FROM gunluk_kayit WHERE tersane_id = ? AND yil_ay = ?"
                     ") ORDER BY ad_soyad",
-                    (month_str, tersane_id, tersane_id, f"{month_str}%")
+                    (month_str, tersane_id, tersane_id, month_str)
                 ).fetchall()  # WHY: filter BES list to selected tersane via assigned or worked personnel.
             return conn.execute(
                 "SELECT ad_soyad, calisilan_gun_sayisi, gunluk_tutar, aylik_bes_tutari FROM bes_hesaplama WHERE ay_yil=? ORDER BY ad_soyad",
@@ -1805,13 +2181,13 @@ class Database:
             # Tek sorgu ile gun sayilarini al (GROUP BY) -> performans
             if tersane_id and tersane_id > 0:
                 rows = c.execute(
-                    "SELECT ad_soyad, COUNT(*) FROM gunluk_kayit WHERE tersane_id=? AND tarih LIKE ? GROUP BY ad_soyad",
-                    (tersane_id, f"{month_str}%")
+                    "SELECT ad_soyad, COUNT(*) FROM gunluk_kayit WHERE tersane_id=? AND yil_ay=? GROUP BY ad_soyad",
+                    (tersane_id, month_str)
                 ).fetchall()
             else:
                 rows = c.execute(
-                    "SELECT ad_soyad, COUNT(*) FROM gunluk_kayit WHERE tarih LIKE ? GROUP BY ad_soyad",
-                    (f"{month_str}%",)
+                    "SELECT ad_soyad, COUNT(*) FROM gunluk_kayit WHERE yil_ay=? GROUP BY ad_soyad",
+                    (month_str,)
                 ).fetchall()
             count_map = {ad: cnt for ad, cnt in rows}
 
@@ -2071,8 +2447,8 @@ class Database:
 
             personel_row = c.execute(
                 "SELECT yillik_izin_hakki, COALESCE(yevmiyeci_mi,0), COALESCE(tersane_id,0), COALESCE(firma_id,0) "
-                "FROM personel WHERE TRIM(ad_soyad)=TRIM(?)",
-                (ad_soyad,)
+                "FROM personel WHERE " + AD_EXACT_SQL,
+                ad_exact_params(ad_soyad)
             ).fetchone()
 
             mevcut_hak = personel_row[0] if personel_row else 0
@@ -2099,8 +2475,8 @@ class Database:
 
             if self._is_yillik_izin_turu(canonical_izin_turu) and personel_row:
                 c.execute(
-                    "UPDATE personel SET yillik_izin_hakki=? WHERE TRIM(ad_soyad)=TRIM(?)",
-                    ((mevcut_hak or 0) - float(gun_sayisi), ad_soyad)
+                    "UPDATE personel SET yillik_izin_hakki=? WHERE " + AD_EXACT_SQL,
+                    ((mevcut_hak or 0) - float(gun_sayisi), *ad_exact_params(ad_soyad))
                 )
 
             c.execute(
@@ -2132,15 +2508,15 @@ class Database:
                         "SELECT id, COALESCE(giris_saati,''), COALESCE(cikis_saati,''), COALESCE(kayip_sure_saat,''), "
                         "COALESCE(hesaplanan_normal,0.0), COALESCE(hesaplanan_mesai,0.0), COALESCE(aciklama,''), "
                         "COALESCE(tersane_id,0), COALESCE(firma_id,0), COALESCE(manuel_kilit,0) "
-                        "FROM gunluk_kayit WHERE tarih=? AND TRIM(ad_soyad)=TRIM(?)",
-                        (kayit_tarihi, ad_soyad)
+                        "FROM gunluk_kayit WHERE tarih=? AND " + AD_EXACT_SQL,
+                        (kayit_tarihi, *ad_exact_params(ad_soyad))
                     ).fetchone()
                 else:
                     existing = c.execute(
                         "SELECT id, COALESCE(giris_saati,''), COALESCE(cikis_saati,''), COALESCE(kayip_sure_saat,''), "
                         "COALESCE(hesaplanan_normal,0.0), COALESCE(hesaplanan_mesai,0.0), COALESCE(aciklama,'') "
-                        "FROM gunluk_kayit WHERE tarih=? AND TRIM(ad_soyad)=TRIM(?)",
-                        (kayit_tarihi, ad_soyad)
+                        "FROM gunluk_kayit WHERE tarih=? AND " + AD_EXACT_SQL,
+                        (kayit_tarihi, *ad_exact_params(ad_soyad))
                     ).fetchone()
 
                 if existing:
@@ -2218,16 +2594,16 @@ class Database:
             if tersane_id and tersane_id > 0:
                 return conn.execute(
                     "SELECT id, ad_soyad, izin_tarihi, izin_turu, gun_sayisi, aciklama, onay_durumu FROM izin_takip "
-                    "WHERE izin_tarihi LIKE ? AND TRIM(ad_soyad) IN ("
-                    "SELECT DISTINCT TRIM(ad_soyad) FROM personel WHERE tersane_id = ? "
+                    "WHERE yil_ay = ? AND ad_key IN ("
+                    "SELECT ad_key FROM personel WHERE tersane_id = ? "
                     "UNION "
-                    "SELECT DISTINCT TRIM(ad_soyad) FROM gunluk_kayit WHERE tersane_id = ? AND tarih LIKE ?"
+                    "SELECT ad_key FROM gunluk_kayit WHERE tersane_id = ? AND yil_ay = ?"
                     ") ORDER BY ad_soyad",
-                    (f"{month_str}%", tersane_id, tersane_id, f"{month_str}%")
+                    (month_str, tersane_id, tersane_id, month_str)
                 ).fetchall()  # WHY: filter izin list to selected tersane via assigned or worked personnel.
             return conn.execute(
-                "SELECT id, ad_soyad, izin_tarihi, izin_turu, gun_sayisi, aciklama, onay_durumu FROM izin_takip WHERE izin_tarihi LIKE ? ORDER BY ad_soyad",
-                (f"{month_str}%",)
+                "SELECT id, ad_soyad, izin_tarihi, izin_turu, gun_sayisi, aciklama, onay_durumu FROM izin_takip WHERE yil_ay = ? ORDER BY ad_soyad",
+                (month_str,)
             ).fetchall()
             
 
@@ -2251,7 +2627,7 @@ class Database:
         # Ay kilidi kontrolü — sil+ekle yapmadan önce kontrol et (veri kaybını önle)
         with self.get_connection() as conn:
             p_row = conn.execute(
-                "SELECT COALESCE(firma_id,0) FROM personel WHERE TRIM(ad_soyad)=TRIM(?)", (ad_soyad,)
+                "SELECT COALESCE(firma_id,0) FROM personel WHERE " + AD_EXACT_SQL, ad_exact_params(ad_soyad)
             ).fetchone()
         firma_id_check = int(p_row[0]) if p_row else 0
         try:
@@ -2308,7 +2684,7 @@ class Database:
                                 c.execute(
                                     "UPDATE gunluk_kayit SET giris_saati=?, cikis_saati=?, kayip_sure_saat=?, "
                                     "hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=?, tersane_id=?, firma_id=?, manuel_kilit=? "
-                                    "WHERE tarih=? AND TRIM(ad_soyad)=TRIM(?)",
+                                    "WHERE tarih=? AND " + AD_EXACT_SQL,
                                     (
                                         prev_giris or "", prev_cikis or "", prev_kayip or "",
                                         prev_normal if prev_normal is not None else 0.0,
@@ -2317,33 +2693,33 @@ class Database:
                                         prev_tersane if prev_tersane is not None else 0,
                                         prev_firma if prev_firma is not None else 0,
                                         prev_kilit if prev_kilit is not None else 0,
-                                        tarih, ad_soyad
+                                        tarih, *ad_exact_params(ad_soyad)
                                     )
                                 )
                             else:
                                 c.execute(
                                     "UPDATE gunluk_kayit SET giris_saati=?, cikis_saati=?, kayip_sure_saat=?, "
                                     "hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=? "
-                                    "WHERE tarih=? AND TRIM(ad_soyad)=TRIM(?)",
+                                    "WHERE tarih=? AND " + AD_EXACT_SQL,
                                     (
                                         prev_giris or "", prev_cikis or "", prev_kayip or "",
                                         prev_normal if prev_normal is not None else 0.0,
                                         prev_mesai if prev_mesai is not None else 0.0,
                                         prev_aciklama or "",
-                                        tarih, ad_soyad
+                                        tarih, *ad_exact_params(ad_soyad)
                                     )
                                 )
                         else:
                             c.execute(
-                                "DELETE FROM gunluk_kayit WHERE tarih=? AND TRIM(ad_soyad)=TRIM(?) AND aciklama=?",
-                                (tarih, ad_soyad, izin_turu)
+                                "DELETE FROM gunluk_kayit WHERE tarih=? AND " + AD_EXACT_SQL + " AND aciklama=?",
+                                (tarih, *ad_exact_params(ad_soyad), izin_turu)
                             )
                     c.execute("DELETE FROM izin_auto_kayit_backup WHERE izin_id=?", (izin_row_id,))
                 else:
                     for tarih in self._izin_kapsam_tarihleri(izin_tarihi, gun_sayisi):
                         c.execute(
-                            "DELETE FROM gunluk_kayit WHERE tarih=? AND TRIM(ad_soyad)=TRIM(?) AND aciklama=?",
-                            (tarih, ad_soyad, izin_turu)
+                            "DELETE FROM gunluk_kayit WHERE tarih=? AND " + AD_EXACT_SQL + " AND aciklama=?",
+                            (tarih, *ad_exact_params(ad_soyad), izin_turu)
                         )
             conn.execute("DELETE FROM izin_takip WHERE id=?", (izin_id,))
             conn.commit()
@@ -2421,6 +2797,7 @@ class Database:
             date_str = datetime.now().strftime("%Y-%m-%d_%H-%M")
             filename = f"Yedek_Puantaj_{date_str}.db"
             target_path = os.path.join(target_folder, filename)
+            _checkpoint_wal(self.db_file)
             shutil.copy2(self.db_file, target_path)
             return True, target_path
         except Exception as e:
@@ -1,4 +1,8 @@
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime
+import threading
+import numpy as np
 import pandas as pd
 import calendar
 import math
@@ -17,7 +21,91 @@ MAKTU_REFERANS_GUN = 30
 # YEVMİYECİ SABİTLERİ (Kural: 1 Saat = 0.1333 Yevmiye)
 YEVMIYE_BIRIM_KATSAYISI = 0.1333 
 
-def parse_time_to_minutes(t_str):
+# settings_cache içinde kural setinin özeti (Database.get_settings_cache doldurur).
+# Bu anahtar varsa hesapla_hakedis normal gün sonuçlarını DAY_RESULT_CACHE'te saklar.
+KURAL_PARMAK_IZI_KEY = 'kural_parmak_izi'
+
+
+class DayResultCache:
+    """
+    Normal gün hakediş sonuçları için sınırlı LRU önbellek.
+    Anahtar: (kural özeti, Cuma mı, giriş dk, çıkış dk, kayıp dk, yevmiyeci mi).
+    Aynı saatlerle giren/çıkan yüzlerce personel aynı sonucu tekrar hesaplamaz.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()  # WHY: UploadWorker ve RecalcWorker ayrı thread'lerde çalışır.
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hit_rate': (self.hits / total) if total else 0.0,
+            }
+
+
+DAY_RESULT_CACHE = DayResultCache()
+
+
+def get_day_cache_stats():
+    """Gün sonucu önbelleğinin isabet/ıska istatistikleri."""
+    return DAY_RESULT_CACHE.stats()
+
+
+def clear_day_cache():
+    DAY_RESULT_CACHE.clear()
+
+
+def add_day_stats(stats, work, is_cuma, giris_dk, cikis_dk, kayip_dk, yevmiyeci):
+    """
+    Toplu motorun DAY_RESULT_CACHE karşılığı: normal gün satırlarında her tekil
+    (Cuma mı, giriş, çıkış, kayıp, yevmiyeci) bir ıska, aynı anahtarın tekrarları isabet sayılır.
+    """
+    n = int(work.sum())
+    distinct = 0
+    if n:
+        keys = np.stack([is_cuma[work], giris_dk[work], cikis_dk[work], kayip_dk[work], yevmiyeci[work]],
+                        axis=1).astype(np.int64)
+        distinct = len(np.unique(keys, axis=0))
+    stats['hits'] = stats.get('hits', 0) + n - distinct
+    stats['misses'] = stats.get('misses', 0) + distinct
+    return stats
+
+
+def _parse_time_to_minutes_strptime(t_str):
+    """Eski (referans) parser: strptime tabanlı. Hızlı yolun tanımadığı girdiler buraya düşer."""
     if not t_str or pd.isna(t_str) or str(t_str).strip() == "" or str(t_str) == "nan":
         return None
     t_str = str(t_str).split('.')[0]
@@ -28,6 +116,67 @@ def parse_time_to_minutes(t_str):
     except (ValueError, TypeError):
         return None
 
+
+_TIME_PARSE_CACHE = {}
+_TIME_PARSE_CACHE_MAX = 8192  # WHY: gün içi dakika sayısı sınırlı; bozuk veride sözlük sınırsız büyümesin.
+_PARSE_MISS = object()
+
+
+def _fast_hhmm(t_str):
+    """
+    strptime('%H:%M[:%S]') ile birebir aynı kabul kuralı (sadece ASCII rakamlar):
+    saat 1 hane veya 00-23, dakika 1 hane veya 00-59, saniye 1 hane veya 00-59.
+    Tanımadığı her şey için _PARSE_MISS döner (referans parser karar verir).
+    """
+    t = t_str.split('.', 1)[0]
+    parts = t.split(':')
+    if len(parts) != (3 if len(t) > 5 else 2):
+        return _PARSE_MISS
+    for part in parts:
+        if not (0 < len(part) <= 2 and part.isascii() and part.isdigit()):
+            return _PARSE_MISS
+    saat, dakika = int(parts[0]), int(parts[1])
+    if saat > 23 or dakika > 59 or (len(parts) == 3 and int(parts[2]) > 59):
+        return _PARSE_MISS
+    return saat * 60 + dakika
+
+
+def parse_time_to_minutes(t_str):
+    """HH:MM veya HH:MM:SS -> gün içi dakika; geçersizse None. Metin girdiler önbelleklenir."""
+    if type(t_str) is not str:
+        if isinstance(t_str, str):
+            t_str = str(t_str)  # WHY: np.str_ vb. alt sınıflar düz str gibi davranır.
+        else:
+            return _parse_time_to_minutes_strptime(t_str)
+    try:
+        return _TIME_PARSE_CACHE[t_str]
+    except KeyError:
+        pass
+    if t_str == "nan" or not t_str.strip():
+        result = None
+    else:
+        result = _fast_hhmm(t_str)
+        if result is _PARSE_MISS:
+            result = _parse_time_to_minutes_strptime(t_str)
+    if len(_TIME_PARSE_CACHE) >= _TIME_PARSE_CACHE_MAX:
+        _TIME_PARSE_CACHE.clear()
+    _TIME_PARSE_CACHE[t_str] = result
+    return result
+
+
+def parse_time_column_to_minutes(values):
+    """
+    parse_time_to_minutes'ın kolon versiyonu: Series/dizi -> Int64 Series (geçersiz = <NA>).
+    Her tekil değer bir kez parse edilir; sonuç kodlarla tüm satırlara yayılır.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    parsed = np.array([parse_time_to_minutes(u) for u in uniques], dtype=object)
+    out = np.full(len(series), None, dtype=object)
+    present = codes >= 0
+    out[present] = parsed[codes[present]]
+    return pd.Series(pd.array(out.tolist(), dtype="Int64"), index=series.index)
+
 def hesapla_ceza_dakika(giris_dk, cikis_dk, kayip_dk, dt_tarih, tersane_saatleri=None):
     """
     Geç gelme, erken çıkma ve gün içi kayıpları hesaplar.
@@ -74,6 +223,58 @@ def hesapla_ceza_dakika(giris_dk, cikis_dk, kayip_dk, dt_tarih, tersane_saatleri
 
     return ceza_dakika
 
+class KatsayiIndex:
+    """
+    Mesai/yevmiye katsayı bantları için sıralı aralık indeksi.
+    (id, baslangic, bitis, katsayi, aciklama) satırlarından bir kez derlenir; arama bisect ile O(log n).
+    Bantlar çakışıyorsa (veya sınırlar sayısal değilse) listedeki ilk eşleşme kuralı korunmak için
+    doğrusal taramaya düşülür ve çakışmalar 'overlaps' listesinde raporlanır.
+    """
+    __slots__ = ('rows', 'starts', 'ends', 'values', 'overlaps', 'linear')
+
+    def __init__(self, rows):
+        self.rows = [tuple(r) for r in (rows or [])]
+        self.overlaps = []
+        self.linear = False
+        bands = []
+        for r in self.rows:
+            bas, bit = r[1], r[2]
+            if not isinstance(bas, (int, float)) or not isinstance(bit, (int, float)) or bas != bas or bit != bit:
+                self.linear = True  # SAFE: sayısal olmayan sınırda eski davranış (doğrusal tarama).
+                break
+            if bas < bit:
+                bands.append((bas, bit, r[3]))  # WHY: boş bant (bas >= bit) hiçbir değerle eşleşmez.
+        bands.sort(key=lambda b: (b[0], b[1]))
+        for prev, cur in zip(bands, bands[1:]):
+            if cur[0] < prev[1]:
+                self.overlaps.append((prev[0], prev[1], cur[0], cur[1]))
+        if self.overlaps:
+            self.linear = True
+            import logging
+            logging.warning(f"Katsayı bantları çakışıyor, doğrusal arama kullanılacak: {self.overlaps}")
+        self.starts = [b[0] for b in bands]
+        self.ends = [b[1] for b in bands]
+        self.values = [b[2] for b in bands]
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, saat, default=None):
+        """saat (ondalık saat) için bas <= saat < bit olan bandın katsayısı; yoksa default."""
+        if self.linear:
+            for r in self.rows:
+                if r[1] <= saat < r[2]:
+                    return r[3]
+            return default
+        i = bisect_right(self.starts, saat) - 1
+        if i >= 0 and saat < self.ends[i]:
+            return self.values[i]
+        return default
+
+
 def hesapla_mesai_tutar(cikis_dk, yevmiyeci_mi=False, mesai_baslangic_dk=None, db=None, settings_cache=None):
     """
     Mesai miktarını hesaplar.
@@ -97,7 +298,9 @@ def hesapla_mesai_tutar(cikis_dk, yevmiyeci_mi=False, mesai_baslangic_dk=None, d
         # Kural: Çıkış saat aralığına göre sabit ek yevmiye verilir.
         # Veritabanındaki yevmiye katsayılarını kontrol et
         yevmiye_katsayilari = []
-        if settings_cache and 'yevmiye_katsayilari' in settings_cache:
+        if settings_cache and 'yevmiye_katsayi_index' in settings_cache:
+            yevmiye_katsayilari = settings_cache['yevmiye_katsayi_index']
+        elif settings_cache and 'yevmiye_katsayilari' in settings_cache:
             yevmiye_katsayilari = settings_cache['yevmiye_katsayilari']
         elif db:
             try: yevmiye_katsayilari = db.get_yevmiye_katsayilari()
@@ -107,6 +310,8 @@ def hesapla_mesai_tutar(cikis_dk, yevmiyeci_mi=False, mesai_baslangic_dk=None, d
             
         # Eğer tablo varsa oradan çek, yoksa mesai vermeyiz
         if yevmiye_katsayilari:
+            if isinstance(yevmiye_katsayilari, KatsayiIndex):
+                return yevmiye_katsayilari.lookup(cikis_saat, 0.0)
             for _, bas, bit, kat, _ in yevmiye_katsayilari:
                 if bas <= cikis_saat < bit:
                     return kat
@@ -117,7 +322,9 @@ def hesapla_mesai_tutar(cikis_dk, yevmiyeci_mi=False, mesai_baslangic_dk=None, d
 
     # MAAŞLI / STANDART MESAİ KURALI (Saat Bazlı)
     katsayilar = []
-    if settings_cache and 'mesai_katsayilari' in settings_cache:
+    if settings_cache and 'mesai_katsayi_index' in settings_cache:
+        katsayilar = settings_cache['mesai_katsayi_index']
+    elif settings_cache and 'mesai_katsayilari' in settings_cache:
         katsayilar = settings_cache['mesai_katsayilari']
     elif db:
         try: katsayilar = db.get_mesai_katsayilari()
@@ -126,6 +333,8 @@ def hesapla_mesai_tutar(cikis_dk, yevmiyeci_mi=False, mesai_baslangic_dk=None, d
             logging.warning(f"Mesai katsayıları alınamadı: {e}")
     
     if katsayilar:
+        if isinstance(katsayilar, KatsayiIndex):
+            return float(katsayilar.lookup(cikis_saat, 0.0) or 0.0)
         for id, baslangic, bitis, katsayi, aciklama in katsayilar:
             if baslangic <= cikis_saat < bitis:
                 return float(katsayi or 0.0)
@@ -235,6 +444,22 @@ def hesapla_hakedis(tarih_str, giris_str, cikis_str, kayip_sure_str, holiday_set
             kayip_dk = int(parts[0]) * 60 + int(parts[1])
         except (ValueError, IndexError): pass
 
+    # NEW: aynı kural seti + aynı dakikalar için önceki sonuç kullanılır (settings_cache özetliyse).
+    cache_key = None
+    rules_key = settings_cache.get(KURAL_PARMAK_IZI_KEY) if settings_cache else None
+    if rules_key:
+        cache_key = (rules_key, dt_tarih.weekday() == 4, giris_dk, cikis_dk, kayip_dk, yevmiyeci_mi)
+        cached = DAY_RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+    result = _hesapla_normal_gun(dt_tarih, giris_dk, cikis_dk, kayip_dk, yevmiyeci_mi, db, settings_cache)
+    if cache_key is not None:
+        DAY_RESULT_CACHE.put(cache_key, result)
+    return result
+
+
+def _hesapla_normal_gun(dt_tarih, giris_dk, cikis_dk, kayip_dk, yevmiyeci_mi, db, settings_cache):
+    """Hafta içi/Cumartesi (tatil olmayan) geldi günü: ceza, normal ve mesai hesabı."""
     # Ceza Dakikası Hesapla (tersane bazlı saatlerle)
     tersane_saatleri = settings_cache.get('tersane_saatleri') if settings_cache else None
     ceza_dakika = hesapla_ceza_dakika(giris_dk, cikis_dk, kayip_dk, dt_tarih, tersane_saatleri)
@@ -331,6 +556,317 @@ def hesapla_hakedis(tarih_str, giris_str, cikis_str, kayip_sure_str, holiday_set
 
         return round(normal_return, 2), round(mesai_return, 2), aciklama
 
+def _none_if_na(values):
+    """NaN/NA degerlerini None'a cevirir (pandas string kolonlari None'u NaN olarak tasir)."""
+    values = np.asarray(values, dtype=object)
+    return np.where(pd.isna(values), None, values)
+
+
+def _map_unique(values, func):
+    """Degerleri tekillestirip func'u her tekil degere bir kez uygular; sonucu satirlara yayar."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    mapped = [func(u) for u in uniques]
+    return codes, mapped
+
+
+def _minutes_array(df, dk_col, raw, parse):
+    """
+    Satır başına dakika (float, geçersiz = NaN). df'te dk_col (gunluk_kayit'taki tamsayı dakika kolonu)
+    varsa o kullanılır; yalnızca dakikası boş, metni dolu satırlar parse edilir.
+    """
+    if dk_col in df.columns:
+        dk = pd.to_numeric(df[dk_col], errors='coerce').to_numpy(dtype=float, na_value=np.nan, copy=True)
+        need = np.isnan(dk) & np.array([bool(v) for v in raw], dtype=bool)
+        if not need.any():
+            return dk
+        codes, vals = _map_unique(raw[need], parse)
+        dk[need] = np.array([np.nan if v is None else v for v in vals], dtype=float)[codes]
+        return dk
+    codes, vals = _map_unique(raw, parse)
+    return np.array([np.nan if v is None else v for v in vals], dtype=float)[codes]
+
+
+def _parse_kayip_dk(kayip_sure_str):
+    """hesapla_hakedis ile ayni kayip sure parse kurali (HH:MM -> dakika, hatada 0)."""
+    if not kayip_sure_str:
+        return 0
+    try:
+        parts = str(kayip_sure_str).split(':')
+        return int(parts[0]) * 60 + int(parts[1])
+    except (ValueError, IndexError):
+        return 0
+
+
+def _round_unique(values, ndigits):
+    """Python round() ile birebir ayni sonucu verir (np.round bazi kenar durumlarda farkli yuvarlar)."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    uniq, inv = np.unique(values, return_inverse=True)
+    return np.array([round(float(u), ndigits) for u in uniq], dtype=float)[inv]
+
+
+def hesapla_hakedis_batch(df, settings_cache=None, holiday_set=None, personnel=None,
+                          holiday_info_func=None, db=None, stats=None):
+    """
+    hesapla_hakedis'in toplu (vektorel) karsiligi. Sonuclar satir bazli fonksiyonla birebir aynidir.
+
+    df kolonlari:
+        - tarih, giris, cikis, kayip (zorunlu)
+        - giris_dk, cikis_dk, kayip_dk (opsiyonel; gunluk_kayit'tan okunan dakikalar, boş olanlar metinden parse edilir)
+        - ad_soyad (opsiyonel; personnel sozlugunden yevmiyeci/ozel_durum okumak icin)
+        - yevmiyeci, ozel_durum (opsiyonel; varsa personnel yerine bunlar kullanilir)
+    personnel: {ad_soyad: {'yevmiyeci': 0/1, 'ozel_durum': str}} (UploadWorker'daki all_personel formati)
+    holiday_set: YYYY-MM-DD veya MM-DD anahtarlari (db.get_holidays() ciktisi)
+    stats: verilirse {'hits', 'misses'} sayaclari artirilir (add_day_stats).
+
+    Tarih, saat ve kayip degerleri tekil degerler uzerinden bir kez parse edilir, kural
+    aritmetigi NumPy dizileri uzerinde tek geciste yapilir.
+    Donus: df ile ayni index'e sahip normal, mesai, aciklama kolonlu DataFrame.
+    """
+    n = len(df)
+    holiday_set = holiday_set or set()
+    if n == 0:
+        return pd.DataFrame({'normal': pd.Series(dtype=float), 'mesai': pd.Series(dtype=float),
+                             'aciklama': pd.Series(dtype=object)}, index=df.index)
+
+    normal = np.zeros(n, dtype=float)
+    mesai = np.zeros(n, dtype=float)
+    aciklama = np.full(n, "", dtype=object)
+    done = np.zeros(n, dtype=bool)
+
+    # --- Tarih: her tekil tarih bir kez parse edilir ---
+    def _date_info(tarih_str):
+        try:
+            dt = datetime.strptime(tarih_str, "%Y-%m-%d")
+        except (ValueError, TypeError):
+            return None
+        ay_gun = dt.strftime("%m-%d")
+        is_resmi = (tarih_str in holiday_set) or (ay_gun in holiday_set)
+        info = None
+        if is_resmi and holiday_info_func:
+            info = holiday_info_func(tarih_str)
+        return dt.weekday(), is_resmi, info
+
+    d_codes, d_infos = _map_unique(df['tarih'].to_numpy(dtype=object), _date_info)
+    d_valid = np.array([i is not None for i in d_infos], dtype=bool)
+    d_weekday = np.array([i[0] if i else -1 for i in d_infos], dtype=np.int64)
+    d_resmi = np.array([bool(i and i[1]) for i in d_infos], dtype=bool)
+    d_has_info = np.array([bool(i and i[2]) for i in d_infos], dtype=bool)
+    d_tur = np.array([str(i[2][0]) if (i and i[2]) else "" for i in d_infos], dtype=object)
+    d_info_normal = np.array([i[2][1] if (i and i[2] and i[2][1] is not None) else np.nan for i in d_infos], dtype=float)
+    d_info_mesai = np.array([i[2][2] if (i and i[2] and i[2][2] is not None) else np.nan for i in d_infos], dtype=float)
+
+    valid = d_valid[d_codes]
+    weekday = d_weekday[d_codes]
+    is_pazar = weekday == 6
+    is_cumartesi = weekday == 5
+    is_cuma = weekday == 4
+    is_resmi = d_resmi[d_codes]
+    has_info = d_has_info[d_codes]
+    tur = d_tur[d_codes]
+
+    # --- Personel bayraklari ---
+    if 'yevmiyeci' in df.columns:
+        yev = np.array([bool(v) for v in _none_if_na(df['yevmiyeci'].to_numpy(dtype=object))], dtype=bool)
+    elif personnel is not None and 'ad_soyad' in df.columns:
+        p_codes, p_vals = _map_unique(df['ad_soyad'].to_numpy(dtype=object),
+                                      lambda ad: bool((personnel.get(ad) or {}).get('yevmiyeci', 0)))
+        yev = np.array(p_vals, dtype=bool)[p_codes]
+    else:
+        yev = np.zeros(n, dtype=bool)
+
+    def _norm_special(v):
+        return v.strip().lower() if isinstance(v, str) else ''
+
+    if 'ozel_durum' in df.columns:
+        s_codes, s_vals = _map_unique(df['ozel_durum'].to_numpy(dtype=object), _norm_special)
+        special = np.array(s_vals, dtype=object)[s_codes]
+    elif personnel is not None and 'ad_soyad' in df.columns:
+        s_codes, s_vals = _map_unique(
+            df['ad_soyad'].to_numpy(dtype=object),
+            lambda ad: _norm_special((personnel.get(ad) or {}).get('ozel_durum')) if ad else ''
+        )
+        special = np.array(s_vals, dtype=object)[s_codes]
+    else:
+        special = np.full(n, '', dtype=object)
+
+    # Hatalı tarih
+    bad_date = ~valid
+    aciklama[bad_date] = "Hatalı Tarih"
+    done |= bad_date
+
+    # WHY: DataFrame'de None degerler NaN'a donebilir; satir bazli fonksiyondaki None ile ayni davranmali.
+    giris_raw = _none_if_na(df['giris'].to_numpy(dtype=object))
+    cikis_raw = _none_if_na(df['cikis'].to_numpy(dtype=object))
+    g_present = np.array([bool(v) for v in giris_raw], dtype=bool)
+    c_present = np.array([bool(v) for v in cikis_raw], dtype=bool)
+    tam_gun = np.where(yev, 1.0, NORMAL_GUNLUK_SAAT)
+
+    # --- 1. GELMEDİ DURUMLARI ---
+    absent = ~done & ~g_present & ~c_present
+    m = absent & is_cumartesi & (special == "cumartesi gelmez")
+    normal[m] = tam_gun[m]; aciklama[m] = "Cumartesi (Özel)"; absent &= ~m
+    m = absent & is_pazar & (special == "pazar gelmez")
+    normal[m] = tam_gun[m]; aciklama[m] = "Pazar (Özel)"; absent &= ~m
+    m = absent & is_pazar
+    normal[m] = np.where(yev[m], 0.0, NORMAL_GUNLUK_SAAT)
+    aciklama[m] = np.where(yev[m], "Pazar (Gelmedi)", "Pazar Tatili")
+    absent &= ~m
+    m = absent & is_resmi & has_info
+    normal[m] = np.where(yev[m], 0.0, d_info_normal[d_codes][m])
+    aciklama[m] = tur[m] + " (Gelmedi)"
+    absent &= ~m
+    m = absent & is_resmi
+    normal[m] = np.where(yev[m], 0.0, NORMAL_GUNLUK_SAAT); aciklama[m] = "Resmi Tatil"; absent &= ~m
+    aciklama[absent] = "Gelmedi"
+    done |= ~g_present & ~c_present
+
+    # --- 2. GELDİ DURUMLARI ---
+    # Eksik giriş tamamlama (Sadece hafta sonu/tatil için)
+    tamamla = ~done & (is_pazar | is_resmi)
+    giris_dk = _minutes_array(df, 'giris_dk', giris_raw, parse_time_to_minutes)
+    cikis_dk = _minutes_array(df, 'cikis_dk', cikis_raw, parse_time_to_minutes)
+    giris_dk[tamamla & ~g_present] = 8 * 60 + 30
+    cikis_dk[tamamla & ~c_present] = AKSAM_REFERANS_DK
+
+    hatali = ~done & (np.isnan(giris_dk) | np.isnan(cikis_dk))
+    aciklama[hatali] = "Hatalı Saat"
+    done |= hatali
+
+    # PAZAR (Geldiyse)
+    m = ~done & is_pazar
+    if m.any():
+        pazar_mesai = 15.0
+        if settings_cache:
+            try: pazar_mesai = float(settings_cache.get("pazar_mesaisi", 15.0))
+            except (ValueError, TypeError): pass
+        elif db:
+            try: pazar_mesai = float(db.get_setting("pazar_mesaisi", 15.0))
+            except (ValueError, TypeError): pass
+        normal[m] = np.where(yev[m], 1.0, NORMAL_GUNLUK_SAAT)
+        mesai[m] = np.where(yev[m], 0.0, pazar_mesai)
+        aciklama[m] = np.where(yev[m], "Pazar (Çalıştı)", "Pazar Mesaisi")
+        done |= m
+
+    # RESMİ TATİL (Geldiyse)
+    m = ~done & is_resmi & has_info
+    normal[m] = d_info_normal[d_codes][m]
+    mesai[m] = d_info_mesai[d_codes][m]
+    aciklama[m] = tur[m] + " (Çalıştı)"
+    done |= m
+    m = ~done & is_resmi
+    normal[m] = NORMAL_GUNLUK_SAAT; mesai[m] = 7.5; aciklama[m] = "Resmi Tatil Mesaisi"
+    done |= m
+
+    # --- NORMAL GÜN HESAPLAMASI ---
+    work = ~done
+    if not work.any():
+        return pd.DataFrame({'normal': normal, 'mesai': mesai, 'aciklama': aciklama}, index=df.index)
+
+    kayip_raw = _none_if_na(df['kayip'].to_numpy(dtype=object))
+    kayip_dk = np.nan_to_num(_minutes_array(df, 'kayip_dk', kayip_raw, _parse_kayip_dk), nan=0).astype(np.int64)
+    g = np.where(work, giris_dk, 0).astype(np.int64)
+    c = np.where(work, cikis_dk, 0).astype(np.int64)
+    if stats is not None:
+        add_day_stats(stats, work, is_cuma, g, c, kayip_dk, yev)
+
+    tersane_saatleri = settings_cache.get('tersane_saatleri') if settings_cache else None
+    sabah_tolerans = SABAH_TOLERANS_DK
+    aksam_referans = AKSAM_REFERANS_DK
+    erken_cikis_limit = ERKEN_CIKIS_LIMIT_DK
+    cuma_tol = CUMA_KAYIP_TOLERANS_DK
+    if tersane_saatleri:
+        sabah_tolerans = tersane_saatleri.get('sabah_tolerans_dk', SABAH_TOLERANS_DK)
+        aksam_referans = tersane_saatleri.get('aksam_referans_dk', AKSAM_REFERANS_DK)
+        erken_cikis_limit = tersane_saatleri.get('erken_cikis_limit_dk', ERKEN_CIKIS_LIMIT_DK)
+        cuma_tol = tersane_saatleri.get('cuma_kayip_tolerans_dk', CUMA_KAYIP_TOLERANS_DK)
+
+    # Ceza dakikası (hesapla_ceza_dakika ile aynı kurallar)
+    ceza = np.where(g > sabah_tolerans, g - sabah_tolerans, 0)
+    erken = c < (aksam_referans + 3)
+    ceza = ceza + np.where(erken & (c >= erken_cikis_limit), ERKEN_CIKIS_CEZA_DK,
+                           np.where(erken, aksam_referans - c, 0))
+    kayip_ceza = np.where(is_cuma, np.where(kayip_dk > cuma_tol, kayip_dk - cuma_tol, 0), kayip_dk)
+    ceza = ceza + np.where(kayip_dk > 0, kayip_ceza, 0)
+
+    # Mesai başlangıcı
+    if tersane_saatleri and 'tolerans_limiti_dk' in tersane_saatleri:
+        mesai_baslangic_dk = tersane_saatleri['tolerans_limiti_dk']
+    else:
+        mesai_baslangic_saat = "17:30"
+        if settings_cache:
+            mesai_baslangic_saat = settings_cache.get("mesai_baslangic_saat", "17:30")
+        elif db:
+            mesai_baslangic_saat = db.get_setting("mesai_baslangic_saat", "17:30")
+        try:
+            parts = mesai_baslangic_saat.split(":")
+            mesai_baslangic_dk = int(parts[0]) * 60 + int(parts[1])
+        except (ValueError, AttributeError):
+            mesai_baslangic_dk = AKSAM_REFERANS_DK
+
+    # Mesai tutarı: tekil (çıkış, yevmiyeci) çiftleri için bir kez hesaplanır.
+    mesai_key = np.where(work, c * 2 + yev.astype(np.int64), -1)
+    mk_uniq, mk_inv = np.unique(mesai_key, return_inverse=True)
+    mk_vals = np.array([
+        round(hesapla_mesai_tutar(int(k) // 2, bool(k % 2), mesai_baslangic_dk, db, settings_cache), 2) if k >= 0 else 0.0
+        for k in mk_uniq
+    ], dtype=float)
+    row_mesai = mk_vals[mk_inv.reshape(-1)]
+
+    # YEVMİYECİ
+    m = work & yev
+    if m.any():
+        hak = 1.0 - ((ceza[m] / 60.0) * YEVMIYE_BIRIM_KATSAYISI)
+        normal[m] = _round_unique(np.maximum(0.0, hak), 4)
+        mesai[m] = row_mesai[m]
+        aciklama[m] = ""
+
+    # MAKTU / STANDART
+    m = work & ~yev
+    if m.any():
+        calisma_modu = "cezadan_dus"
+        ogle_baslangic = "12:15"
+        ogle_bitis = "13:15"
+        ara_mola_dk = 20
+        yuvarlama_modu = "ondalik"
+        if settings_cache:
+            calisma_modu = str(settings_cache.get("calisma_hesaplama_modu", calisma_modu) or calisma_modu).strip().lower()
+            ogle_baslangic = str(settings_cache.get("ogle_molasi_baslangic", ogle_baslangic) or ogle_baslangic).strip()
+            ogle_bitis = str(settings_cache.get("ogle_molasi_bitis", ogle_bitis) or ogle_bitis).strip()
+            yuvarlama_modu = str(settings_cache.get("fiili_saat_yuvarlama", yuvarlama_modu) or yuvarlama_modu).strip().lower()
+            try:
+                ara_mola_dk = max(0, int(float(settings_cache.get("ara_mola_dk", ara_mola_dk))))
+            except (ValueError, TypeError):
+                ara_mola_dk = 20
+
+        mesai[m] = row_mesai[m]
+        if calisma_modu == "fiili_calisma":
+            gm, cm = g[m], c[m]
+            fiili = np.maximum(0, cm - gm)
+            ogle_bas_dk = parse_time_to_minutes(ogle_baslangic)
+            ogle_bit_dk = parse_time_to_minutes(ogle_bitis)
+            if ogle_bas_dk is not None and ogle_bit_dk is not None and ogle_bit_dk > ogle_bas_dk:
+                fiili = fiili - np.maximum(0, np.minimum(cm, ogle_bit_dk) - np.maximum(gm, ogle_bas_dk))
+            eff_kayip = np.where(is_cuma[m], np.maximum(0, kayip_dk[m] - cuma_tol), kayip_dk[m])
+            fiili = fiili - np.maximum(0, eff_kayip)
+            if ara_mola_dk > 0:
+                fiili = np.where(fiili > 0, np.maximum(0, fiili - ara_mola_dk), fiili)
+            n_ret = np.minimum(NORMAL_GUNLUK_SAAT, fiili / 60.0)
+            if yuvarlama_modu == "tam_saat":
+                n_ret = np.ceil(n_ret)
+            elif yuvarlama_modu == "yarim_saat":
+                n_ret = np.ceil(n_ret * 2) / 2.0
+            normal[m] = _round_unique(np.maximum(0.0, n_ret), 2)
+            aciklama[m] = "Fiili Calisma"
+        else:
+            cm_ceza = ceza[m]
+            normal[m] = _round_unique(np.maximum(0.0, NORMAL_GUNLUK_SAAT - (cm_ceza / 60.0)), 2)
+            z_codes, z_vals = _map_unique(cm_ceza, lambda v: f"Gecikme/Ceza: {v} dk" if v > 0 else "")
+            aciklama[m] = np.array(z_vals, dtype=object)[z_codes]
+
+    return pd.DataFrame({'normal': normal, 'mesai': mesai, 'aciklama': aciklama}, index=df.index)
+
 def hesapla_maktu_hakedis(year, month, toplam_normal_saat, aylik_maas):
     """
     Kritik Kural:
@@ -0,0 +1,55 @@
+"""
+Resmi tatil takvimi (bellek içi).
+
+resmi_tatiller tablosu bir kez okunur; YYYY-MM-DD (yıla özgü) ve MM-DD (her yıl tekrar eden)
+anahtarları sözlükte tutulur, sorgular O(1) çalışır.
+"""
+from datetime import datetime
+
+
+class HolidayCalendar:
+    """Tatil anahtarlarını ve (tur, normal_saat, mesai_saat) bilgisini bellekte tutar."""
+
+    def __init__(self, rows=()):
+        # rows: (tarih, tur, normal_saat, mesai_saat) satırları
+        self._info = {}
+        for tarih, tur, normal_saat, mesai_saat in rows:
+            if tarih:
+                self._info[str(tarih)] = (tur, normal_saat, mesai_saat)
+        self.keys = frozenset(self._info)  # WHY: hesapla_hakedis'in beklediği holiday_set formatı.
+        self._day_cache = {}
+
+    @classmethod
+    def from_connection(cls, conn):
+        return cls(conn.execute("SELECT tarih, tur, normal_saat, mesai_saat FROM resmi_tatiller").fetchall())
+
+    def __contains__(self, key):
+        return key in self._info
+
+    def __len__(self):
+        return len(self._info)
+
+    def holiday_info(self, tarih):
+        """
+        Database.get_holiday_info ile aynı sonuç: önce tam tarih (dini tatiller),
+        sonra MM-DD (sabit tatiller). Tatil değilse None.
+        """
+        try:
+            return self._day_cache[tarih]
+        except KeyError:
+            pass
+        except TypeError:
+            return None  # SAFE: hashlenemeyen değer tatil olamaz.
+        info = self._info.get(tarih)
+        if info is None:
+            try:
+                ay_gun = datetime.strptime(tarih, "%Y-%m-%d").strftime("%m-%d")
+            except (ValueError, TypeError):
+                ay_gun = None
+            if ay_gun is not None:
+                info = self._info.get(ay_gun)
+        self._day_cache[tarih] = info
+        return info
+
+    def is_holiday(self, tarih):
+        return self.holiday_info(tarih) is not None
@@ -0,0 +1,125 @@
+"""
+Çok çekirdekli yeniden hesaplama (RecalcWorker paralel modu).
+
+Kayıtlar (tersane_id, yıl-ay) bölümlerine ayrılır; her bölüm bir ProcessPoolExecutor
+işçisinde hesapla_hakedis_batch ile hesaplanır. Kurallar, tatil takvimi ve personel bayrakları
+işçi başına bir kez (initializer) gönderilir. İşçiler veritabanına dokunmaz; sonuçlar tek bir
+yazıcıya (çağıran thread) döner ve orada executemany ile büyük transaction'larda yazılır.
+"""
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from core.hesaplama import hesapla_hakedis_batch
+from core.recalc_scope import row_fingerprints
+
+# Kayıt satırı sırası: (id, tarih, ad_soyad, giris, cikis, kayip, kural_parmak_izi, tersane_id
+#                      [, giris_dk, cikis_dk, kayip_dk]); dakika kolonları opsiyoneldir.
+COLUMNS = ['id', 'tarih', 'ad_soyad', 'giris', 'cikis', 'kayip', 'kural_parmak_izi', 'tersane_id',
+           'giris_dk', 'cikis_dk', 'kayip_dk']
+PARTITION_MAX_ROWS = 20000  # WHY: tek bir büyük ay/tersane bölümü bir işçiyi uzun süre kilitlemesin.
+PARALLEL_MIN_ROWS = 20000  # WHY: altında süreç başlatma maliyeti kazancı geçer; tek süreç yeterli.
+
+_worker_state = {}
+
+
+def default_workers():
+    """Çekirdek sayısının bir eksiği (UI ve yazıcı thread'i için bir çekirdek boş kalır)."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def partition_records(records, max_rows=PARTITION_MAX_ROWS):
+    """
+    Kayıtları (tersane_id, YYYY-MM) anahtarına göre gruplar; büyük bölümler max_rows'luk parçalara bölünür.
+    Dönüş: [((tersane_id, yil_ay), [kayıt, ...]), ...] (büyükten küçüğe; uzun işler önce başlar).
+    """
+    groups = {}
+    for rec in records:
+        tarih = rec[1]
+        yil_ay = tarih[:7] if isinstance(tarih, str) else ""
+        groups.setdefault((rec[7] or 0, yil_ay), []).append(rec)
+    parts = []
+    for key, rows in groups.items():
+        for start in range(0, len(rows), max_rows):
+            parts.append((key, rows[start:start + max_rows]))
+    parts.sort(key=lambda p: len(p[1]), reverse=True)
+    return parts
+
+
+def compute_partition(rows, rules, rules_fp, calendar, personnel, stats=None):
+    """
+    Bir bölümün güncellemelerini hesaplar (veritabanı erişimi yok).
+    Parmak izi güncel olan satırlar atlanır; stats verilirse gün tekrarı isabet/ıska sayaçları eklenir.
+    Dönüş: executemany için (normal, mesai, aciklama, kural_parmak_izi, id) listesi.
+    """
+    if not rows:
+        return []
+    df = pd.DataFrame(rows, columns=COLUMNS[:len(rows[0])])
+    df['ad_soyad'] = df['ad_soyad'].map(lambda v: v.strip() if isinstance(v, str) else v)
+    holiday_info = calendar.holiday_info if calendar is not None else None
+    fps = row_fingerprints(df, rules_fp, holiday_info, personnel)
+    stale = [fp != old for fp, old in zip(fps, df['kural_parmak_izi'].tolist())]
+    df = df[stale]
+    if df.empty:
+        return []
+    holiday_set = calendar.keys if calendar is not None else set()
+    res = hesapla_hakedis_batch(df, rules, holiday_set, personnel, holiday_info, stats=stats)
+    return list(zip(res['normal'].tolist(), res['mesai'].tolist(), res['aciklama'].tolist(),
+                    [fp for fp, keep in zip(fps, stale) if keep], df['id'].astype(int).tolist()))
+
+
+def _init_worker(rules, rules_fp, calendar, personnel):
+    _worker_state.update(rules=rules, rules_fp=rules_fp, calendar=calendar, personnel=personnel)
+
+
+def partition_result(rows, rules, rules_fp, calendar, personnel):
+    """(satır_sayısı, güncellemeler, gün istatistiği) üçlüsü; iter_results'ın ürettiği biçim."""
+    stats = {'hits': 0, 'misses': 0}
+    return len(rows), compute_partition(rows, rules, rules_fp, calendar, personnel, stats), stats
+
+
+def _run_partition(rows):
+    s = _worker_state
+    return partition_result(rows, s['rules'], s['rules_fp'], s['calendar'], s['personnel'])
+
+
+def iter_results(partitions, rules, rules_fp, calendar, personnel, max_workers=None, should_stop=None):
+    """
+    Bölümleri işçi süreçlerde hesaplar; tamamlandıkça (satır_sayısı, güncellemeler, gün istatistiği) üretir.
+    should_stop() True dönerse bekleyen işler iptal edilir ve üretim durur.
+    Havuz başlatılamazsa (ör. kısıtlı ortam) aynı hesap bu süreçte yapılır.
+    """
+    max_workers = max_workers or default_workers()
+    try:
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                       initargs=(rules, rules_fp, calendar, personnel))
+    except (OSError, ValueError, NotImplementedError) as e:
+        logging.warning("Paralel hesaplama başlatılamadı, tek süreçte devam ediliyor: %s", e)
+        for _key, rows in partitions:
+            if should_stop and should_stop():
+                return
+            yield partition_result(rows, rules, rules_fp, calendar, personnel)
+        return
+
+    try:
+        pending = set()
+        queue = iter(partitions)
+        # WHY: bekleyen iş sayısı sınırlı; tüm bölümler bir anda pickle edilip belleğe yığılmaz.
+        for _ in range(max_workers * 2):
+            part = next(queue, None)
+            if part is None:
+                break
+            pending.add(executor.submit(_run_partition, part[1]))
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if should_stop and should_stop():
+                return
+            for fut in done:
+                yield fut.result()
+                part = next(queue, None)
+                if part is not None:
+                    pending.add(executor.submit(_run_partition, part[1]))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)  # SAFE: iptalde bekleyen bölümler hiç başlamaz.
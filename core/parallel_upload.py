@@ -0,0 +1,155 @@
+"""
+Çok dosyalı paralel yükleme (UploadWorker paralel modu).
+
+Her dosya bir ProcessPoolExecutor işçisinde okunur, normalize edilir ve hesapla_hakedis_batch ile
+hesaplanır. Kurallar, tatil takvimi, personel bayrakları ve yükleme seçenekleri işçi başına bir kez
+(initializer) gönderilir. İşçiler veritabanına dokunmaz; sonuçlar tek bir yazıcıya (UploadWorker
+thread'i) döner ve her dosya kendi transaction'ında yazılır (Database.merge_upload_rows).
+Bir dosyadaki hata diğerlerini etkilemez.
+"""
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from core.hesaplama import hesapla_hakedis_batch
+from core.parallel_recalc import default_workers
+from core.upload_ingest import (
+    STREAM_CHUNK_ROWS,
+    UploadReadError,
+    detect_columns,
+    filter_firma,
+    find_firma_column,
+    iter_upload_chunks,
+    prepare_upload_frame,
+    skip_consumed,
+)
+from core.upload_registry import drop_unchanged, open_readonly
+
+PARALLEL_MIN_FILES = 2  # WHY: tek dosyada süreç başlatmanın kazancı yok; akışlı tek thread yeterli.
+
+_worker_state = {}
+
+
+def compute_upload_rows(frame, rules, calendar, personnel, db=None, stats=None):
+    """
+    prepare_upload_frame çıktısını hesaplar; stats verilirse gün tekrarı isabet/ıska sayaçları eklenir.
+    Dönüş: (tarih, ad_soyad, giris, cikis, kayip, normal, mesai, aciklama) satırları.
+    """
+    holiday_set = calendar.keys if calendar is not None else set()
+    holiday_info = calendar.holiday_info if calendar is not None else None
+    res = hesapla_hakedis_batch(frame, rules, holiday_set, personnel, holiday_info, db=db, stats=stats)
+    return list(zip(
+        frame['tarih'].tolist(), frame['ad_soyad'].tolist(), frame['giris'].tolist(),
+        frame['cikis'].tolist(), frame['kayip'].tolist(),
+        res['normal'].tolist(), res['mesai'].tolist(), res['aciklama'].tolist(),
+    ))
+
+
+def compute_file(fname, options, rules, calendar, personnel):
+    """
+    Bir dosyayı okur ve hesaplar (veritabanı erişimi yok).
+    options: sheet_name, skip_keys, firma_filter_name, firma_col_name, chunk_rows,
+    delta_db (verilirse değişmeyen satırlar salt okunur bağlantıyla ayıklanır), tersane_id,
+    resume_rows ({dosya: satır}; sürdürülen yüklemede zaten yazılmış veri satırları atlanır).
+    Dönüş: {'file', 'rows', 'skipped', 'unchanged', 'gorev', 'day_stats', 'error'}; error (başlık, mesaj) veya None.
+    """
+    result = {'file': fname, 'rows': [], 'skipped': 0, 'unchanged': 0, 'gorev': {},
+              'day_stats': {'hits': 0, 'misses': 0}, 'error': None}
+    firma_name = options.get('firma_filter_name')
+    cols = fc = None
+    delta_conn = None
+    try:
+        if options.get('delta_db'):
+            delta_conn = open_readonly(options['delta_db'])
+        chunks = iter_upload_chunks(fname, options.get('sheet_name'), options.get('chunk_rows') or STREAM_CHUNK_ROWS)
+        skip_rows = (options.get('resume_rows') or {}).get(fname, 0)
+        for chunk, _read, _total, _consumed in skip_consumed(chunks, skip_rows):
+            if cols is None:
+                fc = find_firma_column(chunk, options.get('firma_col_name')) if firma_name else None
+                cols = detect_columns(chunk)
+                if not cols['tarih'] or not cols['ad']:
+                    result['error'] = ("HATA", "'Tarih' veya 'Ad Soyad' sutunu tespit edilemedi.")
+                    return result
+            if fc:
+                chunk = filter_firma(chunk, fc, firma_name)
+            frame, skipped, gorev = prepare_upload_frame(chunk, cols, options.get('skip_keys'))
+            result['skipped'] += skipped
+            for ad, g in gorev.items():
+                result['gorev'].setdefault(ad, g)  # WHY: dosyadaki ilk görev kazanır.
+            if delta_conn is not None and not frame.empty:
+                frame, unchanged = drop_unchanged(delta_conn, frame, options.get('tersane_id'))
+                result['unchanged'] += unchanged
+            if not frame.empty:
+                result['rows'].extend(compute_upload_rows(frame, rules, calendar, personnel, stats=result['day_stats']))
+    except UploadReadError as e:
+        result.update(rows=[], error=("HATA", str(e)))
+    except Exception as e:
+        logging.exception(e)
+        result.update(rows=[], error=("Dosya islenemedi", str(e)))
+    finally:
+        if delta_conn is not None:
+            delta_conn.close()
+    return result
+
+
+def _init_worker(options, rules, calendar, personnel):
+    _worker_state.update(options=options, rules=rules, calendar=calendar, personnel=personnel)
+
+
+def _run_file(fname):
+    s = _worker_state
+    return compute_file(fname, s['options'], s['rules'], s['calendar'], s['personnel'])
+
+
+def iter_file_results(files, options, rules, calendar, personnel, max_workers=None, should_stop=None,
+                      local_files=()):
+    """
+    Dosyaları işçi süreçlerde hesaplar; tamamlandıkça compute_file sonucunu üretir (sıra: bitiş sırası).
+    local_files: bu süreçte (çağıran thread'de) hesaplanacak dosyalar, ör. ön izlemede okunup
+    PARSED_FILES'ta duran dosya; havuz diğerlerini işlerken hesaplanır ve disk tekrar okunmaz.
+    Havuz başlatılamazsa (ör. kısıtlı ortam) dosyalar bu süreçte sırayla hesaplanır.
+    """
+    local = [f for f in files if f in local_files]
+    remote = [f for f in files if f not in local_files]
+
+    def compute_local():
+        for fname in local:
+            if should_stop and should_stop():
+                return
+            yield compute_file(fname, options, rules, calendar, personnel)
+
+    if not remote:
+        yield from compute_local()
+        return
+    max_workers = max(1, min(max_workers or default_workers(), len(remote)))
+    try:
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                       initargs=(options, rules, calendar, personnel))
+    except (OSError, ValueError, NotImplementedError) as e:
+        logging.warning("Paralel yükleme başlatılamadı, tek süreçte devam ediliyor: %s", e)
+        for fname in local + remote:
+            if should_stop and should_stop():
+                return
+            yield compute_file(fname, options, rules, calendar, personnel)
+        return
+
+    try:
+        pending = set()
+        queue = iter(remote)
+        # WHY: en fazla işçi sayısının iki katı dosya bekler; biten sonuçlar yazıcıda birikmez.
+        for _ in range(max_workers * 2):
+            fname = next(queue, None)
+            if fname is None:
+                break
+            pending.add(executor.submit(_run_file, fname))
+        yield from compute_local()  # WHY: işçiler çalışırken önbellekteki dosya burada dilimlenip hesaplanır.
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if should_stop and should_stop():
+                return
+            for fut in done:
+                yield fut.result()
+                fname = next(queue, None)
+                if fname is not None:
+                    pending.add(executor.submit(_run_file, fname))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)  # SAFE: iptalde bekleyen dosyalar hiç başlamaz.
@@ -0,0 +1,271 @@
+"""
+Kural değişikliğinden etkilenen kayıtların tespiti (artımlı yeniden hesaplama).
+
+diff_rules(eski_kurallar, yeni_kurallar) iki shipyard_rules sözlüğünü karşılaştırır ve
+hangi gunluk_kayit satırlarının sonucunun değişebileceğini tarif eden bir RecalcScope döndürür.
+Bilinmeyen veya geniş etkili bir değişiklikte kapsam 'full' olur (eski davranış: tüm kayıtlar).
+
+rules_fingerprint / row_fingerprints ise her satırın hangi kural seti, tatil bilgisi ve personel
+bayraklarıyla hesaplandığını özetler (gunluk_kayit.kural_parmak_izi); eşleşen satırlar atlanır.
+"""
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.hesaplama import KURAL_PARMAK_IZI_KEY, KatsayiIndex, parse_time_column_to_minutes, _none_if_na
+
+# Hesaplama motorunun kuralları (kod) değişirse artırılır; tüm parmak izleri geçersiz olur.
+HESAP_MOTORU_SURUMU = 1
+
+# Hesaplama motorunun hiç okumadığı ayarlar: değişmeleri hiçbir kaydı etkilemez.
+IGNORED_KEYS = {'en_erken_cikis_saat', 'mesai_katsayi_index', 'yevmiye_katsayi_index', KURAL_PARMAK_IZI_KEY}
+# Sadece 'fiili_calisma' modunda kullanılan ayarlar.
+FIILI_MODE_KEYS = {'ogle_molasi_baslangic', 'ogle_molasi_bitis', 'ara_mola_dk', 'fiili_saat_yuvarlama'}
+CUMA = 4
+PAZAR = 6
+
+
+def _as_index(value):
+    return value if isinstance(value, KatsayiIndex) else KatsayiIndex(value)
+
+
+def changed_bands(old_rows, new_rows, normalize=float):
+    """
+    İki katsayı tablosunun farklı sonuç verdiği [bas, bit) saat aralıklarını döndürür.
+    Bant sınırları tüm kesim noktalarıdır; her parça içinde iki tablo da sabittir.
+    """
+    old_idx, new_idx = _as_index(old_rows), _as_index(new_rows)
+    points = set()
+    for idx in (old_idx, new_idx):
+        for r in idx.rows:
+            points.add(r[1])
+            points.add(r[2])
+    try:
+        points = sorted(points)
+    except TypeError:
+        return [(float('-inf'), float('inf'))]  # SAFE: karşılaştırılamayan sınır; her şeyi etkilenmiş say.
+
+    def value(idx, saat):
+        v = idx.lookup(saat, 0.0)
+        try:
+            return normalize(v or 0.0)
+        except (TypeError, ValueError):
+            return v
+
+    bands = []
+    for lo, hi in zip(points, points[1:]):
+        if value(old_idx, lo) != value(new_idx, lo):
+            if bands and bands[-1][1] == lo:
+                bands[-1] = (bands[-1][0], hi)
+            else:
+                bands.append((lo, hi))
+    return bands
+
+
+class RecalcScope:
+    """Yeniden hesaplanması gereken kayıtların tarifi."""
+
+    def __init__(self, full=False):
+        self.full = full
+        self.mesai_bands = []  # maaşlı personel: çıkış saati bu aralıklarda olanlar
+        self.yevmiye_bands = []  # yevmiyeci personel: çıkış saati bu aralıklarda olanlar
+        self.weekdays = set()  # bu gün(ler)deki tüm kayıtlar (ör. Pazar mesaisi)
+        self.friday_kayip = False  # Cuma günü kayıp süresi girilmiş kayıtlar
+        self.all_maktu = False  # tüm maaşlı (yevmiyeci olmayan) kayıtlar
+        self.reasons = []
+
+    @property
+    def is_empty(self):
+        return not (self.full or self.mesai_bands or self.yevmiye_bands or self.weekdays
+                    or self.friday_kayip or self.all_maktu)
+
+    def weekday_sql(self):
+        """
+        Sadece gün bazlı koşullar varsa SQL ön filtresi döndürür (fragment, params); yoksa None.
+        SQLite strftime('%w'): Pazar=0 ... Cumartesi=6.
+        """
+        if self.full or self.mesai_bands or self.yevmiye_bands or self.all_maktu:
+            return None
+        days = set(self.weekdays)
+        if self.friday_kayip:
+            days.add(CUMA)
+        if not days:
+            return None
+        sqlite_days = sorted(str((d + 1) % 7) for d in days)
+        placeholders = ",".join("?" for _ in sqlite_days)
+        return f"strftime('%w', tarih) IN ({placeholders})", sqlite_days
+
+    def mask(self, df):
+        """
+        df (tarih, cikis, kayip, yevmiyeci kolonları) için etkilenen satırların bool maskesi.
+        Hatalı tarih/saat içeren satırlar her durumda dahil edilmez; sonuçları kuraldan bağımsızdır.
+        """
+        n = len(df)
+        if self.full:
+            return np.ones(n, dtype=bool)
+        out = np.zeros(n, dtype=bool)
+        if n == 0 or self.is_empty:
+            return out
+        yev = df['yevmiyeci'].fillna(0).astype(bool).to_numpy() if 'yevmiyeci' in df.columns else np.zeros(n, dtype=bool)
+        if self.all_maktu:
+            out |= ~yev
+        if self.weekdays or self.friday_kayip:
+            weekday = _weekdays(df['tarih'])
+            if self.weekdays:
+                out |= np.isin(weekday, list(self.weekdays))
+            if self.friday_kayip:
+                kayip = df['kayip'].to_numpy(dtype=object)
+                has_kayip = np.array([bool(v) and not (isinstance(v, float) and v != v) for v in kayip], dtype=bool)
+                out |= (weekday == CUMA) & has_kayip
+        if self.mesai_bands or self.yevmiye_bands:
+            saat = _cikis_minutes(df) / 60.0
+
+            def in_bands(bands):
+                m = np.zeros(n, dtype=bool)
+                for lo, hi in bands:
+                    m |= (saat >= lo) & (saat < hi)
+                return m
+
+            if self.mesai_bands:
+                out |= ~yev & in_bands(self.mesai_bands)
+            if self.yevmiye_bands:
+                out |= yev & in_bands(self.yevmiye_bands)
+        return out
+
+
+def _cikis_minutes(df):
+    """Çıkış dakikaları (float, geçersiz = NaN): cikis_dk kolonu varsa o, boş kalanlar metinden parse edilir."""
+    if 'cikis_dk' not in df.columns:
+        return parse_time_column_to_minutes(df['cikis']).to_numpy(dtype=float, na_value=np.nan)
+    dk = pd.to_numeric(df['cikis_dk'], errors='coerce').to_numpy(dtype=float, na_value=np.nan, copy=True)
+    need = np.isnan(dk) & df['cikis'].notna().to_numpy()
+    if need.any():
+        dk[need] = parse_time_column_to_minutes(df['cikis'][need]).to_numpy(dtype=float, na_value=np.nan)
+    return dk
+
+
+def _weekdays(tarihler):
+    """hesapla_hakedis ile aynı tarih parse kuralı; hatalı tarih -1."""
+    def parse(t):
+        try:
+            return datetime.strptime(t, "%Y-%m-%d").weekday()
+        except (ValueError, TypeError):
+            return -1
+    codes, uniques = pd.factorize(pd.Series(tarihler, dtype=object), use_na_sentinel=False)
+    return np.array([parse(u) for u in uniques], dtype=np.int64)[codes] if len(uniques) else np.zeros(0, dtype=np.int64)
+
+
+def _float_or(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _mode(rules):
+    return str(rules.get('calisma_hesaplama_modu', 'cezadan_dus') or 'cezadan_dus').strip().lower()
+
+
+def diff_rules(old_rules, new_rules):
+    """Eski ve yeni shipyard_rules arasındaki farktan RecalcScope üretir."""
+    if not old_rules or not new_rules:
+        return RecalcScope(full=True)
+    scope = RecalcScope()
+    keys = (set(old_rules) | set(new_rules)) - IGNORED_KEYS
+    for key in sorted(keys):
+        old, new = old_rules.get(key), new_rules.get(key)
+        if key == 'mesai_katsayilari':
+            bands = changed_bands(old or [], new or [])
+            if bands:
+                scope.mesai_bands.extend(bands)
+                scope.reasons.append(key)
+        elif key == 'yevmiye_katsayilari':
+            bands = changed_bands(old or [], new or [], normalize=lambda v: v)
+            if bands:
+                scope.yevmiye_bands.extend(bands)
+                scope.reasons.append(key)
+        elif old == new:
+            continue
+        elif key == 'pazar_mesaisi':
+            if _float_or(old, 15.0) != _float_or(new, 15.0):
+                scope.weekdays.add(PAZAR)
+                scope.reasons.append(key)
+        elif key == 'friday_loss_tolerance_hours':
+            continue  # WHY: motor bu değeri tersane_saatleri['cuma_kayip_tolerans_dk'] üzerinden okur.
+        elif key == 'tersane_saatleri':
+            old_ts, new_ts = dict(old or {}), dict(new or {})
+            if old_ts.pop('cuma_kayip_tolerans_dk', None) != new_ts.pop('cuma_kayip_tolerans_dk', None):
+                scope.friday_kayip = True
+                scope.reasons.append('cuma_kayip_tolerans_dk')
+            if old_ts != new_ts:
+                scope.full = True
+                scope.reasons.append(key)
+        elif key == 'mesai_baslangic_saat':
+            # Motor tersane_saatleri['tolerans_limiti_dk'] varsa bu ayarı hiç okumaz.
+            if not all('tolerans_limiti_dk' in (r.get('tersane_saatleri') or {}) for r in (old_rules, new_rules)):
+                scope.full = True
+                scope.reasons.append(key)
+        elif key in FIILI_MODE_KEYS:
+            if _mode(old_rules) == 'fiili_calisma' or _mode(new_rules) == 'fiili_calisma':
+                scope.all_maktu = True
+                scope.reasons.append(key)
+        elif key == 'calisma_hesaplama_modu':
+            if _mode(old_rules) != _mode(new_rules):
+                scope.all_maktu = True
+                scope.reasons.append(key)
+        else:
+            scope.full = True  # SAFE: bilinmeyen kural; eski davranış gibi tümünü hesapla.
+            scope.reasons.append(key)
+    return scope
+
+
+def rules_fingerprint(rules):
+    """shipyard_rules için kararlı özet (türetilmiş indeksler ve motorun okumadığı ayarlar hariç)."""
+    payload = {k: v for k, v in (rules or {}).items() if k not in IGNORED_KEYS and k != 'shipyard_rules'}
+    text = json.dumps([HESAP_MOTORU_SURUMU, payload], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def row_fingerprints(df, rules_fp, holiday_info_func=None, personnel=None):
+    """
+    Her satır için parmak izi: kural özeti + tarih/giriş/çıkış/kayıp + o günün tatil bilgisi
+    + personelin yevmiyeci/özel durum bayrakları. Girdilerden biri değişirse iz de değişir.
+    df kolonları hesapla_hakedis_batch ile aynıdır (ad_soyad+personnel veya yevmiyeci/ozel_durum).
+    """
+    n = len(df)
+    if n == 0:
+        return []
+    tarih = _none_if_na(df['tarih'].to_numpy(dtype=object))
+    giris = _none_if_na(df['giris'].to_numpy(dtype=object))
+    cikis = _none_if_na(df['cikis'].to_numpy(dtype=object))
+    kayip = _none_if_na(df['kayip'].to_numpy(dtype=object))
+
+    holiday_cache = {}
+
+    def holiday(t):
+        if t not in holiday_cache:
+            info = holiday_info_func(t) if (holiday_info_func and t) else None
+            holiday_cache[t] = tuple(info) if info else None
+        return holiday_cache[t]
+
+    if 'yevmiyeci' in df.columns:
+        yev = [bool(v) for v in _none_if_na(df['yevmiyeci'].to_numpy(dtype=object))]
+    elif personnel is not None and 'ad_soyad' in df.columns:
+        yev = [bool((personnel.get(ad) or {}).get('yevmiyeci', 0)) for ad in df['ad_soyad'].to_numpy(dtype=object)]
+    else:
+        yev = [False] * n
+    if 'ozel_durum' in df.columns:
+        special = list(_none_if_na(df['ozel_durum'].to_numpy(dtype=object)))
+    elif personnel is not None and 'ad_soyad' in df.columns:
+        special = [(personnel.get(ad) or {}).get('ozel_durum') for ad in df['ad_soyad'].to_numpy(dtype=object)]
+    else:
+        special = [None] * n
+
+    out = []
+    for i in range(n):
+        text = f"{rules_fp}|{tarih[i]!r}|{giris[i]!r}|{cikis[i]!r}|{kayip[i]!r}|{holiday(tarih[i])!r}|{int(yev[i])}|{special[i]!r}"
+        out.append(hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest())
+    return out
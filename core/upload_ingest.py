@@ -0,0 +1,561 @@
+"""
+Puantaj dosyası satırlarının toplu (kolon bazlı) normalize edilmesi.
+
+UploadWorker eskiden her satırda tarih metnini split/replace ile yeniden kuruyor ve
+normalize_time_cell'i üç kez çağırıyordu. Burada her kolon bir kez tekilleştirilir,
+kural her tekil değere bir kez uygulanır ve sonuç maskelerle tüm satırlara yayılır.
+Satır bazlı kurallar (normalize_time_cell, normalize_tarih_cell) aynen korunur.
+
+Okuma: read_upload_file dosyayı bir kez okuyup önbelleğe alır (ön izleme + worker ortak kullanır);
+iter_upload_chunks büyük dosyaları openpyxl read_only / CSV chunksize ile parça parça üretir;
+büyük dosyada (is_large_upload) ön izleme yalnızca ilk satırları okur (read_upload_preview) ve
+çakışma kontrolü parça parça yapılır (iter_key_frames; çoklu yüklemede diğer dosyalar için
+iter_file_key_frames); tüm sayfa hiçbir aşamada belleğe alınmaz.
+skip_consumed yarım kalan bir yüklemede zaten yazılmış satırları atlar.
+CSV: ayraç ve kodlama bir kez koklanır (sniff_csv); kolonlar metin olarak okunur (tip çıkarımı yok),
+pyarrow kuruluysa tam okumada pyarrow motoru kullanılır.
+"""
+import csv
+import importlib.util
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+UPLOAD_COLUMNS = ['tarih', 'ad_soyad', 'giris', 'cikis', 'kayip']
+HEADER_SCAN_ROWS = 20
+STREAM_CHUNK_ROWS = 5000  # WHY: parça başına hesap + commit; bellekte en fazla bu kadar satır tutulur.
+# WHY: altındaki dosyalar bir kez tam okunup ön izleme ile worker arasında paylaşılır; üstündekiler akışla okunur.
+LARGE_UPLOAD_BYTES = 5 * 1024 * 1024
+PREVIEW_ROWS = 1000  # büyük dosyada ön izleme ve firma tespiti için okunan ilk veri satırı
+STREAM_EXTENSIONS = ('.xlsx', '.xlsm', '.csv')
+FIRMA_HEADERS = ('firma', 'firma adi', 'firma adı', 'sirket', 'şirket')
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_DELIMITERS = ',;\t|'
+CSV_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else None  # WHY: opsiyonel; yoksa C motoru.
+
+
+class UploadReadError(Exception):
+    """Dosya okunamadı / boş / başlık bulunamadı (mesaj kullanıcıya gösterilir)."""
+
+
+_HEADER_ERROR = "Gerekli kolonlar (Tarih, Ad Soyad) bulunamadi. Lutfen dosya basliklarini kontrol edin."
+
+
+def tr_lower(text):
+    if not isinstance(text, str):
+        return str(text).lower()
+    return text.replace("İ", "i").replace("I", "ı").lower()
+
+
+def _is_header(values):
+    vals = [tr_lower(str(v)) for v in values]
+    return any('tarih' in v for v in vals) and any(('ad' in v and 'soyad' in v) for v in vals)
+
+
+def detect_header(df):
+    """
+    Tarih + Ad Soyad başlığını kolonlarda veya ilk 20 satırda arar.
+    Dönüş: (df, bulundu_mu). Başlık bir satırdaysa o satır kolon adı yapılır ve üstü atılır.
+    """
+    if _is_header(df.columns):
+        return df, True
+    for i, row in df.head(HEADER_SCAN_ROWS).iterrows():
+        if _is_header(row.values):
+            df.columns = df.iloc[i]
+            return df.iloc[i + 1:].reset_index(drop=True), True
+    return df, False
+
+
+class ParsedFileCache:
+    """
+    Okunmuş (başlığı tespit edilmiş) dosyaların küçük LRU önbelleği.
+    Anahtar: (mutlak yol, mtime_ns, boyut, sayfa seçimi); dosya değişirse anahtar da değişir.
+    UploadPage dosyayı ön izleme için okur, UploadWorker aynı DataFrame'i buradan alır.
+    """
+
+    def __init__(self, maxsize=4):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()  # WHY: sayfa (UI thread) yazar, worker thread okur.
+
+    @staticmethod
+    def key(path, sheet_name=None):
+        st = os.stat(path)
+        if str(path).lower().endswith('.csv'):
+            sheet = None  # WHY: CSV'de sayfa seçimi anlamsız.
+        elif isinstance(sheet_name, (list, tuple)):
+            sheet = tuple(sheet_name)
+        else:
+            sheet = (0 if sheet_name is None else sheet_name,)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size, sheet)
+
+    def get(self, key, pop=False):
+        with self._lock:
+            if key not in self._data:
+                return None
+            if pop:
+                return self._data.pop(key)
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+PARSED_FILES = ParsedFileCache()
+
+
+def sniff_csv(path):
+    """
+    CSV'nin ayracını ve kodlamasını dosyanın başından bir kez tespit eder: (ayrac, kodlama).
+    UTF-8 çözülemezse kart okuyucuların Windows çıktısı varsayılır (cp1254).
+    """
+    with open(path, 'rb') as f:
+        head = f.read(CSV_SNIFF_BYTES)
+    encoding = 'utf-8'
+    try:
+        text = head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start >= len(head) - 3 and len(head) == CSV_SNIFF_BYTES:
+            text = head[:e.start].decode('utf-8')  # WHY: okuma sınırı çok baytlı bir karakteri bölmüş.
+        else:
+            encoding = 'cp1254'
+            text = head.decode(encoding, errors='replace')
+    lines = [line for line in text.splitlines()[:HEADER_SCAN_ROWS + 1] if line.strip()]
+    try:
+        sep = csv.Sniffer().sniff('\n'.join(lines), delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        counts = {d: sum(line.count(d) for line in lines) for d in CSV_DELIMITERS}
+        sep = max(counts, key=counts.get) if any(counts.values()) else ','
+    return sep, encoding
+
+
+def read_csv_typed(path, dialect=None, **kwargs):
+    """
+    CSV'yi tek geçişte, tüm kolonlar metin olarak okur (dtype=str; boş hücre NaN kalır).
+    dialect: sniff_csv sonucu; verilmezse tespit edilir. chunksize/nrows yoksa pyarrow denenir.
+    """
+    sep, encoding = dialect or sniff_csv(path)
+    opts = dict(sep=sep, encoding=encoding, dtype=str, **kwargs)
+    if CSV_ENGINE and 'chunksize' not in kwargs and 'nrows' not in kwargs:
+        try:
+            return pd.read_csv(path, engine=CSV_ENGINE, **opts)
+        except Exception:
+            pass  # SAFE: pyarrow'un desteklemediği dosyalar C motoruyla okunur.
+    return pd.read_csv(path, **opts)
+
+
+def _read_raw(path, sheet_name=None, excel_file=None):
+    if not str(path).lower().endswith('.csv'):
+        try:
+            source = excel_file if excel_file is not None else path
+            if isinstance(sheet_name, (list, tuple)):
+                dfs = [pd.read_excel(source, sheet_name=s) for s in sheet_name]
+                return pd.concat(dfs, ignore_index=True) if dfs else None
+            return pd.read_excel(source, sheet_name=sheet_name if sheet_name is not None else 0)
+        except Exception:
+            pass  # WHY: uzantısı yanlış CSV'ler için eski davranış; aşağıda CSV olarak denenir.
+    # NEW: ayraç koklanır, dosya bir kez okunur (eskiden virgül başarısız olunca ';' ile baştan okunuyordu).
+    return read_csv_typed(path)
+
+
+def read_upload_file(path, sheet_name=None, excel_file=None, cache=PARSED_FILES, pop=False):
+    """
+    Dosyayı okur ve başlık satırını tespit eder: (df, baslik_bulundu).
+    Aynı dosya/sayfa daha önce okunduysa (ve değişmediyse) önbellekteki DataFrame döner.
+    excel_file: sayfa listesi için açılmış pd.ExcelFile; verilirse çalışma kitabı ikinci kez açılmaz.
+    pop=True: önbellekteki kayıt kullanıldıktan sonra bellekten atılır (worker son kullanıcıdır).
+    Okunamazsa istisna fırlatır; boş dosyada (None, False) döner.
+    """
+    key = None
+    if cache is not None:
+        try:
+            key = cache.key(path, sheet_name)
+        except OSError:
+            key = None
+        if key is not None:
+            hit = cache.get(key, pop=pop)
+            if hit is not None:
+                return hit
+    df = _read_raw(path, sheet_name, excel_file)
+    if df is None or df.empty:
+        return None, False
+    result = detect_header(df)
+    if key is not None and not pop:
+        cache.put(key, result)
+    return result
+
+
+def detect_columns(df):
+    """Başlıklardan tarih/ad/giris/cikis/kayip/gorevi kolonlarını bulur (bulunamayan None)."""
+    cols = {k: None for k in ['tarih', 'ad', 'giris', 'cikis', 'kayip', 'gorevi']}
+    for c in df.columns:
+        cl = tr_lower(str(c))
+        if 'tarih' in cl: cols['tarih'] = c
+        elif 'ad' in cl and 'soyad' in cl: cols['ad'] = c
+        elif 'giris' in cl or 'giriş' in cl: cols['giris'] = c
+        elif 'cikis' in cl or 'çıkış' in cl: cols['cikis'] = c
+        elif 'kayip' in cl or 'kayıp' in cl: cols['kayip'] = c
+        elif 'gorev' in cl or 'görevi' in cl or 'unvan' in cl or 'pozisyon' in cl: cols['gorevi'] = c
+    return cols
+
+
+def find_firma_column(df, preferred=None):
+    """Kullanıcının seçtiği kolon (varsa) veya firma/şirket başlıklı ilk kolon; yoksa None."""
+    if preferred and preferred in df.columns:
+        return preferred
+    for c in df.columns:
+        if tr_lower(str(c)).strip() in FIRMA_HEADERS:
+            return c
+    return None
+
+
+def filter_firma(df, col, firma_name):
+    """Yalnızca firma_name'e ait satırları bırakır (büyük/küçük harf ve Türkçe İ/ı duyarsız)."""
+    target = tr_lower(firma_name).strip()
+    mask = map_column(_column(df, col), lambda v: tr_lower(str(v).strip()) == target).astype(bool)
+    return df[mask].reset_index(drop=True)
+
+
+def normalize_time_cell(val):
+    if pd.isna(val) or str(val).strip() in ['', 'nan', 'NaT']: return ""
+    s = str(val).strip()
+    try:
+        f = float(s)
+        if f < 1.0:
+            h = int(f * 24)
+            m = int((f * 24 - h) * 60)
+            return f"{h:02d}:{m:02d}"
+    except (ValueError, TypeError): pass
+    return s if ":" in s else ""
+
+
+def normalize_tarih_cell(t_val):
+    """
+    Hücre değerini YYYY-MM-DD metnine çevirir (datetime, gg.aa.yyyy, gg/aa/yyyy, ISO).
+    Boş hücre için None döner (satır atlanır).
+    """
+    if pd.isna(t_val) or str(t_val).strip() == '':
+        return None
+    if isinstance(t_val, datetime):
+        return t_val.strftime("%Y-%m-%d")
+    t_str = str(t_val).split()[0].replace('/', '-').replace('.', '-')
+    parts = t_str.split('-')
+    if len(parts) == 3 and len(parts[2]) == 4:
+        return f"{parts[2]}-{parts[1]}-{parts[0]}"
+    return t_str
+
+
+def _normalize_ad(val):
+    ad = str(val).strip()
+    return None if (not ad or ad.lower() == 'nan') else ad
+
+
+def _normalize_gorev(val):
+    try:
+        if val and str(val).strip() not in ('', 'nan', 'NaN'):
+            return str(val).strip()
+    except (TypeError, ValueError):
+        pass  # SAFE: pd.NA gibi bool'a çevrilemeyen değerler görev sayılmaz.
+    return None
+
+
+def _column(df, col):
+    """Kolonu object Series olarak döndürür; kolon yoksa tümü None."""
+    if col is None or col not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    values = df[col]
+    if isinstance(values, pd.DataFrame):
+        values = values.iloc[:, 0]  # SAFE: aynı isimde iki kolon varsa ilki kullanılır.
+    return values.astype(object)
+
+
+def map_column(values, func):
+    """func'u her tekil değere bir kez uygular (NaN dahil); object ndarray döndürür."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    if len(uniques) == 0:
+        return np.empty(0, dtype=object)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [func(u) for u in uniques]
+    return mapped[codes]
+
+
+def prepare_upload_frame(df, cols, skip_keys=None):
+    """
+    Ham sayfa DataFrame'ini hesaplamaya hazır hale getirir.
+    cols: {'tarih','ad','giris','cikis','kayip','gorevi'} -> kaynak kolon adı (veya None).
+    Dönüş: (frame, skipped_count, ad_gorev_map)
+      frame: UPLOAD_COLUMNS kolonlu, boş tarih/ad satırları ve skip_keys'tekiler çıkarılmış DataFrame
+      skipped_count: skip_keys nedeniyle atlanan satır sayısı
+      ad_gorev_map: personel adı -> dosyadaki ilk geçerli görevi
+    """
+    tarih = map_column(_column(df, cols.get('tarih')), normalize_tarih_cell)
+    ad = map_column(_column(df, cols.get('ad')), _normalize_ad)
+    valid = (pd.notna(tarih) & pd.notna(ad)) if len(df) else np.zeros(0, dtype=bool)
+    valid = np.asarray(valid, dtype=bool)
+
+    skipped_count = 0
+    if skip_keys and valid.any():
+        # WHY: (tarih|ad) anahtarı tek seferde küme ile eşleştirilir (hash join).
+        keys = pd.Series(tarih[valid], dtype=object) + "|" + pd.Series(ad[valid], dtype=object)
+        skip = keys.isin(skip_keys).to_numpy()
+        skipped_count = int(skip.sum())
+        idx = np.flatnonzero(valid)
+        valid[idx[skip]] = False
+
+    ad_gorev_map = {}
+    if cols.get('gorevi') and valid.any():
+        gorev = map_column(_column(df, cols['gorevi']), _normalize_gorev)[valid]
+        pairs = pd.DataFrame({'ad': ad[valid], 'gorevi': gorev}).dropna(subset=['gorevi'])
+        pairs = pairs.drop_duplicates(subset='ad', keep='first')  # WHY: satır sırasındaki ilk görev kazanır.
+        ad_gorev_map = dict(zip(pairs['ad'].tolist(), pairs['gorevi'].tolist()))
+
+    frame = pd.DataFrame({
+        'tarih': tarih[valid],
+        'ad_soyad': ad[valid],
+        'giris': map_column(_column(df, cols.get('giris')), normalize_time_cell)[valid],
+        'cikis': map_column(_column(df, cols.get('cikis')), normalize_time_cell)[valid],
+        'kayip': map_column(_column(df, cols.get('kayip')), normalize_time_cell)[valid],
+    }, columns=UPLOAD_COLUMNS)
+    return frame, skipped_count, ad_gorev_map
+
+
+def _excel_columns(first_row):
+    """pd.read_excel başlık kuralı: boş başlık 'Unnamed: i', tekrarlar 'X.1', 'X.2'."""
+    cols, seen = [], {}
+    for i, v in enumerate(first_row):
+        name = f"Unnamed: {i}" if v is None or (isinstance(v, str) and not v.strip()) else v
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        cols.append(name)
+    return cols
+
+
+def _iter_xlsx_sheets(path, sheet_name):
+    """openpyxl read_only ile seçili sayfaları açar: (toplam_satır_tahmini, [satır iteratörü, ...])."""
+    import openpyxl  # WHY: opsiyonel bağımlılık; sadece akış modunda gerekir.
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = sheet_name if isinstance(sheet_name, (list, tuple)) else [0 if sheet_name is None else sheet_name]
+        worksheets = [wb.worksheets[s] if isinstance(s, int) else wb[s] for s in sheets]
+        total = sum(ws.max_row for ws in worksheets) if all(isinstance(ws.max_row, int) for ws in worksheets) else None
+        yield total, [ws.iter_rows(values_only=True) for ws in worksheets]
+    finally:
+        wb.close()
+
+
+def _sheet_chunks(rows, chunk_rows):
+    """
+    Bir sayfanın satırlarını başlığı tespit edilmiş DataFrame parçalarına çevirir: (parca, okunan_satir).
+    İlk satır kolon adıdır (pd.read_excel gibi); başlık ilk 20 satırda ise detect_header ile düzeltilir.
+    """
+    columns, pending, header_done, done = None, [], False, 0
+
+    def frame(batch):
+        width = len(columns)
+        return pd.DataFrame([list(r[:width]) + [None] * (width - len(r)) for r in batch], columns=columns)
+
+    def resolve_header():
+        nonlocal columns, pending, header_done
+        head, found = detect_header(frame(pending))
+        if not found:
+            raise UploadReadError(_HEADER_ERROR)
+        columns = list(head.columns)
+        pending = pending[len(pending) - len(head):]
+        header_done = True
+
+    for values in rows:
+        done += 1
+        if columns is None:
+            columns = _excel_columns(values)
+            continue
+        pending.append(values)
+        if not header_done and len(pending) >= HEADER_SCAN_ROWS:
+            resolve_header()
+        while header_done and len(pending) >= chunk_rows:
+            yield frame(pending[:chunk_rows]), done - (len(pending) - chunk_rows)
+            pending = pending[chunk_rows:]
+    if columns is None:
+        return  # SAFE: boş sayfa.
+    if not header_done:
+        resolve_header()
+    while pending:
+        yield frame(pending[:chunk_rows]), done - max(0, len(pending) - chunk_rows)
+        pending = pending[chunk_rows:]
+
+
+def _iter_xlsx_chunks(path, sheet_name, chunk_rows):
+    for total, sheets in _iter_xlsx_sheets(path, sheet_name):
+        offset = 0
+        for rows in sheets:
+            read = 0
+            for chunk, read in _sheet_chunks(rows, chunk_rows):
+                yield chunk, offset + read, total
+            offset += read
+
+
+def _iter_csv_chunks(path, chunk_rows):
+    columns = None
+    done = 0
+    with read_csv_typed(path, chunksize=chunk_rows) as reader:  # SAFE: hata/erken çıkışta dosya kapanır.
+        for chunk in reader:
+            if columns is None:
+                head, found = detect_header(chunk)
+                if not found:
+                    raise UploadReadError(_HEADER_ERROR)
+                columns = list(head.columns)
+                chunk = head
+            else:
+                chunk = chunk.reset_index(drop=True)
+                chunk.columns = columns  # WHY: başlık veri satırındaysa sonraki parçalar da aynı isimleri kullanır.
+            done += len(chunk)
+            yield chunk, done, None
+
+
+def _slices(df, chunk_rows):
+    total = len(df)
+    for start in range(0, total, chunk_rows):
+        yield df.iloc[start:start + chunk_rows], min(start + chunk_rows, total), total
+
+
+def skip_consumed(chunks, skip_rows=0):
+    """
+    iter_upload_chunks çıktısında ilk skip_rows veri satırını atlar (yarım kalan yüklemeyi sürdürme).
+    Parça sınırları okuma yoluna göre değişebileceği için atlama satır bazlıdır.
+    Üretir: (parca, okunan_satir, toplam_tahmini, tuketilen_veri_satiri)
+    """
+    consumed = 0
+    for chunk, rows_read, total in chunks:
+        start = consumed
+        consumed += len(chunk)
+        if consumed <= skip_rows:
+            continue
+        if start < skip_rows:
+            chunk = chunk.iloc[skip_rows - start:]
+        yield chunk, rows_read, total, consumed
+
+
+def iter_upload_chunks(path, sheet_name=None, chunk_rows=STREAM_CHUNK_ROWS, cache=PARSED_FILES):
+    """
+    Dosyayı başlığı tespit edilmiş DataFrame parçaları halinde üretir: (parca, okunan_satir, toplam_tahmini).
+    - UploadPage dosyayı zaten okuduysa (önbellekte) aynı DataFrame dilimlenir; disk tekrar okunmaz.
+    - .xlsx/.xlsm: openpyxl read_only ile satır satır akış; tüm sayfa belleğe alınmaz.
+    - .csv: pandas chunksize ile akış.
+    - Diğerleri (.xls) ve akışla okunamayanlar: tam okuma + dilimleme (eski davranış).
+    toplam_tahmini bilinmiyorsa None'dır. Hata durumunda UploadReadError fırlatılır.
+    """
+    if cache is not None:
+        try:
+            hit = cache.get(cache.key(path, sheet_name), pop=True)
+        except OSError:
+            hit = None
+        if hit is not None:
+            df, found = hit
+            if df is None or df.empty:
+                raise UploadReadError("Dosya bos veya okunamadi.")
+            if not found:
+                raise UploadReadError(_HEADER_ERROR)
+            yield from _slices(df, chunk_rows)
+            return
+
+    lower = str(path).lower()
+    stream = None
+    if lower.endswith(('.xlsx', '.xlsm')):
+        try:
+            import openpyxl  # noqa: F401
+            stream = _iter_xlsx_chunks(path, sheet_name, chunk_rows)
+        except ImportError:
+            stream = None
+    elif lower.endswith('.csv'):
+        stream = _iter_csv_chunks(path, chunk_rows)
+
+    if stream is not None:
+        produced = False
+        for item in stream:
+            produced = True
+            yield item
+        if not produced:
+            raise UploadReadError("Dosya bos veya okunamadi.")
+        return
+
+    try:
+        df, found = read_upload_file(path, sheet_name, cache=None)
+    except Exception as e:
+        raise UploadReadError(f"Dosya okunamadi: {str(e)}") from e
+    if df is None or df.empty:
+        raise UploadReadError("Dosya bos veya okunamadi.")
+    if not found:
+        raise UploadReadError(_HEADER_ERROR)
+    yield from _slices(df, chunk_rows)
+
+
+def is_large_upload(path):
+    """Dosya akışla okunacak kadar büyük ve akışla okunabilir mi (.xls her zaman tam okunur)."""
+    if not str(path).lower().endswith(STREAM_EXTENSIONS):
+        return False
+    try:
+        return os.path.getsize(path) >= LARGE_UPLOAD_BYTES
+    except OSError:
+        return False
+
+
+def read_upload_preview(path, sheet_name=None, nrows=PREVIEW_ROWS):
+    """
+    Dosyanın başlığı tespit edilmiş ilk parçası, en fazla nrows satır (ön izleme, firma tespiti, kolon eşleştirme).
+    Dosyanın geri kalanı okunmaz ve önbelleğe bir şey konmaz; worker dosyayı baştan akışla okur.
+    Hata durumunda UploadReadError fırlatılır.
+    """
+    chunks = iter_upload_chunks(path, sheet_name, nrows, cache=None)
+    try:
+        chunk, _read, _total = next(chunks)
+    finally:
+        chunks.close()  # SAFE: openpyxl çalışma kitabı / CSV okuyucu hemen kapanır.
+    return chunk.reset_index(drop=True)
+
+
+def iter_key_frames(chunks, cols, firma_col=None, firma_name=None):
+    """
+    iter_upload_chunks parçalarından tekil (tarih, ad_soyad) anahtar DataFrame'leri üretir.
+    cols: 'tarih' ve 'ad' kaynak kolonları; firma_col verilirse satırlar firma_name'e göre süzülür.
+    Çakışma kontrolü ve personel listesi büyük dosyada parça parça çıkarılır.
+    """
+    for item in chunks:
+        chunk = item[0]
+        if firma_col:
+            chunk = filter_firma(chunk, firma_col, firma_name)
+        frame, _skipped, _gorev = prepare_upload_frame(chunk, {'tarih': cols.get('tarih'), 'ad': cols.get('ad')})
+        yield frame[['tarih', 'ad_soyad']].drop_duplicates()
+
+
+def iter_file_key_frames(path, sheet_name=None, firma_col_name=None, firma_name=None):
+    """
+    Bir dosyanın (tarih, ad_soyad) anahtar parçaları; çoklu yüklemede ön izlenmeyen dosyalar için.
+    Kolonlar UploadWorker gibi dosyanın kendi başlığından bulunur (detect_columns / find_firma_column);
+    tarih veya ad kolonu yoksa worker dosyayı yazmayacağı için anahtar üretilmez.
+    """
+    chunks = iter_upload_chunks(path, sheet_name, cache=None)
+    first = next(chunks, None)
+    if first is None:
+        return
+    cols = detect_columns(first[0])
+    if not cols['tarih'] or not cols['ad']:
+        chunks.close()
+        return
+    firma_col = find_firma_column(first[0], firma_col_name) if firma_name else None
+    yield from iter_key_frames(itertools.chain([first], chunks), cols, firma_col, firma_name)
@@ -0,0 +1,161 @@
+"""
+Aynı puantaj dosyasının tekrar yüklenmesini tespit eder.
+
+- Dosya düzeyi: içerik özeti (blake2b) + sayfa + hedef firma + tersane upload_import_registry
+  tablosunda varsa dosya aynı ayarlarla daha önce yüklenmiştir; yükleme hiç başlatılmadan atlanabilir.
+- Satır düzeyi (delta): tarih/ad/giriş/çıkış/kayıp değerleri bu tersanedeki kayıtla birebir aynı
+  olan satırlar hesaplamadan önce ayıklanır; yalnızca yeni veya değişen satırlar hesaplanıp yazılır.
+- Kontrol noktası: süren yüklemenin durumu (batch_id, dosya özetleri, yazılan satır sayısı) app_meta'da
+  tutulur; uygulama kapanırsa yükleme son commit edilen parçadan sürdürülür veya batch_id ile geri alınır.
+  Ayarlar bir kez, dosya başına ilerleme ayrı anahtarda her commit ile yazılır.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from core.upload_ingest import tr_lower
+
+HASH_BLOCK_SIZE = 1 << 20
+UPLOAD_CHECKPOINT_KEY = 'upload_checkpoint'
+# WHY: ilerleme ayrı anahtarda; parça commit'leri skip_keys dahil sabit ayarları yeniden yazmaz.
+UPLOAD_PROGRESS_KEY = 'upload_checkpoint_progress'
+
+
+def file_fingerprint(path):
+    """Dosya içeriğinin özeti (isim/tarih değişse de aynı içerik aynı özeti verir)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def sheet_key(sheet_name, sheet_names=None):
+    """
+    Seçilen sayfa(lar)ı kayıt defteri anahtarı için metne çevirir (CSV / ilk sayfa: '').
+    sheet_names (çalışma kitabının sayfaları) verilirse ilk sayfanın adıyla yapılan tek seçim de ''
+    olur; klasör izleme her zaman ilk sayfayı okur ve '' yazar.
+    """
+    if isinstance(sheet_name, (list, tuple)) and len(sheet_name) == 1:
+        sheet_name = sheet_name[0]
+    if sheet_name is None or sheet_name == 0 or (sheet_names and sheet_name == sheet_names[0]):
+        return ''
+    if isinstance(sheet_name, (list, tuple)):
+        return '\x1f'.join(str(s) for s in sheet_name)
+    return str(sheet_name)
+
+
+def firma_key(firma_name):
+    """Kayıt defterindeki firma anahtarı: yüklemenin hedef firması (büyük/küçük harf ve boşluk duyarsız)."""
+    return ' '.join(tr_lower(firma_name).split()) if firma_name else ''
+
+
+def open_readonly(db_file):
+    """İşçi süreçler için salt okunur bağlantı (tek yazıcı kuralı bozulmaz)."""
+    return sqlite3.connect(Path(db_file).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def unchanged_mask(conn, frame, tersane_id):
+    """
+    prepare_upload_frame çıktısında, bu tersanede aynı tarih/ad için giriş/çıkış/kayıp değerleri
+    birebir aynı kaydı olan satırların bool maskesi. Karşılaştırma SQL tarafında yapılır
+    (geçici tablo + idx_gunluk_unique_tersane); kayıtlar belleğe çekilmez.
+    """
+    n = len(frame)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS upload_delta_staging "
+                 "(pos INTEGER, tarih TEXT, ad_soyad TEXT, giris TEXT, cikis TEXT, kayip TEXT)")
+    conn.execute("DELETE FROM temp.upload_delta_staging")
+    conn.executemany(
+        "INSERT INTO temp.upload_delta_staging VALUES (?,?,?,?,?,?)",
+        zip(range(n), frame['tarih'].tolist(), frame['ad_soyad'].tolist(),
+            frame['giris'].tolist(), frame['cikis'].tolist(), frame['kayip'].tolist())
+    )
+    rows = conn.execute(
+        "SELECT s.pos FROM temp.upload_delta_staging s WHERE EXISTS ("
+        "SELECT 1 FROM gunluk_kayit g WHERE g.tarih=s.tarih AND g.ad_soyad=s.ad_soyad "
+        "AND COALESCE(g.tersane_id, -1)=COALESCE(?, -1) "
+        "AND COALESCE(g.giris_saati, '')=COALESCE(s.giris, '') "
+        "AND COALESCE(g.cikis_saati, '')=COALESCE(s.cikis, '') "
+        "AND COALESCE(g.kayip_sure_saat, '')=COALESCE(s.kayip, ''))",
+        (tersane_id,)
+    ).fetchall()
+    conn.execute("DELETE FROM temp.upload_delta_staging")
+    conn.commit()
+    mask[[r[0] for r in rows]] = True
+    return mask
+
+
+def drop_unchanged(conn, frame, tersane_id):
+    """Değişmeyen satırları çıkarır. Dönüş: (frame, atlanan_satir_sayisi)."""
+    mask = unchanged_mask(conn, frame, tersane_id)
+    if not mask.any():
+        return frame, 0
+    return frame[~mask].reset_index(drop=True), int(mask.sum())
+
+
+def new_checkpoint(batch_id, files, file_hashes, **settings):
+    """
+    Yükleme başlarken kaydedilen kontrol noktası (JSON'a çevrilebilir sözlük).
+    settings: UploadWorker'ı yeniden kurmak için gereken seçimler (sayfa, firma, tersane, skip_keys...).
+    """
+    return {
+        'batch_id': batch_id,
+        'files': list(files),
+        'progress': {f: {'hash': file_hashes.get(f), 'rows': 0, 'done': False} for f in files},
+        'settings': settings,
+        'started_at': datetime.now().isoformat(),
+    }
+
+
+def progress_json(checkpoint):
+    """Kontrol noktasının yalnızca dosya başına ilerleme kısmı (her parça commit'inde yazılan küçük JSON)."""
+    return json.dumps({'batch_id': checkpoint.get('batch_id'), 'progress': checkpoint.get('progress', {})},
+                      ensure_ascii=False)
+
+
+def split_checkpoint(checkpoint):
+    """
+    Kontrol noktasını (sabit kısım, ilerleme) JSON metinlerine ayırır.
+    Sabit kısım (dosyalar, ayarlar, skip_keys) yükleme başında bir kez, ilerleme her parça commit'inde yazılır.
+    """
+    static = {k: v for k, v in checkpoint.items() if k != 'progress'}
+    return json.dumps(static, ensure_ascii=False), progress_json(checkpoint)
+
+
+def join_checkpoint(static_json, progress_json=None):
+    """split_checkpoint'in tersi; ilerleme başka bir yüklemeye aitse sabit kısımdaki (başlangıç) ilerleme kalır."""
+    checkpoint = json.loads(static_json)
+    if progress_json:
+        progress = json.loads(progress_json)
+        if progress.get('batch_id') == checkpoint.get('batch_id'):
+            checkpoint['progress'] = progress.get('progress', {})
+    return checkpoint
+
+
+def resume_plan(checkpoint):
+    """
+    Kalan dosyalar ve her biri için atlanacak (zaten yazılmış) veri satırı sayısı.
+    Dönüş: (dosyalar, {dosya: satir}, sorunlar). Silinen veya içeriği değişen dosya sürdürülemez; sorunlarda listelenir.
+    """
+    files, resume_rows, problems = [], {}, []
+    for f in checkpoint.get('files', []):
+        state = checkpoint.get('progress', {}).get(f) or {}
+        if state.get('done'):
+            continue
+        if not os.path.exists(f):
+            problems.append(f"{os.path.basename(f)}: dosya bulunamadi")
+            continue
+        if state.get('hash') and file_fingerprint(f) != state['hash']:
+            problems.append(f"{os.path.basename(f)}: dosya degismis")
+            continue
+        files.append(f)
+        resume_rows[f] = int(state.get('rows') or 0)
+    return files, resume_rows, problems
@@ -0,0 +1,265 @@
+"""
+Klasör izleme ile otomatik yükleme (turnike / PDKS günlük dışa aktarımları).
+
+Klasör düzeni: <izlenen klasör>/<Tersane adı>/<Firma adı>/dosya.xlsx|.csv
+- Tersane klasör adından bulunur (büyük/küçük harf ve Türkçe karakter duyarsız); eşleşmeyen klasör atlanır.
+- Firma klasör adıdır (yoksa eklenir); dosyada firma sütunu varsa satırlar bu firmaya göre süzülür.
+- Dosya, boyutu ve değişiklik zamanı debounce süresi boyunca sabit kalınca işlenir (kopyalama bitmeden okunmaz).
+- Hesaplama ve yazma UploadWorker ile aynı yoldan geçer (compute_file + merge_upload_rows); her dosya
+  kendi batch_id'siyle yazılır ve geri alınabilir. Aynı içerik kayıt defterinden tanınıp atlanır, değişen
+  dosyada yalnızca yeni/değişen satırlar yazılır; kilitli aylara ait satırlar yazılmaz.
+
+GUI: UploadPage "Klasörü İzle". Başsız çalışma: python -m core.watch_ingest --folder <klasör>
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+
+from core import parallel_upload
+from core.upload_ingest import tr_lower
+from core.upload_registry import file_fingerprint, firma_key
+
+WATCH_EXTENSIONS = ('.xlsx', '.xlsm', '.xls', '.csv')
+WATCH_INTERVAL = 2.0
+WATCH_DEBOUNCE = 5.0
+
+
+def _norm(name):
+    return ' '.join(tr_lower(str(name)).split())
+
+
+def is_candidate(path):
+    """Yüklenebilecek dosya mı? (Excel'in ~$ kilit dosyaları ve geçici dosyalar hariç)"""
+    name = os.path.basename(path)
+    return name.lower().endswith(WATCH_EXTENSIONS) and not name.startswith(('~$', '.'))
+
+
+class FolderWatcher:
+    """
+    Klasörü tarar (polling; ek bağımlılık yok). scan() her çağrıda, son debounce saniyedir boyutu
+    ve değişiklik zamanı değişmemiş ve bu imzayla henüz işlenmemiş dosyaları döndürür.
+    """
+
+    def __init__(self, root, debounce=WATCH_DEBOUNCE, clock=time.monotonic):
+        self.root = root
+        self.debounce = debounce
+        self.clock = clock
+        self._pending = {}    # yol -> (imza, imzanın ilk görüldüğü an)
+        self._processed = {}  # yol -> işlenen imza
+
+    def _signatures(self):
+        for dirpath, _dirs, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                if not is_candidate(path):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # WHY: tarama sırasında silinen/taşınan dosya.
+                yield path, (st.st_size, st.st_mtime_ns)
+
+    def scan(self):
+        now = self.clock()
+        ready = []
+        seen = set()
+        for path, sig in self._signatures():
+            seen.add(path)
+            if self._processed.get(path) == sig:
+                continue
+            prev = self._pending.get(path)
+            if prev is None or prev[0] != sig:
+                self._pending[path] = (sig, now)  # WHY: dosya hâlâ yazılıyor olabilir; süre baştan başlar.
+                prev = self._pending[path]
+            if now - prev[1] >= self.debounce:
+                ready.append(path)
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+        return sorted(ready)
+
+    def mark_processed(self, path):
+        """Dosyayı işlenmiş say; içeriği değişmedikçe tekrar döndürülmez."""
+        entry = self._pending.pop(path, None)
+        if entry is not None:
+            self._processed[path] = entry[0]
+
+
+def resolve_target(db, root, path):
+    """
+    Dosyanın tersane ve firmasını klasör adlarından bulur.
+    Dönüş: (tersane_id, firma_id, firma_adi) veya hata mesajı (str).
+    """
+    parts = os.path.relpath(path, root).split(os.sep)
+    if len(parts) != 3:
+        return "klasor duzeni <Tersane>/<Firma>/dosya olmali"
+    tersane_name, firma_name = parts[0], parts[1].strip()
+    tersaneler = {_norm(row[1]): row[0] for row in db.get_tersaneler()}
+    tersane_id = tersaneler.get(_norm(tersane_name))
+    if tersane_id is None:
+        return f"tersane bulunamadi: {tersane_name}"
+    firma_id = None
+    for fid, ad in db.get_firmalar():
+        if _norm(ad) == _norm(firma_name):
+            firma_id, firma_name = fid, ad
+            break
+    if firma_id is None:
+        firma_id = db.add_firma(firma_name)
+    if not firma_id:
+        return f"firma eklenemedi: {firma_name}"
+    return tersane_id, firma_id, firma_name
+
+
+def _drop_locked_months(db, rows, firma_id):
+    locked = {}
+    kept = []
+    for row in rows:
+        ym = row[0][:7]
+        if ym not in locked:
+            try:
+                locked[ym] = db.is_month_locked(int(ym[:4]), int(ym[5:7]), firma_id)
+            except Exception:
+                locked[ym] = False  # SAFEGUARD: kilit tablosu okunamazsa UploadPage gibi engellemeyiz.
+        if not locked[ym]:
+            kept.append(row)
+    return kept, sorted(ym for ym, is_locked in locked.items() if is_locked)
+
+
+def ingest_file(db, root, path):
+    """
+    Tek dosyayı yükler (UploadWorker ile aynı hesaplama/yazma yolu).
+    Dönüş: {'file', 'status', 'saved', 'unchanged', 'batch_id', 'message'};
+    status: 'ok', 'skipped' (aynı içerik/yanlış klasör) veya 'error'.
+    """
+    result = {'file': path, 'status': 'skipped', 'saved': 0, 'unchanged': 0, 'batch_id': None, 'message': ''}
+    target = resolve_target(db, root, path)
+    if isinstance(target, str):
+        result['message'] = target
+        return result
+    tersane_id, firma_id, firma_name = target
+    try:
+        file_hash = file_fingerprint(path)
+    except OSError as e:
+        result.update(status='error', message=str(e))
+        return result
+    if db.find_upload_import(file_hash, '', firma_key(firma_name), tersane_id):
+        result['message'] = "ayni icerik daha once yuklendi"
+        return result
+
+    settings_cache = db.get_settings_cache(tersane_id=tersane_id)
+    rules = settings_cache.get('shipyard_rules', settings_cache) if settings_cache else None
+    with db.get_connection() as conn:
+        personnel = {r[0]: {'yevmiyeci': r[1], 'ozel_durum': r[2]}
+                     for r in conn.execute("SELECT ad_soyad, yevmiyeci_mi, ozel_durum FROM personel").fetchall()}
+    # WHY: günlük dosya çoğunlukla bir öncekinin devamıdır; aynı kalan satırlar hesaplanmadan atlanır.
+    options = {'firma_filter_name': firma_name, 'delta_db': db.db_file, 'tersane_id': tersane_id}
+    computed = parallel_upload.compute_file(path, options, rules, db.get_holiday_calendar(), personnel)
+    result['unchanged'] = computed['unchanged']
+    if computed['error']:
+        label, msg = computed['error']
+        result.update(status='error', message=f"{label}: {msg}")
+        return result
+
+    rows, locked = _drop_locked_months(db, computed['rows'], firma_id)
+    if locked:
+        result['message'] = f"kilitli ay(lar) atlandi: {', '.join(locked)}"
+    batch_id = uuid.uuid4().hex
+    if rows:
+        db.snapshot_personel_for_batch(batch_id, sorted({row[1] for row in rows}))
+        result['saved'] = db.merge_upload_rows(rows, firma_id, tersane_id, batch_id)
+        db.set_last_upload_batch_id(batch_id)
+        result['batch_id'] = batch_id
+    if computed['gorev']:
+        try:
+            db.update_gorevi_bulk_if_empty(list(computed['gorev'].items()))
+        except Exception:
+            pass
+    try:
+        db.record_upload_import(file_hash, '', firma_key(firma_name), tersane_id, firma_id, batch_id,
+                                os.path.basename(path), result['saved'])
+    except Exception:
+        pass  # SAFEGUARD: kayıt defteri yazılamazsa yükleme yine başarılıdır.
+    result['status'] = 'ok'
+    return result
+
+
+def run_watch(db, root, interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, should_stop=None, on_result=None,
+              once=False):
+    """
+    Klasörü izler ve hazır dosyaları sırayla yükler (tek yazıcı). once=True: mevcut dosyaları
+    bekleme süresi olmadan bir kez işler. Dönüş: toplam yazılan kayıt.
+    """
+    watcher = FolderWatcher(root, 0 if once else debounce)
+    total = 0
+    while True:
+        for path in watcher.scan():
+            if should_stop and should_stop():
+                return total
+            try:
+                res = ingest_file(db, root, path)
+            except Exception as e:
+                logging.exception(e)
+                res = {'file': path, 'status': 'error', 'saved': 0, 'unchanged': 0, 'batch_id': None,
+                       'message': str(e)}
+            # WHY: hatalı dosya da işlenmiş sayılır; düzeltilip tekrar kaydedilince (imza değişir) yeniden denenir.
+            watcher.mark_processed(path)
+            total += res['saved']
+            if on_result:
+                on_result(res)
+        if once:
+            return total
+        deadline = time.monotonic() + interval
+        while time.monotonic() < deadline:
+            if should_stop and should_stop():
+                return total
+            time.sleep(min(0.2, interval))  # WHY: durdurma isteği tarama aralığını beklemeden karşılanır.
+
+
+def describe_result(res):
+    """Sonucun tek satırlık açıklaması (log / arayüz)."""
+    name = os.path.basename(res['file'])
+    if res['status'] == 'ok':
+        text = f"{name}: {res['saved']} kayit yazildi"
+        if res['unchanged']:
+            text += f", {res['unchanged']} degismeyen atlandi"
+        return text + (f" ({res['message']})" if res['message'] else '')
+    label = "HATA" if res['status'] == 'error' else "atlandi"
+    return f"{name}: {label} - {res['message']}"
+
+
+def main(argv=None):
+    from core.database import Database
+    from core.user_config import load_config
+
+    cfg = load_config()
+    parser = argparse.ArgumentParser(description="Klasör izleyerek puantaj dosyalarını otomatik yükler")
+    parser.add_argument("--folder", default=cfg.get("watch_folder"),
+                        help="izlenecek klasör (<Tersane>/<Firma>/dosya); varsayılan: ayarlardaki watch_folder")
+    parser.add_argument("--db", help="veritabanı dosyası (varsayılan: uygulamanın veritabanı)")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="tarama aralığı (sn)")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE,
+                        help="dosya bu kadar süre değişmeden kalınca işlenir (sn)")
+    parser.add_argument("--once", action="store_true", help="mevcut dosyaları bir kez işle ve çık")
+    args = parser.parse_args(argv)
+    if not args.folder or not os.path.isdir(args.folder):
+        parser.error("izlenecek klasör bulunamadı (--folder)")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    db = Database(args.db, use_cache=False)
+    logging.info("Klasör izleniyor: %s", args.folder)
+    try:
+        total = run_watch(db, args.folder, args.interval, args.debounce,
+                          on_result=lambda res: logging.info(describe_result(res)), once=args.once)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        db.close_connections()
+    logging.info("Toplam %d kayit yazildi.", total)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
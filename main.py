@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
@@ -360,9 +361,20 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
 
+        try:
+            upload_page = getattr(self, "page_upload", None)
+            watch_worker = getattr(upload_page, "watch_worker", None) if upload_page else None
+            if watch_worker is not None:
+                watch_worker.stop()  # WHY: izleme döngüsü sürmekte olan dosyayı bitirip durur.
+                upload_page.watch_thread.quit()
+                upload_page.watch_thread.wait(10000)
+        except Exception:
+            pass  # SAFEGUARD: optional page state; ignore on close.
+
         event.accept()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # WHY: PyInstaller exe içinde paralel hesaplama süreçleri başlatılabilsin.
     app = QApplication(sys.argv)
 
     # Theme config
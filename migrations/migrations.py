@@ -1,6 +1,8 @@
 """Migration scripts, ordered by version number starting at 1.
 Each migration is a function that accepts a sqlite3.Connection and performs schema changes.
 """
+import itertools
+import sqlite3
 from datetime import datetime
 
 
@@ -462,6 +464,376 @@ def migration_009_gunluk_kayit_unique_tersane_id(conn):
     conn.commit()
 
 
+def migration_010_gunluk_kayit_kural_parmak_izi(conn):
+    """
+    gunluk_kayit'a kural_parmak_izi kolonu ekler: satırın hangi kural seti/tatil/personel
+    bilgisiyle hesaplandığının özeti. Yeniden hesaplama eşleşen satırları atlar.
+    İdempotent.
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA table_info(gunluk_kayit)")
+    cols = [r[1] for r in cur.fetchall()]
+    if 'kural_parmak_izi' not in cols:
+        cur.execute("ALTER TABLE gunluk_kayit ADD COLUMN kural_parmak_izi TEXT DEFAULT NULL")
+    # Hesap sonucunu veya girdileri parmak izini güncellemeden değiştiren her yazma
+    # (elle düzenleme, izin kaydı vb.) izi sıfırlar; satır bir sonraki hesaplamada yenilenir.
+    cur.execute('''CREATE TRIGGER IF NOT EXISTS trg_gunluk_kural_parmak_izi_sifirla
+        AFTER UPDATE OF tarih, giris_saati, cikis_saati, kayip_sure_saat,
+                        hesaplanan_normal, hesaplanan_mesai, aciklama ON gunluk_kayit
+        WHEN NEW.kural_parmak_izi IS NOT NULL AND NEW.kural_parmak_izi IS OLD.kural_parmak_izi
+        BEGIN
+            UPDATE gunluk_kayit SET kural_parmak_izi = NULL WHERE id = NEW.id;
+        END''')
+    conn.commit()
+
+
+def migration_011_gunluk_kayit_upsert_index(conn):
+    """
+    Yükleme birleştirmesi (INSERT ... ON CONFLICT DO UPDATE) için
+    idx_gunluk_unique_tersane index'ini, veri kaybı olmadan oluşturulabiliyorsa ekler.
+
+    - Index zaten varsa: hiçbir şey yapılmaz.
+    - Eski inline UNIQUE(tarih, ad_soyad) varsa: tablo dönüşümü migration_009'a bırakılır.
+    - Anahtarda mükerrer satır varsa: hiçbir satır silinmez, index eklenmez
+      (yükleme INSERT OR REPLACE yoluna düşer).
+    İdempotent.
+    """
+    cur = conn.cursor()
+    if cur.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND name='idx_gunluk_unique_tersane'"
+    ).fetchone():
+        return
+    row = cur.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name='gunluk_kayit'"
+    ).fetchone()
+    if not row or 'UNIQUE(tarih, ad_soyad)' in (row[0] or ''):
+        return
+    if cur.execute(
+        "SELECT 1 FROM gunluk_kayit GROUP BY tarih, ad_soyad, COALESCE(tersane_id, -1) HAVING COUNT(*) > 1 LIMIT 1"
+    ).fetchone():
+        return
+    cur.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_gunluk_unique_tersane "
+        "ON gunluk_kayit(tarih, ad_soyad, COALESCE(tersane_id, -1))"
+    )
+    conn.commit()
+
+
+# (index adı, tablo, kolonlar): sorgu karışımının gerektirdiği index'ler (tools/query_plan_audit.py ile doğrulanır).
+QUERY_INDEXES = [
+    # Geri alma: batch. (Kişi + ay / tersane + ay index'leri yil_ay kolonuyla migration_013'te.)
+    ('idx_gunluk_import_batch', 'gunluk_kayit', ('import_batch_id',)),
+    ('idx_gunluk_trash_batch', 'gunluk_kayit_trash', ('batch_id',)),
+    ('idx_avans_trash_batch', 'avans_kesinti_trash', ('batch_id',)),
+    ('idx_avans_kesinti_tarih', 'avans_kesinti', ('tarih',)),
+    ('idx_avans_kesinti_ad_tarih', 'avans_kesinti', ('ad_soyad', 'tarih')),
+    ('idx_izin_takip_ad_tarih', 'izin_takip', ('ad_soyad', 'izin_tarihi')),
+    ('idx_personel_tersane', 'personel', ('tersane_id',)),
+    ('idx_personel_firma_tersane', 'personel', ('firma_id', 'tersane_id')),
+    ('idx_personel_ekstra_donem', 'personel_ekstra_aylik', ('yil', 'ay', 'tersane_id')),
+    ('idx_upload_import_registry_batch', 'upload_import_registry', ('batch_id',)),
+]
+
+
+def migration_012_query_indexes(conn):
+    """
+    Sık kullanılan filtreler için bileşik index'leri ekler (QUERY_INDEXES).
+
+    - Tablosu veya kolonu olmayan index atlanır (eski/yarım şemalar).
+    - idx_gunluk_tarih yalnızca idx_gunluk_unique_tersane yoksa eklenir
+      (benzersiz index zaten tarih ile başlar; ikinci kopya yazmayı yavaşlatır).
+    - Yeni index eklenen tablolar ANALYZE edilir (sorgu planlayıcı istatistikleri).
+    İdempotent.
+    """
+    cur = conn.cursor()
+    existing = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    indexes = list(QUERY_INDEXES)
+    if 'idx_gunluk_unique_tersane' not in existing:
+        indexes.append(('idx_gunluk_tarih', 'gunluk_kayit', ('tarih',)))
+    analyze = set()
+    for name, table, columns in indexes:
+        if name in existing:
+            continue
+        table_cols = {r[1] for r in cur.execute(f"PRAGMA table_info({table})")}
+        if not table_cols or not set(columns) <= table_cols:
+            continue
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+        analyze.add(table)
+    for table in sorted(analyze):
+        cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+# (tablo, tarih kolonu): ay filtreleri için yil_ay ('YYYY-MM') kolonu eklenen tablolar.
+MONTH_COLUMNS = [
+    ('gunluk_kayit', 'tarih'),
+    ('avans_kesinti', 'tarih'),
+    ('izin_takip', 'izin_tarihi'),
+]
+MONTH_INDEXES = [
+    ('idx_gunluk_tersane_yil_ay', 'gunluk_kayit', ('tersane_id', 'yil_ay')),
+    ('idx_gunluk_yil_ay', 'gunluk_kayit', ('yil_ay',)),
+    ('idx_gunluk_ad_yil_ay', 'gunluk_kayit', ('ad_soyad', 'yil_ay', 'tersane_id')),
+    ('idx_avans_kesinti_yil_ay', 'avans_kesinti', ('yil_ay',)),
+    ('idx_izin_takip_yil_ay', 'izin_takip', ('yil_ay',)),
+]
+
+
+def _add_generated_column(cur, table, column, source_col, expr):
+    """
+    expr ('{col}' yer tutuculu) ile source_col'dan türetilen kolonu ekler; tablo/kaynak kolon yoksa False.
+    """
+    cols = {r[1] for r in cur.execute(f"PRAGMA table_xinfo({table})")}  # WHY: table_info üretilen kolonları göstermez.
+    if column in cols:
+        return True
+    if source_col not in cols:
+        return False
+    try:
+        # Sanal üretilen kolon: yazma yolunda değişiklik yok, geri doldurma gerekmez, kaynakla hep tutarlı.
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT "
+                    f"GENERATED ALWAYS AS ({expr.format(col=source_col)}) VIRTUAL")
+    except sqlite3.OperationalError:
+        # SQLite < 3.31: düz kolon, bir kez doldurulur ve tetikleyicilerle güncel tutulur.
+        new_expr = expr.format(col=f"NEW.{source_col}")
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        cur.execute(f"UPDATE {table} SET {column} = {expr.format(col=source_col)}")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{column}_ins AFTER INSERT ON {table}
+            BEGIN UPDATE {table} SET {column} = {new_expr} WHERE rowid = NEW.rowid; END""")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{column}_upd AFTER UPDATE OF {source_col} ON {table}
+            BEGIN UPDATE {table} SET {column} = {new_expr} WHERE rowid = NEW.rowid; END""")
+    return True
+
+
+def _add_month_column(cur, table, date_col):
+    """yil_ay kolonunu ekler; tablo/tarih kolonu yoksa False."""
+    return _add_generated_column(cur, table, 'yil_ay', date_col, "substr({col}, 1, 7)")
+
+
+def _create_indexes(cur, tables, indexes):
+    """tables içindeki eksik index'leri oluşturur; dönüş: yeni index alan tablolar (ANALYZE için)."""
+    existing = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    created = set()
+    for name, table, columns in indexes:
+        if table not in tables or name in existing:
+            continue
+        table_cols = {r[1] for r in cur.execute(f"PRAGMA table_xinfo({table})")}
+        if not set(columns) <= table_cols:
+            continue
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+        created.add(table)
+    return created
+
+
+def migration_013_month_columns(conn):
+    """
+    gunluk_kayit, avans_kesinti ve izin_takip tablolarına yil_ay ('YYYY-MM') kolonu ve index'lerini ekler.
+    Ay ekranları tarih LIKE 'YYYY-MM%' / strftime yerine yil_ay = ? ile index üzerinden okur.
+    İdempotent.
+    """
+    cur = conn.cursor()
+    tables = {table for table, date_col in MONTH_COLUMNS if _add_month_column(cur, table, date_col)}
+    analyze = _create_indexes(cur, tables, MONTH_INDEXES)
+    for table in sorted(analyze):
+        cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+# Ad anahtarı: baş/son boşluk kırpılmış, Türkçe kurallarla küçük harfe çevrilmiş ad_soyad.
+# SQLite lower() yalnızca ASCII harfleri çevirir; Türkçe büyük harfler önce replace ile eşlenir
+# (I -> ı, İ -> i). core.database.ad_key aynı dönüşümü Python tarafında yapar.
+AD_KEY_REPLACEMENTS = (
+    ('İ', 'i'), ('I', 'ı'), ('Ş', 'ş'), ('Ğ', 'ğ'), ('Ü', 'ü'), ('Ö', 'ö'), ('Ç', 'ç'),
+    ('Â', 'â'), ('Î', 'î'), ('Û', 'û'),
+)
+AD_KEY_TABLES = ('personel', 'gunluk_kayit', 'avans_kesinti', 'izin_takip', 'bes_hesaplama')
+AD_KEY_INDEXES = [
+    ('idx_personel_ad_key', 'personel', ('ad_key',)),
+    ('idx_gunluk_ad_key_tarih', 'gunluk_kayit', ('ad_key', 'tarih')),
+    ('idx_avans_kesinti_ad_key', 'avans_kesinti', ('ad_key',)),
+    ('idx_izin_takip_ad_key', 'izin_takip', ('ad_key',)),
+    ('idx_bes_hesaplama_ad_key', 'bes_hesaplama', ('ad_key', 'ay_yil')),
+]
+
+
+def ad_key_sql(col):
+    """ad_key ifadesinin SQL karşılığı."""
+    expr = f"trim({col})"
+    for src, dst in AD_KEY_REPLACEMENTS:
+        expr = f"replace({expr}, '{src}', '{dst}')"
+    return f"lower({expr})"
+
+
+def migration_014_ad_key_columns(conn):
+    """
+    Personel adı geçen tablolara ad_key kolonu ve index'lerini ekler.
+    TRIM(ad_soyad)=TRIM(?) (index kullanamaz) yerine ad_key = ? ile index üzerinden eşleşilir.
+    İdempotent.
+    """
+    cur = conn.cursor()
+    expr = ad_key_sql('{col}')
+    tables = {table for table in AD_KEY_TABLES if _add_generated_column(cur, table, 'ad_key', 'ad_soyad', expr)}
+    for table in sorted(_create_indexes(cur, tables, AD_KEY_INDEXES)):
+        cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+
+# personel_id: personel satırının kalıcı tamsayı anahtarı (personel.ad_soyad metin PRIMARY KEY olarak kalır).
+# (tablo, tarih kolonu): ad_soyad ile personele bağlanan, personel_id kolonu eklenen tablolar.
+PERSONEL_ID_TABLES = [
+    ('gunluk_kayit', 'tarih'),
+    ('avans_kesinti', 'tarih'),
+    ('izin_takip', 'izin_tarihi'),
+    ('bes_hesaplama', 'ay_yil'),
+]
+
+
+def personel_match_sql(col):
+    """
+    Satırı personel kartına bağlayan koşul (eski TRIM(ad_soyad) = TRIM(?) eşleşmesi);
+    ad_key index'i daraltır, 'Ali Veli ' gibi boşluklu adlar da bağlanır.
+    """
+    return f"ad_key = {ad_key_sql(col)} AND TRIM(ad_soyad) = TRIM({col})"
+
+
+def _personel_id_triggers(cur, tables):
+    """personel_id'yi yazma yollarına dokunmadan güncel tutan tetikleyiciler."""
+    lookup = f"(SELECT personel_id FROM personel WHERE {personel_match_sql('NEW.ad_soyad')})"
+    for table in tables:
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_personel_id_ins AFTER INSERT ON {table}
+            WHEN NEW.personel_id IS NULL
+            BEGIN UPDATE {table} SET personel_id = {lookup} WHERE rowid = NEW.rowid; END""")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_personel_id_upd AFTER UPDATE OF ad_soyad ON {table}
+            BEGIN UPDATE {table} SET personel_id = {lookup} WHERE rowid = NEW.rowid; END""")
+    # Yeni personel: id verilir ve (ör. sync_personnel öncesi yüklenmiş) bağlanmamış kayıtlar bağlanır.
+    new_id = "(SELECT personel_id FROM personel WHERE rowid = NEW.rowid)"
+    key_match = personel_match_sql('NEW.ad_soyad')
+    links = "".join(
+        f" UPDATE {table} SET personel_id = {new_id} WHERE {key_match} AND personel_id IS NULL;" for table in tables
+    )
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_personel_id_ins AFTER INSERT ON personel
+        BEGIN UPDATE personel SET personel_id = (SELECT COALESCE(MAX(personel_id), 0) + 1 FROM personel)
+            WHERE rowid = NEW.rowid AND personel_id IS NULL;{links} END""")
+    unlinks = "".join(
+        f" UPDATE {table} SET personel_id = NULL WHERE personel_id = OLD.personel_id;" for table in tables
+    )
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_personel_id_del AFTER DELETE ON personel
+        BEGIN{unlinks} END""")
+
+
+def migration_015_personel_id(conn):
+    """
+    personel tablosuna tamsayı personel_id, gunluk_kayit / avans_kesinti / izin_takip / bes_hesaplama
+    tablolarına personel_id kolonu ve (personel_id, tarih) index'lerini ekler; mevcut satırları doldurur.
+    Birleştirmeler metin ad_soyad yerine personel_id üzerinden yapılır. Kolonlar tetikleyicilerle güncel tutulur.
+    İdempotent (migration_014'ten sonra çalışmalıdır: bağlama tetikleyicisi ad_key index'ini kullanır).
+    """
+    cur = conn.cursor()
+
+    def columns(table):
+        return {r[1] for r in cur.execute(f"PRAGMA table_xinfo({table})")}
+
+    personel_cols = columns('personel')
+    if 'ad_soyad' not in personel_cols:
+        return
+    analyze = []
+    if 'personel_id' not in personel_cols:
+        cur.execute("ALTER TABLE personel ADD COLUMN personel_id INTEGER")
+        cur.execute("UPDATE personel SET personel_id = rowid")
+        analyze.append('personel')
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_personel_personel_id ON personel(personel_id)")
+
+    tables = []
+    for table, date_col in PERSONEL_ID_TABLES:
+        cols = columns(table)
+        if not {'ad_soyad', 'ad_key', date_col} <= cols:
+            continue
+        if 'personel_id' not in cols:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN personel_id INTEGER")
+            cur.execute(f"UPDATE {table} SET personel_id = "
+                        f"(SELECT personel_id FROM personel WHERE {personel_match_sql(f'{table}.ad_soyad')})")
+            analyze.append(table)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_personel_id ON {table}(personel_id, {date_col})")
+        tables.append(table)
+    _personel_id_triggers(cur, tables)
+    for table in analyze:
+        cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+# Saat kolonlarının tamsayı dakika karşılıkları (gunluk_kayit): metin kolonlar görüntü için kalır.
+MINUTE_COLUMNS = (
+    ('giris_dk', 'giris_saati'),
+    ('cikis_dk', 'cikis_saati'),
+    ('kayip_dk', 'kayip_sure_saat'),
+)
+_DIGIT_GLOB = {1: '[0-9]', 2: '[0-9][0-9]'}
+# parse_time_to_minutes'ın kabul ettiği biçimler: [S]S:[D]D veya (5 karakterden uzunsa) [S]S:[D]D:[s]s.
+_HHMM_GLOBS = tuple(
+    ':'.join(_DIGIT_GLOB[n] for n in parts)
+    for parts in list(itertools.product((1, 2), repeat=2)) + list(itertools.product((1, 2), repeat=3))
+    if len(parts) == 2 or sum(parts) + 2 > 5
+)
+
+
+def saat_dk_sql(col):
+    """
+    parse_time_to_minutes'ın SQL karşılığı ('.' sonrası atılır; geçersiz/boş -> NULL).
+    Yalnızca ASCII rakamlar; Python tarafının kabul edip burada NULL kalan nadir girdiler
+    (ör. ASCII dışı rakamlar) okuyucuda metinden parse edilir.
+    """
+    t = f"substr({col}, 1, instr({col} || '.', '.') - 1)"
+    rest = f"substr({t}, instr({t}, ':') + 1)"
+    hour, minute = f"CAST({t} AS INTEGER)", f"CAST({rest} AS INTEGER)"
+    second = f"CAST(substr({rest}, instr({rest}, ':') + 1) AS INTEGER)"  # WHY: iki parçalıda dakikaya eşittir.
+    globs = " OR ".join(f"{t} GLOB '{g}'" for g in _HHMM_GLOBS)
+    return f"CASE WHEN ({globs}) AND {hour} <= 23 AND {minute} <= 59 AND {second} <= 59 THEN {hour} * 60 + {minute} END"
+
+
+def kayip_dk_sql(col):
+    """hesaplama._parse_kayip_dk'nın SQL karşılığı (boş -> 0; S:D -> dakika; tanınmayan -> NULL)."""
+    head = f"substr({col}, 1, instr({col}, ':') - 1)"
+    rest = f"substr({col}, instr({col}, ':') + 1)"
+    minute = f"substr({rest}, 1, instr({rest} || ':', ':') - 1)"
+    return (f"CASE WHEN {col} IS NULL OR {col} = '' THEN 0 "
+            f"WHEN instr({col}, ':') > 1 AND {head} NOT GLOB '*[^0-9]*' AND {minute} <> '' "
+            f"AND {minute} NOT GLOB '*[^0-9]*' THEN CAST({head} AS INTEGER) * 60 + CAST({minute} AS INTEGER) END")
+
+
+def minute_sql(prefix=''):
+    """(giris_dk, cikis_dk, kayip_dk) ifadeleri; prefix ör. 'NEW.'."""
+    return (saat_dk_sql(f"{prefix}giris_saati"), saat_dk_sql(f"{prefix}cikis_saati"),
+            kayip_dk_sql(f"{prefix}kayip_sure_saat"))
+
+
+def migration_016_minute_columns(conn):
+    """
+    gunluk_kayit'a giris_dk / cikis_dk / kayip_dk (gün içi dakika, INTEGER) kolonlarını ekler ve doldurur.
+    Yazma yolları değerleri kendisi verebilir (merge_upload_rows); vermeyenler için tetikleyiciler
+    metin kolonlarından hesaplar. İdempotent.
+    """
+    cur = conn.cursor()
+    cols = {r[1] for r in cur.execute("PRAGMA table_xinfo(gunluk_kayit)")}
+    if not {src for _dk, src in MINUTE_COLUMNS} <= cols:
+        return
+    missing = [dk for dk, _src in MINUTE_COLUMNS if dk not in cols]
+    for dk in missing:
+        cur.execute(f"ALTER TABLE gunluk_kayit ADD COLUMN {dk} INTEGER")
+    if missing:
+        g, c, k = minute_sql()
+        cur.execute(f"UPDATE gunluk_kayit SET giris_dk = {g}, cikis_dk = {c}, kayip_dk = {k}")
+    g, c, k = minute_sql('NEW.')
+    differs = f"NEW.giris_dk IS NOT ({g}) OR NEW.cikis_dk IS NOT ({c}) OR NEW.kayip_dk IS NOT ({k})"
+    body = f"UPDATE gunluk_kayit SET giris_dk = {g}, cikis_dk = {c}, kayip_dk = {k} WHERE rowid = NEW.rowid;"
+    # WHY: değerleri doğru veren yazımda (ör. yükleme) ek UPDATE yapılmaz.
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_gunluk_kayit_dk_ins AFTER INSERT ON gunluk_kayit
+        WHEN {differs} BEGIN {body} END""")
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_gunluk_kayit_dk_upd
+        AFTER UPDATE OF giris_saati, cikis_saati, kayip_sure_saat ON gunluk_kayit
+        WHEN {differs} BEGIN {body} END""")
+    conn.commit()
+
+
 # Ordered list of migrations
 MIGRATIONS = [
     migration_001_add_phone_to_personel,
@@ -473,4 +845,23 @@ MIGRATIONS = [
     migration_007_upload_batch_infra,
     migration_008_ensure_import_batch_id,
     migration_009_gunluk_kayit_unique_tersane_id,
+    migration_010_gunluk_kayit_kural_parmak_izi,
+    migration_011_gunluk_kayit_upsert_index,
+    migration_012_query_indexes,
+    migration_013_month_columns,
+    migration_014_ad_key_columns,
+    migration_015_personel_id,
+    migration_016_minute_columns,
+]
+
+# Veri dönüştürmeyen, her açılışta güvenle tekrar çalıştırılabilen migration'lar.
+# Database._initialize_schema bunları user_version'dan bağımsız uygular.
+IDEMPOTENT_SCHEMA_MIGRATIONS = [
+    migration_010_gunluk_kayit_kural_parmak_izi,
+    migration_011_gunluk_kayit_upsert_index,
+    migration_012_query_indexes,
+    migration_013_month_columns,
+    migration_014_ad_key_columns,
+    migration_015_personel_id,
+    migration_016_minute_columns,
 ]
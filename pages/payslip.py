@@ -373,10 +373,10 @@ class PayslipPage(QWidget):
             yevmiyeci_mi = bool(yevmiyeci_mi)
 
             if tersane_id and tersane_id > 0:  # WHY: filter daily records by active tersane when selected.
-                records = c.execute("SELECT tarih, giris_saati, cikis_saati, hesaplanan_normal, hesaplanan_mesai, COALESCE(aciklama,'') FROM gunluk_kayit WHERE ad_soyad=? AND tarih LIKE ? AND tersane_id=? ORDER BY tarih", (person_name, f"{month_str}%", tersane_id)).fetchall()  # WHY: include note field for leave/day status rendering.
+                records = c.execute("SELECT tarih, giris_saati, cikis_saati, hesaplanan_normal, hesaplanan_mesai, COALESCE(aciklama,'') FROM gunluk_kayit WHERE ad_soyad=? AND yil_ay=? AND tersane_id=? ORDER BY tarih", (person_name, month_str, tersane_id)).fetchall()  # WHY: include note field for leave/day status rendering.
             else:
-                records = c.execute("SELECT tarih, giris_saati, cikis_saati, hesaplanan_normal, hesaplanan_mesai, COALESCE(aciklama,'') FROM gunluk_kayit WHERE ad_soyad=? AND tarih LIKE ? ORDER BY tarih", (person_name, f"{month_str}%")).fetchall()
-            avans_records = c.execute("SELECT tur, tutar FROM avans_kesinti WHERE ad_soyad=? AND tarih LIKE ?", (person_name, f"{month_str}%")).fetchall()
+                records = c.execute("SELECT tarih, giris_saati, cikis_saati, hesaplanan_normal, hesaplanan_mesai, COALESCE(aciklama,'') FROM gunluk_kayit WHERE ad_soyad=? AND yil_ay=? ORDER BY tarih", (person_name, month_str)).fetchall()
+            avans_records = c.execute("SELECT tur, tutar FROM avans_kesinti WHERE ad_soyad=? AND yil_ay=?", (person_name, month_str)).fetchall()
 
         import calendar
         from core.hesaplama import hesapla_maktu_hakedis
@@ -41,29 +41,26 @@ class RaporlarLoadWorker(QObject):
                             c.execute("""
                                 SELECT COUNT(*) FROM gunluk_kayit 
                                 WHERE ad_soyad=? 
-                                AND strftime('%Y', tarih)=? 
-                                AND strftime('%m', tarih)=? 
+                                AND yil_ay=?
                                 AND hesaplanan_normal > 0
                                 AND strftime('%w', tarih) != '0'
                                 AND tersane_id = ?
-                            """, (ad_soyad, str(self.year), f"{self.month:02d}", self.tersane_id))  # WHY: keep tersane scope.
+                            """, (ad_soyad, f"{self.year}-{self.month:02d}", self.tersane_id))  # WHY: keep tersane scope.
                         else:
                             c.execute("""
                                 SELECT COUNT(*) FROM gunluk_kayit 
                                 WHERE ad_soyad=? 
-                                AND strftime('%Y', tarih)=? 
-                                AND strftime('%m', tarih)=? 
+                                AND yil_ay=?
                                 AND hesaplanan_normal > 0
                                 AND strftime('%w', tarih) != '0'
-                            """, (ad_soyad, str(self.year), f"{self.month:02d}"))
+                            """, (ad_soyad, f"{self.year}-{self.month:02d}"))
                         calisan_gun = c.fetchone()[0] or 0
                         # İzin günleri
                         c.execute("""
                             SELECT SUM(gun_sayisi) FROM izin_takip 
                             WHERE ad_soyad=? 
-                            AND strftime('%Y', izin_tarihi)=? 
-                            AND strftime('%m', izin_tarihi)=?
-                        """, (ad_soyad, str(self.year), f"{self.month:02d}"))
+                            AND yil_ay=?
+                        """, (ad_soyad, f"{self.year}-{self.month:02d}"))
                         izin_gun = c.fetchone()[0] or 0
                         # Açıklamalar: Ekstra ödeme notu + Avans notu
                         c.execute("SELECT ekstra_odeme_not, avans_not FROM personel WHERE ad_soyad=?", (ad_soyad,))
@@ -374,30 +371,27 @@ class RaporlarPage(QWidget):
                     c.execute("""
                         SELECT COUNT(*) FROM gunluk_kayit 
                         WHERE ad_soyad=? 
-                        AND strftime('%Y', tarih)=? 
-                        AND strftime('%m', tarih)=? 
+                        AND yil_ay=?
                         AND hesaplanan_normal > 0
                         AND strftime('%w', tarih) != '0'
                         AND tersane_id = ?
-                    """, (ad_soyad, str(year), f"{month:02d}", self.tersane_id))  # WHY: keep tersane scope.
+                    """, (ad_soyad, f"{year}-{month:02d}", self.tersane_id))  # WHY: keep tersane scope.
                 else:
                     c.execute("""
                         SELECT COUNT(*) FROM gunluk_kayit 
                         WHERE ad_soyad=? 
-                        AND strftime('%Y', tarih)=? 
-                        AND strftime('%m', tarih)=? 
+                        AND yil_ay=?
                         AND hesaplanan_normal > 0
                         AND strftime('%w', tarih) != '0'
-                    """, (ad_soyad, str(year), f"{month:02d}"))
+                    """, (ad_soyad, f"{year}-{month:02d}"))
                 calisan_gun = c.fetchone()[0] or 0
                 
                 # İzin günleri
                 c.execute("""
                     SELECT SUM(gun_sayisi) FROM izin_takip 
                     WHERE ad_soyad=? 
-                    AND strftime('%Y', izin_tarihi)=? 
-                    AND strftime('%m', izin_tarihi)=?
-                """, (ad_soyad, str(year), f"{month:02d}"))
+                    AND yil_ay=?
+                """, (ad_soyad, f"{year}-{month:02d}"))
                 izin_gun = c.fetchone()[0] or 0
                 
                 # Açıklamalar: Ekstra ödeme notu + Avans notu
@@ -834,13 +828,13 @@ class RaporlarPage(QWidget):
                 FM_SQL = """
                     SELECT COALESCE(SUM(hesaplanan_mesai), 0)
                     FROM gunluk_kayit
-                    WHERE ad_soyad=? AND tarih LIKE ?
+                    WHERE ad_soyad=? AND yil_ay=?
                       AND (aciklama NOT LIKE '%Tatil%' AND aciklama NOT LIKE '%Pazar%')
                       AND hesaplanan_mesai > 0
                 """
                 FM_SQL_T = FM_SQL.replace(
-                    "WHERE ad_soyad=? AND tarih LIKE ?",
-                    "WHERE ad_soyad=? AND tarih LIKE ? AND tersane_id=?"
+                    "WHERE ad_soyad=? AND yil_ay=?",
+                    "WHERE ad_soyad=? AND yil_ay=? AND tersane_id=?"
                 )
                 tablo = []
                 for idx, (ad_soyad, ise_bas, ekip) in enumerate(personel_rows, start=1):
@@ -851,9 +845,9 @@ class RaporlarPage(QWidget):
                     for yil, ay in ay_listesi:
                         ay_str = f"{yil}-{ay:02d}"
                         if tersane_id and tersane_id > 0:
-                            row = c.execute(FM_SQL_T, (ad_soyad, f"{ay_str}%", tersane_id)).fetchone()
+                            row = c.execute(FM_SQL_T, (ad_soyad, ay_str, tersane_id)).fetchone()
                         else:
-                            row = c.execute(FM_SQL, (ad_soyad, f"{ay_str}%")).fetchone()
+                            row = c.execute(FM_SQL, (ad_soyad, ay_str)).fetchone()
                         fm_raw = row[0] if row else 0.0
                         fm_val = round(fm_raw / 1.5, 2) if fm_raw else 0.0
                         aylik_fm.append(fm_val)
@@ -955,6 +955,7 @@ class RecordsPage(QWidget):
                     elif col == 4:
                         t_item = QTableWidgetItem(str(row[3] or ""))
                         t_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+                        t_item.setData(Qt.UserRole, row[10])  # WHY: gec_mi; filtrede saat yeniden parse edilmez.
                     elif col == 5:
                         t_item = QTableWidgetItem(str(row[4] or ""))
                         t_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
@@ -1044,9 +1045,14 @@ class RecordsPage(QWidget):
                         yevmiye_count += 1
                 if row_giris and not row_cikis:
                     missing_exit_count += 1
+                # WHY: sayım görünür satırlar üzerinden yapılır (ad/tarih/ekip filtreleri her tuşta değişir);
+                # satırın geç olup olmadığı ise get_records_by_month sorgusunda hesaplanmış olarak gelir.
                 if row_giris:
-                    giris_dk = parse_time_to_minutes(row_giris)
-                    if giris_dk is not None and giris_dk > SABAH_TOLERANS_DK:
+                    gec_mi = self.table.item(i, 4).data(Qt.UserRole)
+                    if gec_mi is None:
+                        giris_dk = parse_time_to_minutes(row_giris)
+                        gec_mi = giris_dk is not None and giris_dk > SABAH_TOLERANS_DK
+                    if gec_mi:
                         late_count += 1
             else:
                 self.table.setRowHidden(i, True)
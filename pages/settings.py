@@ -1,3 +1,4 @@
+import logging
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QLineEdit, QFileDialog, QMessageBox, QFrame, QComboBox, QSpinBox,
@@ -7,6 +8,8 @@ from PySide6.QtGui import QPalette, QColor, QFont
 from PySide6.QtCore import Qt, QThread, Signal, Slot, QObject  # NEW: threading helpers for smooth UI.
 
 from core.database import Database
+from core import parallel_recalc
+from core.recalc_scope import diff_rules, rules_fingerprint
 from core.input_validators import (
     ensure_hhmm_time,
     ensure_non_empty,
@@ -22,26 +25,39 @@ class RecalcWorker(QObject):
     finished = Signal(int)  # WHY: notify UI on normal completion (updated_count).
     cancelled = Signal(int)  # WHY: notify UI on user cancel without crashing.
     error = Signal(str)  # WHY: surface errors without blocking UI thread.
+    CHUNK_SIZE = 5000  # WHY: tek süreç modunda parça; iptal ve ilerleme bu aralıkla kontrol edilir.
+    WRITE_BATCH = 20000  # WHY: yazıcı bu kadar güncellemeyi tek transaction'da uygular.
+    COLUMNS = parallel_recalc.COLUMNS
 
-    def __init__(self, db, tersane_id=0):
+    def __init__(self, db, tersane_id=0, scope=None, max_workers=None):
         super().__init__()
         self.db = db  # WHY: keep DB access same as before, only off UI thread.
         self.tersane_id = tersane_id or 0  # WHY: normalize to keep behavior consistent with global (0) mode.
+        self.scope = scope  # NEW: RecalcScope (core.recalc_scope); None = tüm kayıtlar (eski davranış).
+        self.max_workers = max_workers  # NEW: None = çekirdek sayısı - 1; 1 = paralel mod kapalı.
         self._stop_requested = False  # WHY: allow safe cancel without killing the thread.
 
     def request_stop(self):
         """Arka plan isini guvenle durdur."""
         self._stop_requested = True  # WHY: checked in run loop to stop gracefully.
 
+    def _should_stop(self):
+        return self._stop_requested or QThread.currentThread().isInterruptionRequested()
+
     @Slot()
     def run(self):
         try:
-            from core.hesaplama import hesapla_hakedis
+            import pandas as pd
+            if self.scope is not None and self.scope.is_empty:
+                self.progress.emit(0, 0)
+                self.finished.emit(0)  # WHY: kural farkı hiçbir kaydı etkilemiyor.
+                return
             # Tüm kayıtları al (aktif tersane varsa filtrele)
             with self.db.get_connection() as conn:
                 c = conn.cursor()
                 sql = """
-                    SELECT id, tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat
+                    SELECT id, tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, kural_parmak_izi, tersane_id,
+                           giris_dk, cikis_dk, kayip_dk
                     FROM gunluk_kayit
                     WHERE COALESCE(manuel_kilit,0)=0
                 """
@@ -49,48 +65,81 @@ class RecalcWorker(QObject):
                 if self.tersane_id and self.tersane_id > 0:
                     sql += " AND tersane_id = ?"
                     params.append(self.tersane_id)
+                day_filter = self.scope.weekday_sql() if self.scope is not None else None
+                if day_filter:
+                    sql += " AND " + day_filter[0]  # NEW: sadece gün bazlı farkta SQL ön filtresi.
+                    params.extend(day_filter[1])
                 sql += " ORDER BY tarih DESC"
                 records = c.execute(sql, tuple(params)).fetchall()
+                personnel = self.db._load_personnel_flags(c)  # WHY: tek sorgu; satır başına personel SELECT'i yok.
+
+            if self.scope is not None and not self.scope.full and records:
+                # NEW: sadece kural farkından etkilenebilecek kayıtlar yeniden hesaplanır.
+                frame = pd.DataFrame(records, columns=self.COLUMNS)
+                frame['yevmiyeci'] = frame['ad_soyad'].map(
+                    lambda ad: bool((personnel.get(ad.strip() if isinstance(ad, str) else ad) or {}).get('yevmiyeci', 0)))
+                keep = self.scope.mask(frame)
+                records = [r for r, k in zip(records, keep) if k]
 
             total = len(records)
             self.progress.emit(0, total)
 
-            holiday_set = self.db.get_holidays()
+            calendar = self.db.get_holiday_calendar()
             # Aktif tersane için tek seferlik cache (eski davranışla uyumlu).
             if self.tersane_id and self.tersane_id > 0:
                 settings_cache = self.db.get_settings_cache(tersane_id=self.tersane_id)
             else:
                 settings_cache = self.db.get_settings_cache()
             shipyard_rules = settings_cache.get('shipyard_rules', settings_cache) if settings_cache else None
+            rules_fp = rules_fingerprint(shipyard_rules)
+
+            workers = self.max_workers or parallel_recalc.default_workers()
+            if workers > 1 and total >= parallel_recalc.PARALLEL_MIN_ROWS:
+                # NEW: (tersane, ay) bölümleri işçi süreçlerde hesaplanır; bu thread tek yazıcıdır.
+                results = parallel_recalc.iter_results(
+                    parallel_recalc.partition_records(records), shipyard_rules, rules_fp, calendar, personnel,
+                    max_workers=workers, should_stop=self._should_stop)
+            else:
+                results = (
+                    parallel_recalc.partition_result(chunk, shipyard_rules, rules_fp, calendar, personnel)
+                    for chunk in (records[i:i + self.CHUNK_SIZE] for i in range(0, total, self.CHUNK_SIZE))
+                )
 
             updated_count = 0
+            processed = 0
+            day_hits = day_misses = 0
             with self.db.get_connection() as conn:
                 c = conn.cursor()
-                # WHY: move existing calculation block out of cancel guard; logic unchanged below.
-                for idx, (rec_id, tarih, ad_soyad, giris_str, cikis_str, kayip_str) in enumerate(records, start=1):
-                    # WHY: allow cancel/interrupt without crashing or freezing UI.
-                    if self._stop_requested or QThread.currentThread().isInterruptionRequested():
-                        self.cancelled.emit(updated_count)  # WHY: notify UI that cancel completed.
-                        return  # WHY: exit cleanly to avoid unsafe thread termination.
-                    # Personelin yevmiyeci/özel durumunu tek sorgu ile al (mantık değişmez).
-                    p_row = c.execute("SELECT yevmiyeci_mi, ozel_durum FROM personel WHERE TRIM(ad_soyad)=TRIM(?)", (ad_soyad,)).fetchone()  # WHY: same lookup, moved out of cancel guard.
-                    yevmiyeci_mi = bool(p_row[0]) if p_row else False  # WHY: keep existing boolean conversion.
-                    # Hakediş hesapla (mevcut hesaplama mantığı korunur).
-                    normal, mesai, notlar = hesapla_hakedis(  # WHY: reuse existing calculation unchanged.
-                        tarih, giris_str, cikis_str, kayip_str, holiday_set,  # WHY: pass same inputs as before.
-                        self.db.get_holiday_info,  # WHY: keep same holiday lookup.
-                        self.db.get_personnel_special_status,  # WHY: keep same special-status lookup.
-                        ad_soyad, yevmiyeci_mi, self.db,  # WHY: keep same personnel context.
-                        settings_cache=shipyard_rules  # WHY: keep dynamic shipyard rules without changing logic.
-                    )
-                    c.execute("UPDATE gunluk_kayit SET hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=? WHERE id=?",
-                              (normal, mesai, notlar, rec_id))  # WHY: persist same computed values.
-                    updated_count += 1  # WHY: track updated rows for summary.
-                    if idx % 50 == 0 or idx == total:
-                        conn.commit()  # WHY: batch commit keeps UI smooth without changing results.
-                    if idx % 10 == 0 or idx == total:
-                        self.progress.emit(idx, total)  # WHY: update progress without blocking UI.
-
+                pending = []
+
+                def flush():
+                    nonlocal updated_count
+                    if pending:
+                        c.executemany("UPDATE gunluk_kayit SET hesaplanan_normal=?, hesaplanan_mesai=?, aciklama=?, kural_parmak_izi=? WHERE id=?",
+                                      pending)
+                        conn.commit()  # WHY: büyük transaction; iptalde yazılanlar kalıcı olur.
+                        updated_count += len(pending)
+                        pending.clear()
+
+                for n_rows, updates, day_stats in results:
+                    pending.extend(updates)
+                    processed += n_rows
+                    day_hits += day_stats['hits']
+                    day_misses += day_stats['misses']
+                    if len(pending) >= self.WRITE_BATCH:
+                        flush()
+                    self.progress.emit(processed, total)  # WHY: update progress without blocking UI.
+                    if self._should_stop():
+                        break
+                if hasattr(results, 'close'):
+                    results.close()  # SAFE: iptalde işçi havuzu kapanır, bekleyen bölümler başlamaz.
+                flush()
+            # NEW: aynı gün girdisinin tekrar kullanımı (DayResultCache karşılığı) gözlemlenebilsin.
+            logging.info("Yeniden hesaplama gün tekrarı: %d isabet, %d ıska", day_hits, day_misses)
+
+            if processed < total:
+                self.cancelled.emit(updated_count)  # WHY: notify UI that cancel completed.
+                return  # WHY: exit cleanly to avoid unsafe thread termination.
             self.finished.emit(updated_count)  # WHY: normal completion signal.
         except Exception as e:
             self.error.emit(str(e))
@@ -564,6 +613,7 @@ class SettingsPage(QWidget):
         try:
             # NEW: determine active tersane scope; 0 keeps legacy global behavior.
             target_tid = self.tersane_id if (self.tersane_id and self.tersane_id > 0) else 0
+            old_rules = self.db.get_shipyard_rules(tersane_id=target_tid)  # NEW: kural farkı için kayıt öncesi durum.
 
             # Pazar mesaisi - sayi kontrolu
             ok, val = ensure_non_negative_number(self.input_sunday.text(), "Pazar Gunu Sabit Mesai")
@@ -651,7 +701,13 @@ class SettingsPage(QWidget):
             logo_path = self.input_logo.text().strip() if hasattr(self, 'input_logo') else ''
             self.db.update_setting('export_logo_path', logo_path)
             
-            # Mesai ayarları değişmişse tüm kayıtları yeniden hesapla
+            # NEW: sadece hesaplamayı etkileyen kural farkı varsa yeniden hesaplama önerilir.
+            scope = diff_rules(old_rules, self.db.get_shipyard_rules(tersane_id=target_tid))
+            if scope.is_empty:
+                QMessageBox.information(self, "Başarılı", "Ayarlar kaydedildi. Hesaplamayı etkileyen bir kural değişmediği için kayıtlar güncellenmedi.")
+                return
+
+            # Mesai ayarları değişmişse etkilenen kayıtları yeniden hesapla
             reply = QMessageBox.question(
                 self, 
                 "Kayıtları Yeniden Hesapla", 
@@ -661,14 +717,14 @@ class SettingsPage(QWidget):
             
             if reply == QMessageBox.Yes:
                 # NEW: Recalc işlemini UI thread'i dışında çalıştır (donmayı engeller).
-                self._start_recalc_worker(target_tid)
+                self._start_recalc_worker(target_tid, scope)
                 return  # WHY: sonuç mesajı worker tamamlandığında gösterilecek.
             else:
                 QMessageBox.information(self, "Başarılı", "Ayarlar kaydedildi. Tema ve font değişiklikleri uygulanmıştır.")
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Ayarlar kaydedilirken hata: {str(e)}")
 
-    def _start_recalc_worker(self, tersane_id):
+    def _start_recalc_worker(self, tersane_id, scope=None):
         """Arka planda yeniden hesaplama başlatır (UI donmasını engeller)."""
         try:
             if self._recalc_thread and self._recalc_thread.isRunning():
@@ -685,7 +741,7 @@ class SettingsPage(QWidget):
             self._recalc_dialog.show()  # WHY: keep user feedback during background work.
 
             self._recalc_thread = QThread()  # WHY: run heavy work off the UI thread.
-            worker = RecalcWorker(self.db, tersane_id)  # WHY: keep existing worker logic, just manage lifecycle safely.
+            worker = RecalcWorker(self.db, tersane_id, scope)  # WHY: keep existing worker logic, just manage lifecycle safely.
             self._recalc_worker = worker  # WHY: keep a strong reference to avoid GC while running.
             worker.moveToThread(self._recalc_thread)  # WHY: execute worker in background thread.
             self._recalc_thread.started.connect(worker.run)  # WHY: start work when thread starts.
@@ -1278,12 +1334,16 @@ class MesaiKatsayilariDialog(QDialog):
         dakika = int((ondalik_saat - saat) * 60)
         return f"{saat:02d}:{dakika:02d}"
     
-    def recalculate_records(self):
-        """Var olan tum kayitlari yeniden hesapla"""
+    def recalculate_records(self, scope=None):
+        """Var olan kayitlari yeniden hesapla (scope verilirse sadece etkilenenleri)"""
         # NEW: agir is yukunu UI disinda calistir.
-        self._start_recalc_worker()
+        self._start_recalc_worker(scope)
+
+    def _scope_since(self, old_rules):
+        """Katsayi degisikligi oncesi kurallarla simdiki kurallar arasindaki etki kapsami."""
+        return diff_rules(old_rules, self.db.get_shipyard_rules(tersane_id=self.tersane_id))
 
-    def _start_recalc_worker(self):
+    def _start_recalc_worker(self, scope=None):
         """Arka planda yeniden hesaplama baslatir (UI donmasini engeller)."""
         if self._recalc_thread and self._recalc_thread.isRunning():
             return  # WHY: do not start a second recalc while one is running.
@@ -1299,7 +1359,7 @@ class MesaiKatsayilariDialog(QDialog):
         self._recalc_dialog.show()  # WHY: keep user feedback during background work.
 
         self._recalc_thread = QThread()  # WHY: run heavy work off the UI thread.
-        worker = RecalcWorker(self.db, self.tersane_id)  # WHY: keep existing worker logic, just manage lifecycle safely.
+        worker = RecalcWorker(self.db, self.tersane_id, scope)  # WHY: keep existing worker logic, just manage lifecycle safely.
         self._recalc_worker = worker  # WHY: keep a strong reference to avoid GC while running.
         worker.moveToThread(self._recalc_thread)  # WHY: execute worker in background thread.
         self._recalc_thread.started.connect(worker.run)  # WHY: start work when thread starts.
@@ -1403,6 +1463,7 @@ class MesaiKatsayilariDialog(QDialog):
             QMessageBox.warning(self, "Hata", "Başlangıç saati bitiş saatinden küçük olmalı!")
             return
         
+        old_rules = self.db.get_shipyard_rules(tersane_id=self.tersane_id)  # NEW: etki kapsami icin onceki kurallar.
         # NEW: save katsayı under active tersane_id (None keeps global behavior).
         self.db.add_mesai_katsayisi(baslangic, bitis, katsayi, aciklama, tersane_id=self.tersane_id if self.tersane_id > 0 else None)
         self.load_data()
@@ -1422,7 +1483,7 @@ class MesaiKatsayilariDialog(QDialog):
         
         if reply == QMessageBox.Yes:
             self._recalc_done_message = "Katsayi eklendi ve kayitlar yeniden hesaplandi!"
-            self.recalculate_records()  # NEW: run in background; message will be shown on finish.
+            self.recalculate_records(self._scope_since(old_rules))  # NEW: run in background; message will be shown on finish.
         else:
             QMessageBox.information(self, "Başarılı", "Katsayı eklendi. (Eski kayıtlar değişmedi)")
     
@@ -1482,6 +1543,7 @@ class MesaiKatsayilariDialog(QDialog):
             return
         
         # Veritabanında güncelle
+        old_rules = self.db.get_shipyard_rules(tersane_id=self.tersane_id)  # NEW: etki kapsami icin onceki kurallar.
         # NEW: keep update scoped to active tersane (does not break global behavior).
         self.db.update_mesai_katsayisi(self.editing_id, baslangic, bitis, katsayi, aciklama, tersane_id=self.tersane_id if self.tersane_id > 0 else None)
         self.load_data()
@@ -1497,7 +1559,7 @@ class MesaiKatsayilariDialog(QDialog):
         
         if reply == QMessageBox.Yes:
             self._recalc_done_message = "Katsayi guncellendi ve kayitlar yeniden hesaplandi!"
-            self.recalculate_records()  # NEW: run in background; message will be shown on finish.
+            self.recalculate_records(self._scope_since(old_rules))  # NEW: run in background; message will be shown on finish.
         else:
             QMessageBox.information(self, "Başarılı", "Katsayı güncellendi. (Eski kayıtlar değişmedi)")
     
@@ -1536,6 +1598,7 @@ class MesaiKatsayilariDialog(QDialog):
         reply = QMessageBox.question(self, "Onay", "Bu katsayıyı silmek istediğinize emin misiniz?",
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
+            old_rules = self.db.get_shipyard_rules(tersane_id=self.tersane_id)  # NEW: etki kapsami icin onceki kurallar.
             self.db.delete_mesai_katsayisi(id)
             self.load_data()
             
@@ -1549,7 +1612,7 @@ class MesaiKatsayilariDialog(QDialog):
             
             if reply2 == QMessageBox.Yes:
                 self._recalc_done_message = "Katsayi silindi ve kayitlar yeniden hesaplandi!"
-                self.recalculate_records()  # NEW: run in background; message will be shown on finish.
+                self.recalculate_records(self._scope_since(old_rules))  # NEW: run in background; message will be shown on finish.
             else:
                 QMessageBox.information(self, "Başarılı", "Katsayı silindi. (Eski kayıtlar değişmedi)")
 
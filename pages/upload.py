@@ -1,5 +1,6 @@
 import pandas as pd
 from datetime import datetime
+import itertools
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel,
                              QFileDialog, QProgressBar, QTextEdit, QMessageBox,
@@ -11,33 +12,21 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel,
 from PySide6.QtCore import Qt, QThread, Signal, Slot, QObject
 from PySide6.QtGui import QColor
 from core.database import Database
-from core.hesaplama import hesapla_hakedis
+from core import parallel_upload, watch_ingest
+from core.upload_registry import drop_unchanged, file_fingerprint, firma_key, new_checkpoint, resume_plan, sheet_key
+from core.upload_ingest import (PARSED_FILES, UploadReadError, detect_columns, filter_firma, find_firma_column,
+                                 is_large_upload, iter_file_key_frames, iter_key_frames, iter_upload_chunks,
+                                 prepare_upload_frame, read_upload_file, read_upload_preview, skip_consumed, tr_lower)
 from core.user_config import load_config, save_config
 
-def normalize_time_cell(val):
-    if pd.isna(val) or str(val).strip() in ['', 'nan', 'NaT']: return ""
-    s = str(val).strip()
-    try:
-        f = float(s)
-        if f < 1.0:
-            h = int(f * 24)
-            m = int((f * 24 - h) * 60)
-            return f"{h:02d}:{m:02d}"
-    except (ValueError, TypeError): pass
-    return s if ":" in s else ""
-
-def tr_lower(text):
-    if not isinstance(text, str):
-        return str(text).lower()
-    return text.replace("İ", "i").replace("I", "ı").lower()
-
 
 class UploadWorker(QObject):
     progress = Signal(int)
     finished = Signal(int)
     error = Signal(str)
+    CHUNK_ROWS = 5000  # WHY: parça başına hesap + commit; büyük dosyalarda bellek sınırlı kalır.
 
-    def __init__(self, files, db_file, all_personel, settings_cache, skip_keys=None, firma_id=None, tersane_id=None, batch_id=None, sheet_name=None, firma_filter_name=None, firma_col_name=None):
+    def __init__(self, files, db_file, all_personel, settings_cache, skip_keys=None, firma_id=None, tersane_id=None, batch_id=None, sheet_name=None, firma_filter_name=None, firma_col_name=None, max_workers=None, delta_only=False, file_hashes=None, checkpoint=None):
         super().__init__()
         self.files = files
         self.db_file = db_file  # WHY: pass file path instead of shared DB object to avoid cross-thread cache/conn sharing.
@@ -50,6 +39,10 @@ class UploadWorker(QObject):
         self.sheet_name = sheet_name
         self.firma_filter_name = firma_filter_name
         self.firma_col_name = firma_col_name  # WHY: kullanıcı dialog'dan sütun seçtiyse bunu kullan.
+        self.max_workers = max_workers  # NEW: None -> çekirdek sayısı - 1; 1 -> dosyalar sırayla bu thread'de.
+        self.delta_only = delta_only  # NEW: mevcut kayıtla birebir aynı satırlar hesaplanmadan atlanır.
+        self.file_hashes = file_hashes or {}  # NEW: dosya -> içerik özeti; başarılı dosyalar kayıt defterine yazılır.
+        self.checkpoint = checkpoint  # NEW: app_meta kontrol noktası; her commit ile ilerler, sürdürmede atlanacak satırlar.
 
 
     @Slot()
@@ -57,181 +50,243 @@ class UploadWorker(QObject):
         import logging
         from core.database import Database as _DB
         db = _DB(self.db_file, use_cache=False)  # WHY: thread-local DB instance; use_cache=False avoids shared cache mutation.
-        total_saved = 0
-        skipped_count = 0
+        holiday_calendar = db.get_holiday_calendar()  # WHY: tatiller bir kez okunur; satır başına DB sorgusu yok.
+        rules = self.settings_cache.get('shipyard_rules', self.settings_cache) if self.settings_cache else None  # NEW: shipyard_rules dict.
+        self.total_saved = 0
+        self.skipped_count = 0
+        self.unchanged_count = 0
+        self.day_stats = {'hits': 0, 'misses': 0}  # NEW: toplu motorun gün tekrarı (DayResultCache karşılığı).
+        # WHY: büyük dosyalar işçiye gönderilmez; satırları tek parça dönüp tek commit'te yazılırdı. Akış yolunda
+        # bellek parça boyutuyla sınırlı kalır, her parça commit edilir ve kontrol noktası parça parça ilerler.
+        small = [f for f in self.files if not is_large_upload(f)]
+        workers = min(self.max_workers or parallel_upload.default_workers(), len(small))
         try:
-            for idx, fname in enumerate(self.files):
-                try:
-                    df, error = self.read_file_smart(fname)
-                except Exception as e:
-                    self.error.emit(f"<span style='color:#EF5350;'>HATA ({os.path.basename(fname)}): Dosya okunurken hata: {str(e)}</span>")
-                    logging.exception(e)
-                    continue
-                if df is None:
-                    self.error.emit(f"<span style='color:#EF5350;'>HATA ({os.path.basename(fname)}): {error}</span>")
-                    continue
-                # Firma filtresi: yalnizca secilen firmaya ait satirlari isle
-                if self.firma_filter_name:
-                    fc = None
-                    # Kullanıcı dialog'da sütun seçtiyse önce onu dene
-                    if self.firma_col_name and self.firma_col_name in df.columns:
-                        fc = self.firma_col_name
-                    else:
-                        for c in df.columns:
-                            cl = tr_lower(str(c)).strip()
-                            if cl in ('firma', 'firma adi', 'firma adı', 'sirket', 'şirket'):
-                                fc = c
-                                break
+            streamed = self.files
+            completed = True
+            if len(small) >= parallel_upload.PARALLEL_MIN_FILES and workers > 1:
+                completed = self._run_parallel(db, rules, holiday_calendar, workers, small)
+                streamed = [f for f in self.files if f not in small]
+            if completed:
+                completed = self._run_sequential(db, rules, holiday_calendar, streamed,
+                                                 offset=len(self.files) - len(streamed))
+            if completed and self.skipped_count > 0:
+                self.error.emit(f"<span style='color:#FFD600;'>{self.skipped_count} kayit cakisma nedeniyle atlandi.</span>")
+            if completed and self.unchanged_count > 0:
+                self.error.emit(f"<span style='color:#90CAF9;'>{self.unchanged_count} kayit degismedigi icin atlandi.</span>")
+            if completed and self.checkpoint is not None:
+                db.clear_upload_checkpoint(self.batch_id)  # WHY: yükleme bitti; sürdürülecek bir şey kalmadı.
+            logging.info("Yükleme gün önbelleği: %d isabet, %d ıska", self.day_stats['hits'], self.day_stats['misses'])
+            self.finished.emit(self.total_saved)
+        except Exception as e:
+            self.error.emit(f"<span style='color:#EF5350;'>Kritik Hata: {str(e)}</span>")
+            logging.exception(e)
+            self.finished.emit(self.total_saved)
+
+    def _run_sequential(self, db, rules, holiday_calendar, files, offset=0):
+        """
+        Dosyalar sırayla, parça parça; veritabanı hatasında yükleme durur (False döner).
+        offset: ilerleme çubuğunda bu dosyalardan önce (paralel yolda) bitmiş dosya sayısı.
+        """
+        import logging
+        n_files = len(self.files)
+        for idx, fname in enumerate(files, offset):
+            fc = None
+            cols = None
+            ad_gorev_map = {}
+            file_saved = 0
+            try:
+                # NEW: dosya parça parça okunur (önbellekteki ön izleme DataFrame'i, openpyxl read_only
+                # veya CSV chunksize); her parça hesaplanıp ayrı commit edilir, tüm dosya belleğe alınmaz.
+                # Sürdürülen yüklemede kontrol noktasına kadar yazılmış satırlar atlanır.
+                chunks = iter_upload_chunks(fname, self.sheet_name, self.CHUNK_ROWS)
+                for chunk, rows_read, rows_total, consumed in skip_consumed(chunks, self._resume_rows(fname)):
+                    if cols is None:
+                        fc = find_firma_column(chunk, self.firma_col_name) if self.firma_filter_name else None
+                        cols = detect_columns(chunk)
+                        if not cols['tarih'] or not cols['ad']:
+                            self.error.emit(f"<span style='color:#EF5350;'>HATA ({os.path.basename(fname)}): 'Tarih' veya 'Ad Soyad' sutunu tespit edilemedi.</span>")
+                            cols = False
+                            break
+                    # Firma filtresi: yalnizca secilen firmaya ait satirlari isle
                     if fc:
-                        df = df[df[fc].astype(str).str.strip().apply(tr_lower) == tr_lower(self.firma_filter_name).strip()].reset_index(drop=True)
-                try:
-                    cols = {k: None for k in ['tarih', 'ad', 'giris', 'cikis', 'kayip', 'gorevi']}
-                    for c in df.columns:
-                        cl = tr_lower(str(c))
-                        if 'tarih' in cl: cols['tarih'] = c
-                        elif 'ad' in cl and 'soyad' in cl: cols['ad'] = c
-                        elif 'giris' in cl or 'giriş' in cl: cols['giris'] = c
-                        elif 'cikis' in cl or 'çıkış' in cl: cols['cikis'] = c
-                        elif 'kayip' in cl or 'kayıp' in cl: cols['kayip'] = c
-                        elif 'gorev' in cl or 'görevi' in cl or 'unvan' in cl or 'pozisyon' in cl: cols['gorevi'] = c
-                    if not cols['tarih'] or not cols['ad']:
-                        self.error.emit(f"<span style='color:#EF5350;'>HATA ({os.path.basename(fname)}): 'Tarih' veya 'Ad Soyad' sutunu tespit edilemedi.</span>")
-                        continue
-                    batch_data = []
-                    ad_gorev_map = {}  # ad -> gorevi (ilk bulunan değer yeterli)
-                    row_count = len(df)
-                    for i, row in enumerate(df.iterrows()):
+                        chunk = filter_firma(chunk, fc, self.firma_filter_name)
+                    # NEW: kolon bazlı normalize (tarih/saat/ad) + skip_keys eşleştirmesi tek seferde.
+                    frame, chunk_skipped, chunk_gorev = prepare_upload_frame(chunk, cols, self.skip_keys)
+                    self.skipped_count += chunk_skipped
+                    for ad, gorev in chunk_gorev.items():
+                        ad_gorev_map.setdefault(ad, gorev)  # WHY: dosyadaki ilk görev kazanır.
+                    if self.delta_only and not frame.empty:
+                        with db.get_connection() as conn:
+                            frame, unchanged = drop_unchanged(conn, frame, self.tersane_id)
+                        self.unchanged_count += unchanged
+                    if not frame.empty:
+                        rows = parallel_upload.compute_upload_rows(frame, rules, holiday_calendar, self.all_personel, db=db,
+                                                                   stats=self.day_stats)
                         try:
-                            t_val = row[1][cols['tarih']]
-                            if pd.isna(t_val) or str(t_val).strip() == '': continue
-                            if isinstance(t_val, datetime):
-                                tarih_str = t_val.strftime("%Y-%m-%d")
-                            else:
-                                t_str = str(t_val).split()[0].replace('/', '-').replace('.', '-')
-                                parts = t_str.split('-')
-                                if len(parts) == 3:
-                                    if len(parts[2]) == 4:
-                                        tarih_str = f"{parts[2]}-{parts[1]}-{parts[0]}"
-                                    else:
-                                        tarih_str = t_str
-                                else:
-                                    tarih_str = t_str
-                            ad = str(row[1][cols['ad']]).strip()
-                            if not ad or ad.lower() == 'nan': continue
-
-                            # Cakisma kontrolu: skip_keys'de varsa atla
-                            record_key = f"{tarih_str}|{ad}"
-                            if record_key in self.skip_keys:
-                                skipped_count += 1
-                                continue
-
-                            # Görevi varsa ve henüz bu personel için kaydetmedikse sakla
-                            if cols['gorevi'] and ad not in ad_gorev_map:
-                                g_val = row[1].get(cols['gorevi'])
-                                if g_val and str(g_val).strip() not in ('', 'nan', 'NaN'):
-                                    ad_gorev_map[ad] = str(g_val).strip()
-
-                            giris = normalize_time_cell(row[1].get(cols['giris']))
-                            cikis = normalize_time_cell(row[1].get(cols['cikis']))
-                            kayip = normalize_time_cell(row[1].get(cols['kayip']))
-                            p_inf = self.all_personel.get(ad, {'yevmiyeci': 0, 'ozel_durum': None})
-                            h_info = db.get_holiday_info(tarih_str)
-                            h_set = {tarih_str} if h_info else set()
-                            normal, mesai, notlar = hesapla_hakedis(
-                                tarih_str, giris, cikis, kayip, h_set,
-                                db.get_holiday_info, lambda x: p_inf['ozel_durum'],
-                                ad, p_inf['yevmiyeci'], db=db,
-                                settings_cache=self.settings_cache.get('shipyard_rules', self.settings_cache) if self.settings_cache else None  # NEW: shipyard_rules dict.
-                            )
-                            batch_data.append((tarih_str, ad, giris, cikis, kayip, normal, mesai, notlar, self.firma_id, self.tersane_id, self.batch_id))
-                            if i % 50 == 0 and row_count > 0:
-                                self.progress.emit(int((i / row_count) * 100))
-                        except Exception as e:
-                            self.error.emit(f"<span style='color:#FFA726;'>Satir atlandi ({os.path.basename(fname)} / satir {i+1}): {str(e)}</span>")
-                            logging.exception(e)
-                            continue
-                    if batch_data:
-                        try:
-                            with db.get_connection() as conn:
-                                conn.execute("PRAGMA journal_mode=WAL;")
-                                conn.execute("PRAGMA synchronous=NORMAL;")
-                                conn.executemany(
-                                    "INSERT OR REPLACE INTO gunluk_kayit "
-                                    "(tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat, "
-                                    "hesaplanan_normal, hesaplanan_mesai, aciklama, firma_id, tersane_id, import_batch_id) "
-                                    "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
-                                    batch_data
-                                )
-                                # Personelleri secilen tersane ile iliskilendir
-                                if self.tersane_id:
-                                    personel_adlari = list(set(row[1] for row in batch_data))
-                                    for ad in personel_adlari:
-                                        conn.execute(
-                                            "UPDATE personel SET tersane_id=? WHERE ad_soyad=? AND (tersane_id IS NULL OR tersane_id != ?)",
-                                            (self.tersane_id, ad, self.tersane_id)
-                                        )
-                                conn.commit()
-                            # Görevi boş olan personelleri doldur (dolu olanları dokunma)
-                            if ad_gorev_map:
-                                try:
-                                    db.update_gorevi_bulk_if_empty(list(ad_gorev_map.items()))
-                                except Exception:
-                                    pass
-                            total_saved += len(batch_data)
+                            saved = self._write_rows(db, rows, fname, consumed)
                         except Exception as e:
                             self.error.emit(f"<span style='color:#EF5350;'>VERITABANI HATASI ({os.path.basename(fname)}): {str(e)}</span>")
                             logging.exception(e)
-                            self.finished.emit(total_saved)
-                            return
-                    self.progress.emit(int((idx+1)/len(self.files)*100))
+                            return False
+                        file_saved += saved
+                        self.total_saved += saved
+                    done = rows_read / rows_total if rows_total else 0.5
+                    self.progress.emit(int((idx + min(done, 1.0)) / n_files * 100))  # WHY: ilerleme okunan satıra göre.
+            except UploadReadError as e:
+                self.error.emit(f"<span style='color:#EF5350;'>HATA ({os.path.basename(fname)}): {str(e)}</span>")
+                continue
+            except Exception as e:
+                self.error.emit(f"<span style='color:#EF5350;'>Dosya islenemedi ({os.path.basename(fname)}): {str(e)}</span>")
+                logging.exception(e)
+                continue
+            self._update_gorevi(db, ad_gorev_map)
+            if cols:
+                self._record_import(db, fname, file_saved)
+                self._mark_file_done(db, fname)
+            self.progress.emit(int((idx + 1) / n_files * 100))
+        return True
+
+    def _run_parallel(self, db, rules, holiday_calendar, workers, files):
+        """
+        NEW: dosyalar işçi süreçlerde okunup hesaplanır; bu thread tek yazıcıdır.
+        Her dosya kendi transaction'ında yazılır; hatalı dosya geri alınır, diğerleri devam eder.
+        Yalnızca küçük dosyalar gelir (is_large_upload değil); sonuç tek parça döner.
+        """
+        import logging
+        cached = []
+        for fname in files:
+            try:
+                if PARSED_FILES.get(PARSED_FILES.key(fname, self.sheet_name)) is not None:
+                    cached.append(fname)  # WHY: ön izlemede okunan dosya bu thread'de hesaplanır; disk tekrar okunmaz.
+            except OSError:
+                pass
+        options = {
+            'sheet_name': self.sheet_name, 'skip_keys': self.skip_keys, 'chunk_rows': self.CHUNK_ROWS,
+            'firma_filter_name': self.firma_filter_name, 'firma_col_name': self.firma_col_name,
+            'delta_db': self.db_file if self.delta_only else None, 'tersane_id': self.tersane_id,
+            'resume_rows': {f: self._resume_rows(f) for f in files},
+        }
+        n_files = len(self.files)
+        results = parallel_upload.iter_file_results(files, options, rules, holiday_calendar,
+                                                    self.all_personel, max_workers=workers, local_files=cached)
+        for done, result in enumerate(results, 1):
+            name = os.path.basename(result['file'])
+            if result['error']:
+                label, msg = result['error']
+                self.error.emit(f"<span style='color:#EF5350;'>{label} ({name}): {msg}</span>")
+            else:
+                self.skipped_count += result['skipped']
+                self.unchanged_count += result['unchanged']
+                for key in self.day_stats:
+                    self.day_stats[key] += result['day_stats'][key]
+                rows = result['rows']
+                try:
+                    saved = self._write_rows(db, rows, result['file'], done=True)
                 except Exception as e:
-                    self.error.emit(f"<span style='color:#EF5350;'>Dosya islenemedi ({os.path.basename(fname)}): {str(e)}</span>")
+                    self.error.emit(f"<span style='color:#EF5350;'>VERITABANI HATASI ({name}): {str(e)}</span>")
                     logging.exception(e)
-                    continue
-            if skipped_count > 0:
-                self.error.emit(f"<span style='color:#FFD600;'>{skipped_count} kayit cakisma nedeniyle atlandi.</span>")
-            self.finished.emit(total_saved)
-        except Exception as e:
-            self.error.emit(f"<span style='color:#EF5350;'>Kritik Hata: {str(e)}</span>")
-            import logging
-            logging.exception(e)
-            self.finished.emit(total_saved)
+                else:
+                    self.total_saved += saved
+                    self._update_gorevi(db, result['gorev'])
+                    self._record_import(db, result['file'], saved)
+                    self._mark_file_done(db, result['file'])
+            self.progress.emit(int(done / n_files * 100))
+        return True
+
+    def _write_rows(self, db, rows, fname=None, consumed=None, done=False):
+        """
+        Satırları tek transaction'da yazar; hata olursa bu parça/dosya tümüyle geri alınır.
+        consumed/done: kontrol noktası için dosyada buraya kadar işlenen veri satırı / dosya bitti mi.
+        """
+        if not rows:
+            return 0
+        # WHY: ilk dosya dışındakilerin personeli de rollback için kaydedilir (INSERT OR IGNORE; ilk kayıt kalır).
+        db.snapshot_personel_for_batch(self.batch_id, sorted({row[1] for row in rows}))
+        checkpoint = None
+        if self.checkpoint is not None and fname:
+            state = self._file_state(fname)
+            if consumed is not None:
+                state['rows'] = consumed
+            state['done'] = state.get('done') or done
+            checkpoint = self.checkpoint
+        # NEW: staging tablosu + ON CONFLICT DO UPDATE; parça/dosya başına commit, batch_id ile geri alınabilir.
+        return db.merge_upload_rows(rows, self.firma_id, self.tersane_id, self.batch_id, checkpoint=checkpoint)
+
+    def _file_state(self, fname):
+        progress = self.checkpoint.setdefault('progress', {})
+        return progress.setdefault(fname, {'hash': self.file_hashes.get(fname), 'rows': 0, 'done': False})
+
+    def _resume_rows(self, fname):
+        if self.checkpoint is None:
+            return 0
+        return int((self.checkpoint.get('progress', {}).get(fname) or {}).get('rows') or 0)
+
+    def _mark_file_done(self, db, fname):
+        if self.checkpoint is None:
+            return
+        self._file_state(fname)['done'] = True
+        try:
+            db.save_upload_progress(self.checkpoint)
+        except Exception:
+            pass  # SAFEGUARD: kontrol noktası yazılamazsa sürdürmede dosya baştan (upsert ile) işlenir.
 
-    def read_file_smart(self, fname):
-        df = None
+    def _record_import(self, db, fname, row_count):
+        # NEW: aynı dosya aynı ayarlarla tekrar bırakılırsa yükleme sayfası bunu hemen tanır.
+        file_hash = self.file_hashes.get(fname)
+        if not file_hash:
+            return
         try:
-            sheet = self.sheet_name
-            if isinstance(sheet, list):
-                dfs = [pd.read_excel(fname, sheet_name=s) for s in sheet]
-                df = pd.concat(dfs, ignore_index=True) if dfs else None
-            else:
-                df = pd.read_excel(fname, sheet_name=sheet if sheet is not None else 0)
-        except Exception as e_xls:
+            # WHY: anahtar klasör izlemeyle aynı: ilk sayfa '' ve firma kolonu olsun olmasın hedef firma adı.
+            firma_name = self.firma_filter_name or dict(db.get_firmalar()).get(self.firma_id)
+            db.record_upload_import(file_hash, sheet_key(self.sheet_name), firma_key(firma_name),
+                                    self.tersane_id or 0, self.firma_id, self.batch_id,
+                                    os.path.basename(fname), row_count)
+        except Exception:
+            pass  # SAFEGUARD: kayıt defteri yazılamazsa yükleme yine başarılıdır.
+
+    @staticmethod
+    def _update_gorevi(db, ad_gorev_map):
+        # Görevi boş olan personelleri doldur (dolu olanları dokunma)
+        if ad_gorev_map:
             try:
-                df = pd.read_csv(fname)
-            except Exception as e_csv:
-                try:
-                    df = pd.read_csv(fname, sep=';')
-                except Exception:
-                    return None, f"Dosya okunamadi: {str(e_xls)}"
-        if df is None or df.empty:
-            return None, "Dosya bos veya okunamadi."
-        def find_header_row(dataframe):
-            cols = [tr_lower(c) for c in dataframe.columns]
-            if any('tarih' in c for c in cols) and any(('ad' in c and 'soyad' in c) for c in cols):
-                return dataframe
-            for i, row in dataframe.head(20).iterrows():
-                row_vals = [tr_lower(str(x)) for x in row.values]
-                if any('tarih' in x for x in row_vals) and any(('ad' in x and 'soyad' in x) for x in row_vals):
-                    dataframe.columns = dataframe.iloc[i]
-                    dataframe = dataframe.iloc[i+1:].reset_index(drop=True)
-                    return dataframe
-            return None
-        df_fixed = find_header_row(df)
-        if df_fixed is not None:
-            return df_fixed, None
-        else:
-            return None, "Gerekli kolonlar (Tarih, Ad Soyad) bulunamadi. Lutfen dosya basliklarini kontrol edin."
+                db.update_gorevi_bulk_if_empty(list(ad_gorev_map.items()))
+            except Exception:
+                pass
+
+
+class WatchWorker(QObject):
+    """NEW: izlenen klasördeki yeni/değişen dosyaları arka planda yükler (core.watch_ingest)."""
+    error = Signal(str)
+    ingested = Signal(int)
+    finished = Signal()
+
+    def __init__(self, folder, db_file):
+        super().__init__()
+        self.folder = folder
+        self.db_file = db_file
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    @Slot()
+    def run(self):
+        import logging
+        db = Database(self.db_file, use_cache=False)  # WHY: thread'e ait bağlantı havuzu; tek yazıcı bu thread.
+        try:
+            watch_ingest.run_watch(db, self.folder, should_stop=lambda: self._stop, on_result=self._on_result)
+        except Exception as e:
+            self.error.emit(f"<span style='color:#EF5350;'>Klasor izleme durdu: {str(e)}</span>")
+            logging.exception(e)
+        finally:
+            db.close_connections()
+            self.finished.emit()
+
+    def _on_result(self, res):
+        color = {'ok': '#66BB6A', 'error': '#EF5350'}.get(res['status'], '#FFA726')
+        self.error.emit(f"<span style='color:{color};'>[Izleme] {watch_ingest.describe_result(res)}</span>")
+        if res['saved']:
+            self.ingested.emit(res['saved'])
 
 
 # ─────────────────────────────────────────────
@@ -239,16 +294,17 @@ class UploadWorker(QObject):
 # ─────────────────────────────────────────────
 
 class PreviewDialog(QDialog):
-    """Yukleme oncesi ilk 5 satiri gosterir. Read-only."""
+    """Yukleme oncesi ilk 5 satiri gosterir. Read-only.
+       partial=True: df dosyanin yalnizca ilk satirlaridir (buyuk dosya)."""
 
-    def __init__(self, df, col_mapping, parent=None):
+    def __init__(self, df, col_mapping, parent=None, partial=False):
         super().__init__(parent)
         self.setWindowTitle("Veri On Izleme")
         self.setMinimumWidth(750)
         self.setMinimumHeight(350)
-        self._build_ui(df, col_mapping)
+        self._build_ui(df, col_mapping, partial)
 
-    def _build_ui(self, df, col_mapping):
+    def _build_ui(self, df, col_mapping, partial=False):
         layout = QVBoxLayout(self)
 
         lbl = QLabel("Asagidaki veriler yuklenecek. Lutfen kontrol edin:")
@@ -280,7 +336,10 @@ class PreviewDialog(QDialog):
 
         layout.addWidget(table)
 
-        total_lbl = QLabel(f"Toplam satir sayisi: {len(df)}")
+        if partial:
+            total_lbl = QLabel(f"Buyuk dosya: ilk {len(df)} satir okundu; tamami yuklemede parca parca okunur.")
+        else:
+            total_lbl = QLabel(f"Toplam satir sayisi: {len(df)}")
         total_lbl.setStyleSheet("color: #aaa; font-size: 11px; margin-top: 4px;")
         layout.addWidget(total_lbl)
 
@@ -487,14 +546,36 @@ class UploadPage(QWidget):
         self.btn_rollback.clicked.connect(self._do_rollback)
         layout.addWidget(self.btn_rollback)
 
+        # NEW: uygulama yükleme sırasında kapandıysa kontrol noktasından sürdür / geri al.
+        self.btn_resume = QPushButton("Yarım Kalan Yüklemeyi Sürdür")
+        self.btn_resume.setStyleSheet(
+            "background-color: #E65100; color: white; padding: 8px; font-weight: bold; border-radius: 4px;"
+        )
+        self.btn_resume.clicked.connect(self._do_resume)
+        layout.addWidget(self.btn_resume)
+        self._refresh_resume_button()
+
+        # NEW: klasör izleme; <Tersane>/<Firma>/dosya düzenindeki günlük dosyalar otomatik yüklenir.
+        self.watch_thread = None
+        self.watch_worker = None
+        self.btn_watch = QPushButton("Klasörü İzle")
+        self.btn_watch.setCheckable(True)
+        self.btn_watch.setStyleSheet(
+            "QPushButton { background-color: #37474F; color: white; padding: 8px; border-radius: 4px; }"
+            "QPushButton:checked { background-color: #00796B; font-weight: bold; }"
+        )
+        self.btn_watch.setToolTip("Klasör düzeni: <Tersane adı>/<Firma adı>/dosya.xlsx|csv")
+        self.btn_watch.toggled.connect(self._toggle_watch)
+        layout.addWidget(self.btn_watch)
+
         layout.addStretch()
 
     def update_month_info(self):
         try:
             with self.db.get_connection() as conn:
                 rows = conn.execute(
-                    "SELECT strftime('%Y-%m', tarih) as ym, COUNT(DISTINCT tarih), COUNT(DISTINCT ad_soyad) "
-                    "FROM gunluk_kayit GROUP BY ym ORDER BY ym DESC"
+                    "SELECT yil_ay, COUNT(DISTINCT tarih), COUNT(DISTINCT ad_soyad) "
+                    "FROM gunluk_kayit GROUP BY yil_ay ORDER BY yil_ay DESC"
                 ).fetchall()
             if rows:
                 lines = [f"  {r[0]}  ({r[1]} gün, {r[2]} personel)" for r in rows[:12]]
@@ -525,6 +606,111 @@ class UploadPage(QWidget):
         else:
             self.append_log("<span style='color:#FFA726;'>Hiçbir kayıt eklenmedi.</span>")
         self.progress.setValue(100)
+        self._refresh_resume_button()  # WHY: DB hatasıyla duran yükleme kontrol noktasını bırakır.
+
+    def _toggle_watch(self, checked):
+        if not checked:
+            if self.watch_worker is not None:
+                self.watch_worker.stop()  # WHY: sürmekte olan dosya bitince döngü durur.
+                self.btn_watch.setEnabled(False)
+            return
+        cfg = load_config()
+        folder = QFileDialog.getExistingDirectory(self, "İzlenecek Klasör", cfg.get("watch_folder", ""))
+        if not folder:
+            self.btn_watch.blockSignals(True)
+            self.btn_watch.setChecked(False)
+            self.btn_watch.blockSignals(False)
+            return
+        cfg["watch_folder"] = folder
+        save_config(cfg)
+        self.append_log(f"<span style='color:#90CAF9;'>Klasor izleniyor: {folder}</span>")
+        self.btn_watch.setText("Klasör İzleniyor (durdur)")
+        self.watch_thread = QThread()
+        self.watch_worker = WatchWorker(folder, self.db.db_file)
+        self.watch_worker.moveToThread(self.watch_thread)
+        self.watch_thread.started.connect(self.watch_worker.run)
+        self.watch_worker.error.connect(self.append_log)
+        self.watch_worker.ingested.connect(self._on_watch_ingested)
+        self.watch_worker.finished.connect(self._on_watch_finished)
+        self.watch_worker.finished.connect(self.watch_thread.quit)
+        self.watch_worker.finished.connect(self.watch_worker.deleteLater)
+        self.watch_thread.finished.connect(self.watch_thread.deleteLater)
+        self.watch_thread.start()
+
+    def _on_watch_ingested(self, saved):
+        self.update_month_info()
+        self.signal_manager.data_updated.emit()
+
+    def _on_watch_finished(self):
+        self.watch_worker = None
+        self.watch_thread = None
+        self.append_log("<span style='color:#FFA726;'>Klasor izleme durduruldu.</span>")
+        self.btn_watch.blockSignals(True)
+        self.btn_watch.setChecked(False)
+        self.btn_watch.blockSignals(False)
+        self.btn_watch.setText("Klasörü İzle")
+        self.btn_watch.setEnabled(True)
+
+    def _refresh_resume_button(self):
+        try:
+            self.btn_resume.setVisible(self.db.get_upload_checkpoint() is not None)
+        except Exception:
+            self.btn_resume.setVisible(False)
+
+    def _do_resume(self):
+        """Yarım kalan yüklemeyi son commit edilen parçadan sürdürür veya batch_id ile geri alır."""
+        checkpoint = self.db.get_upload_checkpoint()
+        if not checkpoint:
+            self._refresh_resume_button()
+            return
+        batch_id = checkpoint.get('batch_id')
+        settings = checkpoint.get('settings') or {}
+        files, resume_rows, problems = resume_plan(checkpoint)
+        lines = [f"Yarım kalan yükleme ({str(batch_id)[:8]}..., {checkpoint.get('started_at', '')[:16]})."]
+        lines += [f"- {os.path.basename(f)}: {resume_rows[f]} satır yazılmış, kalanı yüklenecek" for f in files]
+        lines += [f"- {p} (sürdürülemez)" for p in problems]
+        box = QMessageBox(self)
+        box.setWindowTitle("Yarım Kalan Yükleme")
+        box.setIcon(QMessageBox.Question)
+        box.setText("\n".join(lines))
+        btn_continue = box.addButton("Sürdür", QMessageBox.AcceptRole)
+        btn_undo = box.addButton("Geri Al", QMessageBox.DestructiveRole)
+        box.addButton("Vazgeç", QMessageBox.RejectRole)
+        if not files:
+            btn_continue.setEnabled(False)
+        box.setDefaultButton(btn_continue if files else btn_undo)
+        box.exec()
+        clicked = box.clickedButton()
+        firma_id = settings.get('firma_id')
+        tersane_id = settings.get('tersane_id')
+        if clicked == btn_undo:
+            ok, result, warning = self.db.rollback_upload_batch_full(batch_id, firma_id=firma_id)
+            if ok:
+                self.append_log(f"<span style='color:#66BB6A;'>Yarım kalan yükleme geri alındı: {result} kayıt.</span>")
+                if warning:
+                    self.append_log(f"<span style='color:#FFA726;'>⚠ {warning}</span>")
+                self.db.clear_upload_checkpoint(batch_id)
+                self.update_month_info()
+                self.signal_manager.data_updated.emit()
+            else:
+                QMessageBox.warning(self, "Rollback Hatasi", f"Geri alma başarısız: {result}")
+            self._refresh_resume_button()
+            return
+        if clicked != btn_continue:
+            return
+        settings_cache, all_personel = self._load_upload_context(tersane_id)
+        self._current_batch_id = batch_id
+        self._current_firma_id = firma_id
+        self.btn_rollback.setEnabled(False)
+        self.progress.setValue(0)
+        self.append_log(f"<span style='color:#90CAF9;'>Yükleme sürdürülüyor: {len(files)} dosya.</span>")
+        file_hashes = {f: (checkpoint['progress'].get(f) or {}).get('hash') for f in files}
+        self._start_worker(files, all_personel, settings_cache, set(settings.get('skip_keys') or []), firma_id,
+                           tersane_id, batch_id, sheet_name=settings.get('sheet_name'),
+                           firma_filter_name=settings.get('firma_filter_name'),
+                           firma_col_name=settings.get('firma_col_name'),
+                           delta_only=bool(settings.get('delta_only')), file_hashes=file_hashes,
+                           checkpoint=checkpoint)
 
     def start_upload(self):
         cfg = load_config()
@@ -547,13 +733,14 @@ class UploadPage(QWidget):
         if not event.mimeData().hasUrls():
             event.ignore()
             return
-        for url in event.mimeData().urls():
-            path = url.toLocalFile()
-            if path.lower().endswith(('.xlsx', '.xls', '.csv')):
-                self._process_file(path)
-                event.acceptProposedAction()
-                return
-        event.ignore()
+        # NEW: bırakılan tüm dosyalar tek yüklemede işlenir (birden fazlaysa paralel).
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        paths = [p for p in paths if p.lower().endswith(('.xlsx', '.xls', '.csv'))]
+        if not paths:
+            event.ignore()
+            return
+        event.acceptProposedAction()
+        self._process_file(paths[0], paths)
 
     def _process_file(self, path, files=None):
         files = files or [path]
@@ -573,11 +760,12 @@ class UploadPage(QWidget):
         import pandas as pd
         df = None
         selected_sheet = 0  # default: ilk sheet
+        xl = None
 
         if path.lower().endswith(('.xlsx', '.xls')):
             # Sheet listesini al; birden fazlaysa kullaniciya sec
             try:
-                xl = pd.ExcelFile(path)
+                xl = pd.ExcelFile(path)  # WHY: çalışma kitabı bir kez açılır; sayfalar aynı nesneden okunur.
                 sheet_names = xl.sheet_names
                 if len(sheet_names) > 1:
                     selected_sheet = self.select_sheet_dialog(sheet_names)
@@ -585,47 +773,37 @@ class UploadPage(QWidget):
                         return
                 else:
                     selected_sheet = [sheet_names[0]] if sheet_names else [0]
+                if not sheet_key(selected_sheet, sheet_names):
+                    selected_sheet = [0]  # WHY: ilk sayfa indeksle tutulur; kayıt defteri anahtarı klasör izlemeyle aynı ('').
             except Exception:
                 selected_sheet = [0]
-            try:
-                dfs = []
-                for s in selected_sheet:
-                    dfs.append(pd.read_excel(path, sheet_name=s))
-                df = pd.concat(dfs, ignore_index=True) if dfs else None
-            except Exception:
-                QMessageBox.warning(self, "Dosya Hatası", "Dosya okunamadı. Lütfen formatı kontrol edin.")
-                return
-        else:
-            try:
-                df = pd.read_csv(path)
-            except Exception:
-                try:
-                    df = pd.read_csv(path, sep=';')
-                except Exception:
-                    QMessageBox.warning(self, "Dosya Hatası", "Dosya okunamadı. Lütfen formatı kontrol edin.")
-                    return
+        large = is_large_upload(path)
+        try:
+            if large:
+                # NEW: büyük dosyada yalnızca ilk satırlar okunur; UploadWorker dosyayı akışla okur.
+                df = read_upload_preview(path, selected_sheet)
+            else:
+                # NEW: okunan ve başlığı tespit edilen DataFrame önbelleğe alınır; UploadWorker dosyayı tekrar okumaz.
+                df, _header_found = read_upload_file(path, selected_sheet, excel_file=xl)
+        except UploadReadError as e:
+            QMessageBox.warning(self, "Dosya Hatası", str(e))
+            return
+        except Exception:
+            QMessageBox.warning(self, "Dosya Hatası", "Dosya okunamadı. Lütfen formatı kontrol edin.")
+            return
+        finally:
+            if xl is not None:
+                xl.close()
 
         if df is None or df.empty:
             QMessageBox.warning(self, "Dosya Hatası", "Dosya boş veya okunamadı.")
             return
-
-        # Header row detection (same as worker)
-        cols_lower = [tr_lower(c) for c in df.columns]
-        if not (any('tarih' in c for c in cols_lower) and any(('ad' in c and 'soyad' in c) for c in cols_lower)):
-            for i, row in df.head(20).iterrows():
-                row_vals = [tr_lower(str(x)) for x in row.values]
-                if any('tarih' in x for x in row_vals) and any(('ad' in x and 'soyad' in x) for x in row_vals):
-                    df.columns = df.iloc[i]
-                    df = df.iloc[i+1:].reset_index(drop=True)
-                    break
+        if large:
+            self.append_log(f"<span style='color:#90CAF9;'>Buyuk dosya: on izleme ve firma tespiti ilk {len(df)} satirdan "
+                            "yapildi; dosya yuklemede parca parca okunacak.</span>")
 
         # 3) Excel'de FIRMA sutunu var mi?
-        firma_col = None
-        for c in df.columns:
-            cl = tr_lower(str(c))
-            if cl.strip() in ('firma', 'firma adi', 'firma adı', 'sirket', 'şirket'):
-                firma_col = c
-                break
+        firma_col = find_firma_column(df)
 
         # Otomatik bulunamadıysa kullanıcıya sor
         if firma_col is None:
@@ -669,14 +847,14 @@ class UploadPage(QWidget):
             firma_filter_name = all_firmalar.get(firma_id)
             if firma_filter_name:
                 before = len(df)
-                df = df[df[firma_col].astype(str).str.strip().apply(tr_lower) == tr_lower(firma_filter_name).strip()].reset_index(drop=True)
+                df = filter_firma(df, firma_col, firma_filter_name)
                 after = len(df)
-                if after == 0:
+                if after == 0 and not large:  # WHY: büyük dosyada yalnızca ilk satırlar elde; firma sonradan çıkabilir.
                     QMessageBox.warning(self, "Firma Filtresi",
                         f"'{firma_filter_name}' firmasına ait satır bulunamadı.\n"
                         "Excel'deki firma adını kontrol edin.")
                     return
-                if after < before:
+                if after < before and not large:
                     self.append_log(
                         f"<span style='color:#90CAF9;'>Firma filtresi: {after}/{before} satır yükleniyor ({firma_filter_name}).</span>"
                     )
@@ -686,6 +864,13 @@ class UploadPage(QWidget):
         if not tersane_id:
             return
 
+        # 3.6) NEW: ayni dosya ayni ayarlarla daha once yuklendi mi? (icerik ozeti + sayfa + firma + tersane)
+        firma_name = firma_filter_name or dict(self.db.get_firmalar()).get(firma_id)
+        registry = self._check_import_registry(files, selected_sheet, firma_name, tersane_id)
+        if registry is None:
+            return
+        files, delta_only, file_hashes = registry
+
         # 4) Ay kilidi kontrolu
         from datetime import datetime
         now = datetime.now()
@@ -726,19 +911,31 @@ class UploadPage(QWidget):
             return
 
         # 6) On izleme (Preview)
-        preview = PreviewDialog(df, zorunlu, self)
+        preview = PreviewDialog(df, zorunlu, self, partial=large)
         if preview.exec() != QDialog.Accepted:
             self.append_log("<span style='color:#FFA726;'>Yukleme iptal edildi.</span>")
             return
 
         # 7) Cakisma kontrolu
-        settings_cache = self.db.get_settings_cache(tersane_id=tersane_id)
-        with self.db.get_connection() as conn:
-            all_personel = {r[0]: {'yevmiyeci': r[1], 'ozel_durum': r[2]}
-                          for r in conn.execute("SELECT ad_soyad, yevmiyeci_mi, ozel_durum FROM personel").fetchall()}
+        settings_cache, all_personel = self._load_upload_context(tersane_id)
 
         skip_keys = set()
-        conflicts = self._detect_conflicts(df, zorunlu)
+        if path not in files:
+            key_frames = iter([])  # WHY: ön izlenen dosya kayıt defterinde atlandı; yüklenmeyecek.
+        elif large:
+            # NEW: anahtarlar dosyadan parça parça çıkarılır; sayfa belleğe alınmaz (önbelleğe de konmaz).
+            chunks = iter_upload_chunks(path, selected_sheet, cache=None)
+            key_frames = iter_key_frames(chunks, zorunlu, firma_col if firma_filter_name else None, firma_filter_name)
+        else:
+            key_frames = iter_key_frames([(df,)], zorunlu)  # WHY: df zaten firma filtresinden geçti.
+        # NEW: çoklu yüklemede diğer dosyalar da aynı kontrolden geçer; aksi halde satırları sormadan üzerine yazılır.
+        other_frames = self._iter_other_key_frames([f for f in files if f != path], selected_sheet,
+                                                   firma_col, firma_filter_name)
+        try:
+            conflicts, ad_list = self._detect_conflicts(itertools.chain(key_frames, other_frames), tersane_id)
+        except UploadReadError as e:
+            QMessageBox.warning(self, "Dosya Hatası", str(e))
+            return
         if conflicts:
             cdlg = ConflictDialog(conflicts, self)
             if cdlg.exec() != QDialog.Accepted:
@@ -759,10 +956,6 @@ class UploadPage(QWidget):
         ad_col = zorunlu.get('ad')
         if ad_col and ad_col in df.columns:
             try:
-                ad_list = list(set(
-                    str(v).strip() for v in df[ad_col].dropna()
-                    if str(v).strip() and str(v).strip().lower() != 'nan'
-                ))
                 self.db.snapshot_personel_for_batch(batch_id, ad_list)
             except Exception as _snap_err:
                 import logging
@@ -776,9 +969,32 @@ class UploadPage(QWidget):
                 )
                 return
 
+        # 7.6) Kontrol noktası: yükleme yarıda kalırsa son commit edilen parçadan sürdürülebilir.
+        checkpoint = new_checkpoint(batch_id, files, file_hashes, sheet_name=selected_sheet, firma_id=firma_id,
+                                    tersane_id=tersane_id, firma_filter_name=firma_filter_name,
+                                    firma_col_name=firma_col, skip_keys=sorted(skip_keys), delta_only=delta_only)
+        try:
+            self.db.save_upload_checkpoint(checkpoint)
+        except Exception:
+            checkpoint = None  # SAFEGUARD: kontrol noktası yazılamazsa yükleme yine de yapılır (sürdürülemez).
+
         # 8) Worker baslat (Thread yapisi AYNEN korunuyor)
+        self._start_worker(files, all_personel, settings_cache, skip_keys, firma_id, tersane_id, batch_id,
+                           sheet_name=selected_sheet, firma_filter_name=firma_filter_name, firma_col_name=firma_col,
+                           delta_only=delta_only, file_hashes=file_hashes, checkpoint=checkpoint)
+
+    def _load_upload_context(self, tersane_id):
+        """Hesaplama için kural önbelleği ve personel sözlüğü."""
+        settings_cache = self.db.get_settings_cache(tersane_id=tersane_id)
+        with self.db.get_connection() as conn:
+            all_personel = {r[0]: {'yevmiyeci': r[1], 'ozel_durum': r[2]}
+                          for r in conn.execute("SELECT ad_soyad, yevmiyeci_mi, ozel_durum FROM personel").fetchall()}
+        return settings_cache, all_personel
+
+    def _start_worker(self, files, all_personel, settings_cache, skip_keys, firma_id, tersane_id, batch_id, **kwargs):
+        self.btn_resume.setVisible(False)
         self.thread = QThread()
-        self.worker = UploadWorker(files, self.db.db_file, all_personel, settings_cache, skip_keys, firma_id, tersane_id, batch_id, sheet_name=selected_sheet, firma_filter_name=firma_filter_name, firma_col_name=firma_col)
+        self.worker = UploadWorker(files, self.db.db_file, all_personel, settings_cache, skip_keys, firma_id, tersane_id, batch_id, **kwargs)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
         self.worker.progress.connect(self.progress.setValue)
@@ -789,65 +1005,82 @@ class UploadPage(QWidget):
         self.thread.finished.connect(self.thread.deleteLater)
         self.thread.start()
 
-    def _detect_conflicts(self, df, col_mapping):
-        """Excel'deki satirlari DB ile karsilastir. Cakisan (tarih, ad) ciflerini dondur."""
-        tarih_col = col_mapping.get('tarih')
-        ad_col = col_mapping.get('ad')
-        if not tarih_col or not ad_col:
-            return []
+    def _check_import_registry(self, files, sheet_name, firma_name, tersane_id):
+        """
+        Dosyalarin icerik ozetini kayit defteriyle karsilastirir.
+        Daha once yuklenmis dosya varsa kullaniciya sorar: atla / sadece degisenler / tamamini yukle.
+        Donus: (dosyalar, delta_only, {dosya: ozet}) veya iptalde None.
+        """
+        file_hashes = {}
+        seen = []
+        for f in files:
+            try:
+                file_hashes[f] = file_fingerprint(f)
+            except OSError:
+                continue  # SAFE: okunamayan dosya worker'da hata olarak raporlanir.
+            prev = self.db.find_upload_import(file_hashes[f], sheet_key(sheet_name), firma_key(firma_name), tersane_id)
+            if prev:
+                seen.append((f, prev))
+        if not seen:
+            return files, False, file_hashes
+
+        lines = "\n".join(
+            f"- {os.path.basename(f)} ({(prev['imported_at'] or '')[:16].replace('T', ' ')}, {prev['row_count'] or 0} satir)"
+            for f, prev in seen[:10]
+        )
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Information)
+        box.setWindowTitle("Dosya Daha Once Yuklendi")
+        box.setText(f"{len(seen)} dosya ayni firma/tersane/sayfa secimiyle daha once yuklenmis:\n{lines}")
+        btn_skip = box.addButton("Atla (degisiklik yok)", QMessageBox.AcceptRole)
+        btn_delta = box.addButton("Sadece degisen satirlari yukle", QMessageBox.AcceptRole)
+        btn_full = box.addButton("Tamamini yeniden yukle", QMessageBox.DestructiveRole)
+        box.addButton("Iptal", QMessageBox.RejectRole)
+        box.setDefaultButton(btn_skip)
+        box.exec()
+        clicked = box.clickedButton()
+        if clicked == btn_skip:
+            seen_files = {f for f, _prev in seen}
+            remaining = [f for f in files if f not in seen_files]
+            self.append_log(f"<span style='color:#90CAF9;'>{len(seen_files)} dosya degismedigi icin atlandi.</span>")
+            if not remaining:
+                self.progress.setValue(100)
+                return None
+            return remaining, False, file_hashes
+        if clicked == btn_delta:
+            self.append_log("<span style='color:#90CAF9;'>Yalnizca yeni/degisen satirlar yuklenecek.</span>")
+            return files, True, file_hashes
+        if clicked == btn_full:
+            return files, False, file_hashes
+        self.append_log("<span style='color:#FFA726;'>Yukleme iptal edildi.</span>")
+        return None
+
+    def _iter_other_key_frames(self, files, sheet_name, firma_col, firma_name):
+        """Ön izlenmeyen dosyaların anahtar parçaları; okunamayan dosya loglanır (worker da hata verir)."""
+        for f in files:
+            try:
+                yield from iter_file_key_frames(f, sheet_name, firma_col, firma_name)
+            except UploadReadError as e:
+                self.append_log(f"<span style='color:#EF5350;'>HATA ({os.path.basename(f)}): {str(e)}</span>")
 
-        # Excel'den tarih+ad ciftlerini topla
-        excel_keys = []
-        for _, row in df.iterrows():
+    def _detect_conflicts(self, key_frames, tersane_id=None):
+        """
+        Dosyadaki (tarih, ad) anahtarlarini DB ile karsilastirir (iter_key_frames parcalari).
+        Donus: (secilen tersanede cakisan (tarih, ad) ciftleri, dosyadaki personel adlari).
+        """
+        conflicts = {}
+        names = set()
+        for keys in key_frames:
+            if keys.empty:
+                continue
+            names.update(keys['ad_soyad'].tolist())
             try:
-                t_val = row[tarih_col]
-                if pd.isna(t_val) or str(t_val).strip() == '':
-                    continue
-                if isinstance(t_val, datetime):
-                    tarih_str = t_val.strftime("%Y-%m-%d")
-                else:
-                    t_str = str(t_val).split()[0].replace('/', '-').replace('.', '-')
-                    parts = t_str.split('-')
-                    if len(parts) == 3 and len(parts[2]) == 4:
-                        tarih_str = f"{parts[2]}-{parts[1]}-{parts[0]}"
-                    else:
-                        tarih_str = t_str
-                ad = str(row[ad_col]).strip()
-                if ad and ad.lower() != 'nan':
-                    excel_keys.append((tarih_str, ad))
+                # NEW: anahtarlar geçici tabloya yüklenip unique index ile eşleştirilir (SQL tarafında kesişim).
+                found = self.db.find_conflicting_keys(list(keys.itertuples(index=False, name=None)), tersane_id)
             except Exception:
                 continue
-
-        if not excel_keys:
-            return []
-
-        # DB'den mevcut kayitlari cek (sadece ilgili tarih araliginda)
-        tarihs = list(set(k[0] for k in excel_keys))
-        if not tarihs:
-            return []
-
-        min_t = min(tarihs)
-        max_t = max(tarihs)
-        try:
-            with self.db.get_connection() as conn:
-                rows = conn.execute(
-                    "SELECT tarih, ad_soyad FROM gunluk_kayit WHERE tarih BETWEEN ? AND ?",
-                    (min_t, max_t)
-                ).fetchall()
-            existing = set((r[0], r[1]) for r in rows)
-        except Exception:
-            return []
-
-        # Kesisimi bul
-        conflicts = [(t, a) for t, a in excel_keys if (t, a) in existing]
-        # Tekrarlari kaldir
-        seen = set()
-        unique_conflicts = []
-        for c in conflicts:
-            if c not in seen:
-                seen.add(c)
-                unique_conflicts.append(c)
-        return unique_conflicts
+            conflicts.update(dict.fromkeys(found))  # WHY: parçalar arası tekrarlar bir kez; ilk görülen sıra korunur.
+        return list(conflicts), sorted(names)
 
     def select_sheet_dialog(self, sheet_names):
         """Excel'deki sheet listesini gösterir, kullanıcı bir veya birden fazla seçer."""
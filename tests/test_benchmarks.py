@@ -0,0 +1,28 @@
+import unittest
+
+from benchmarks.run import compare, run_benchmarks
+
+
+def _result(size, **best):
+    return {'meta': {'size': size},
+            'results': {name: {'status': 'ok', 'best_s': s} for name, s in best.items()}}
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_compare_flags_only_slowdowns_over_threshold(self):
+        baseline = _result('small', a=1.0, b=1.0, c=1.0)
+        current = _result('small', a=1.1, b=1.5, c=0.5)
+        current['results']['d'] = {'status': 'skipped'}
+        self.assertEqual(compare(current, baseline, threshold=0.2), [('b', 1.0, 1.5, 1.5)])
+        self.assertEqual(compare(current, _result('large', b=0.1)), [])
+
+    def test_small_run_produces_results(self):
+        out = run_benchmarks('small', repeat=1, only=['hesapla_hakedis_batch', 'get_dashboard_data'], log=lambda _m: None)
+        self.assertEqual(set(out['results']), {'hesapla_hakedis_batch', 'get_dashboard_data'})
+        for res in out['results'].values():
+            self.assertEqual(res['status'], 'ok')
+            self.assertGreater(res['rows'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from core.database import Database
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self._db_path = Path(db_path)
+        self.db = Database(str(self._db_path))
+
+    def tearDown(self):
+        self.db.close_connections()
+        try:
+            self._db_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    def test_connection_reused_after_with_block(self):
+        with self.db.get_connection() as conn1:
+            pass
+        before = self.db.get_connection_stats()
+        with self.db.get_connection() as conn2:
+            pass
+        after = self.db.get_connection_stats()
+        self.assertIs(conn1, conn2)
+        self.assertEqual(after["opened"], before["opened"])
+        self.assertEqual(after["reused"], before["reused"] + 1)
+
+    def test_pragmas_applied(self):
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+
+    def test_nested_calls_get_separate_connections(self):
+        with self.db.get_connection() as outer:
+            with self.db.get_connection() as inner:
+                self.assertIsNot(outer, inner)
+
+    def test_uncommitted_work_rolled_back_on_release(self):
+        conn = self.db.get_connection()
+        conn.execute("INSERT INTO personel (ad_soyad, maas) VALUES ('Test Kisi', 1000)")
+        conn.close()
+        with self.db.get_connection() as conn:
+            row = conn.execute("SELECT COUNT(1) FROM personel WHERE ad_soyad='Test Kisi'").fetchone()
+        self.assertEqual(row[0], 0)
+
+    def test_worker_thread_gets_own_connection(self):
+        with self.db.get_connection() as main_conn:
+            pass
+        seen = []
+
+        def worker():
+            with self.db.get_connection() as conn:
+                seen.append(conn)
+            self.db.close_connections()
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        self.assertEqual(len(seen), 1)
+        self.assertIsNot(seen[0], main_conn)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,23 @@
+import itertools
 import unittest
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+
 from core.hesaplama import (
+    DAY_RESULT_CACHE,
+    add_day_stats,
+    clear_day_cache,
+    get_day_cache_stats,
     hesapla_hakedis,
+    hesapla_hakedis_batch,
+    hesapla_mesai_tutar,
+    KatsayiIndex,
     hesapla_maktu_hakedis,
+    parse_time_column_to_minutes,
     parse_time_to_minutes,
+    _parse_time_to_minutes_strptime,
 )
 
 
@@ -22,6 +35,22 @@ class HesaplamaTests(unittest.TestCase):
         self.assertIsNone(parse_time_to_minutes(""))
         self.assertIsNone(parse_time_to_minutes("not-a-time"))
 
+    def test_parse_time_hizli_yol_strptime_ile_ayni(self):
+        ornekler = [
+            "08:30.000", "nan", "NaN", " ", "8:5", "7:05:9", "24:00", "23:59", "08:30:59", "08:30:60",
+            "1:2:3", "08:30:", "08:3000", " 08:30", "08:30 ", "00:00:00", "08:30.5:00", "٠٨:٣٠", None, float("nan"),
+        ] + [f"{h:02d}:{m:02d}" for h in range(25) for m in range(0, 61, 7)]
+        for t in ornekler:
+            self.assertEqual(parse_time_to_minutes(t), _parse_time_to_minutes_strptime(t), repr(t))
+            self.assertEqual(parse_time_to_minutes(t), _parse_time_to_minutes_strptime(t), repr(t))  # önbellekten
+
+    def test_parse_time_column(self):
+        kolon = pd.Series(["08:30", None, "nan", "17:45:10", "08:30.000", "25:00", float("nan")], index=list("abcdefg"))
+        sonuc = parse_time_column_to_minutes(kolon)
+        self.assertEqual(str(sonuc.dtype), "Int64")
+        self.assertEqual(list(sonuc.index), list("abcdefg"))
+        self.assertEqual(sonuc.tolist(), [510, pd.NA, pd.NA, 1065, 510, pd.NA, pd.NA])
+
     def test_maktu_hakedis_30_gun_kurali(self):
         # 20 gün * 7.5 saat = 150 saat çalışıldı
         result = hesapla_maktu_hakedis(2025, 2, 150.0, 30000)
@@ -88,6 +117,113 @@ class HesaplamaTests(unittest.TestCase):
         self.assertEqual(mesai, 0.0)
         self.assertEqual(aciklama, "Fiili Calisma")
 
+    def test_hakedis_batch_satir_bazli_ile_ayni(self):
+        holiday_set = {"01-01", "2025-04-23"}
+        holiday_info = {"01-01": ("Yılbaşı", 7.5, 0.0), "2025-04-23": ("Milli İrade", 7.5, 3.0)}
+        personnel = {
+            "Ali": {"yevmiyeci": 0, "ozel_durum": None},
+            "Veli": {"yevmiyeci": 1, "ozel_durum": "Cumartesi Gelmez"},
+        }
+        settings_cache = {
+            "mesai_katsayilari": [(1, 17.5, 19.0, 1.5, ""), (2, 19.0, 24.0, 3.0, "")],
+            "yevmiye_katsayilari": [(1, 17.5, 20.0, 0.5, "")],
+            "tersane_saatleri": {"cuma_kayip_tolerans_dk": 45},
+        }
+        tarihler = ["2025-01-01", "2025-04-23", "2025-06-06", "2025-06-07", "2025-06-08", "2025-06-09", "hatali"]
+        saatler = [None, "", "08:00", "09:20", "16:45", "18:10", "19:40", "xx"]
+        rows = [
+            {"tarih": t, "giris": g, "cikis": c, "kayip": k, "ad_soyad": ad}
+            for t, g, c, k, ad in itertools.product(tarihler, saatler, saatler, [None, "01:15"], personnel)
+        ]
+        info_func = lambda t: holiday_info.get(t) or holiday_info.get(t[5:])
+
+        result = hesapla_hakedis_batch(pd.DataFrame(rows), settings_cache, holiday_set, personnel, info_func)
+
+        for i, r in enumerate(rows):
+            p = personnel[r["ad_soyad"]]
+            expected = hesapla_hakedis(
+                r["tarih"], r["giris"], r["cikis"], r["kayip"], holiday_set, info_func,
+                lambda _ad: p["ozel_durum"], r["ad_soyad"], p["yevmiyeci"], settings_cache=settings_cache,
+            )
+            got = (result["normal"].iat[i], result["mesai"].iat[i], result["aciklama"].iat[i])
+            self.assertEqual(got, expected, r)
+
+    def test_katsayi_index_aramasi_dogrusal_tarama_ile_ayni(self):
+        # 15 dakikalık bantlar: 17:30-24:00
+        rows = [(i, 17.5 + i * 0.25, 17.75 + i * 0.25, 0.5 + i * 0.1, "") for i in range(26)]
+        index = KatsayiIndex(list(reversed(rows)))
+        self.assertFalse(index.linear)
+        self.assertEqual(index.overlaps, [])
+        for cikis_dk in range(16 * 60, 24 * 60 + 30, 5):
+            self.assertEqual(
+                hesapla_mesai_tutar(cikis_dk, False, 17 * 60, settings_cache={"mesai_katsayi_index": index}),
+                hesapla_mesai_tutar(cikis_dk, False, 17 * 60, settings_cache={"mesai_katsayilari": rows}),
+            )
+
+    def test_katsayi_index_cakisma_tespiti(self):
+        rows = [(1, 17.5, 19.0, 1.0, ""), (2, 18.5, 20.0, 2.0, "")]
+        index = KatsayiIndex(rows)
+        self.assertTrue(index.linear)
+        self.assertEqual(index.overlaps, [(17.5, 19.0, 18.5, 20.0)])
+        self.assertEqual(index.lookup(18.75), 1.0)  # listedeki ilk eşleşme korunur
+        self.assertIsNone(index.lookup(21.0))
+
+    def test_gun_sonucu_onbellegi(self):
+        clear_day_cache()
+        base = {
+            "mesai_katsayilari": [(1, 17.5, 19.0, 1.5, ""), (2, 19.0, 24.0, 3.0, "")],
+            "tersane_saatleri": {"cuma_kayip_tolerans_dk": 45},
+        }
+        cached = dict(base, kural_parmak_izi="a")
+        tarihler = ["2025-06-05", "2025-06-06", "2025-06-07", "2025-06-09"]  # Prş, Cuma, Cmt, Pzt
+        saatler = ["08:00", "08:00:00", "09:20", "16:45", "18:10", "19:40"]
+        for t, g, c, k, y in itertools.product(tarihler, saatler, saatler, ["", "01:15"], [False, True]):
+            args = (t, g, c, k, set())
+            self.assertEqual(
+                hesapla_hakedis(*args, yevmiyeci_mi=y, settings_cache=cached),
+                hesapla_hakedis(*args, yevmiyeci_mi=y, settings_cache=base),
+            )
+        stats = get_day_cache_stats()
+        self.assertGreater(stats["hits"], stats["misses"])
+        self.assertLessEqual(stats["size"], stats["maxsize"])
+
+        # Farklı kural özeti ayrı anahtar kullanır.
+        other = dict(base, kural_parmak_izi="b", tersane_saatleri={"cuma_kayip_tolerans_dk": 90})
+        self.assertEqual(hesapla_hakedis("2025-06-06", "08:00", "17:10", "01:15", set(), settings_cache=other)[0], 7.5)
+        self.assertEqual(hesapla_hakedis("2025-06-06", "08:00", "17:10", "01:15", set(), settings_cache=cached)[0], 7.0)
+        clear_day_cache()
+
+    def test_batch_gun_istatistigi_onbellek_ile_ayni(self):
+        clear_day_cache()
+        cached = {"tersane_saatleri": {"cuma_kayip_tolerans_dk": 45}, "kural_parmak_izi": "a"}
+        tarihler = ["2025-06-05", "2025-06-06", "2025-06-08", "2025-06-09"]  # Prş, Cuma, Pazar, Pzt
+        saatler = ["", "08:00", "08:00:00", "09:20", "18:10"]
+        rows = [{"tarih": t, "giris": g, "cikis": c, "kayip": k, "yevmiyeci": y}
+                for t, g, c, k, y in itertools.product(tarihler, saatler, saatler, ["", "01:15"], [False, True])]
+        for r in rows:
+            hesapla_hakedis(r["tarih"], r["giris"], r["cikis"], r["kayip"], set(), yevmiyeci_mi=r["yevmiyeci"],
+                            settings_cache=cached)
+        stats = {}
+        hesapla_hakedis_batch(pd.DataFrame(rows), cached, set(), stats=stats)
+        expected = get_day_cache_stats()
+        self.assertGreater(expected["hits"], 0)
+        self.assertEqual(stats, {"hits": expected["hits"], "misses": expected["misses"]})
+        self.assertEqual(add_day_stats({}, np.zeros(1, dtype=bool), *[np.zeros(1, dtype=np.int64)] * 5),
+                         {"hits": 0, "misses": 0})
+        clear_day_cache()
+
+    def test_gun_sonucu_onbellegi_sinirli(self):
+        old_max = DAY_RESULT_CACHE.maxsize
+        DAY_RESULT_CACHE.maxsize = 3
+        try:
+            clear_day_cache()
+            for dk in range(10):
+                hesapla_hakedis("2025-06-09", "08:00", f"17:{dk:02d}", "", set(), settings_cache={"kural_parmak_izi": "x"})
+            self.assertEqual(get_day_cache_stats()["size"], 3)
+        finally:
+            DAY_RESULT_CACHE.maxsize = old_max
+            clear_day_cache()
+
 
 if __name__ == "__main__":
     unittest.main()
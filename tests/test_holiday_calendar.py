@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.database import Database
+from core.holiday_calendar import HolidayCalendar
+
+
+class HolidayCalendarTests(unittest.TestCase):
+    def test_exact_date_before_recurring_key(self):
+        cal = HolidayCalendar([
+            ("05-01", "Emek Günü", 7.5, 0),
+            ("2025-05-01", "Özel", 6.0, 3.0),
+            ("2025-06-06", "Kurban Bayramı", 7.5, 7.5),
+        ])
+        self.assertEqual(cal.holiday_info("2025-05-01"), ("Özel", 6.0, 3.0))
+        self.assertEqual(cal.holiday_info("2026-05-01"), ("Emek Günü", 7.5, 0))
+        self.assertEqual(cal.holiday_info("2025-06-06"), ("Kurban Bayramı", 7.5, 7.5))
+        self.assertIsNone(cal.holiday_info("2026-06-06"))
+        self.assertIsNone(cal.holiday_info("hatali"))
+        self.assertIsNone(cal.holiday_info(None))
+        self.assertIn("05-01", cal.keys)
+
+
+class DatabaseHolidayCalendarTests(unittest.TestCase):
+    def setUp(self):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self._db_path = Path(db_path)
+        self.db = Database(str(self._db_path))
+
+    def tearDown(self):
+        self.db.close_connections()
+        try:
+            self._db_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    def test_add_and_delete_invalidate_calendar(self):
+        other = Database(str(self._db_path))
+        self.assertIsNone(other.get_holiday_info("2025-03-30"))
+
+        self.db.add_holiday("2025-03-30", "Ramazan Bayramı", 7.5, 7.5, "")
+        self.assertEqual(tuple(self.db.get_holiday_info("2025-03-30")), ("Ramazan Bayramı", 7.5, 7.5))
+        self.assertEqual(tuple(other.get_holiday_info("2025-03-30")), ("Ramazan Bayramı", 7.5, 7.5))
+        self.assertIn("2025-03-30", other.get_holidays())
+
+        self.db.delete_holiday("2025-03-30")
+        self.assertIsNone(other.get_holiday_info("2025-03-30"))
+        self.assertNotIn("2025-03-30", self.db.get_holidays())
+        other.close_connections()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import itertools
+import unittest
+
+from core import parallel_recalc
+from core.holiday_calendar import HolidayCalendar
+from core.recalc_scope import rules_fingerprint
+from tests.test_recalc_scope import _rules
+
+
+class ParallelRecalcTests(unittest.TestCase):
+    def setUp(self):
+        tarihler = ["2025-05-01", "2025-05-30", "2025-06-01", "2025-06-06", "2025-06-08"]
+        saatler = ["08:00", "09:10", "17:40", "19:20", None]
+        self.records = [
+            (i, t, ad, g, c, k, None, tid)
+            for i, (t, ad, g, c, k, tid) in enumerate(itertools.product(
+                tarihler, ["Ali Veli ", "Ayşe Kaya"], saatler, saatler, [None, "01:00"], [1, 2]), start=1)
+        ]
+        self.rules = _rules()
+        self.rules_fp = rules_fingerprint(self.rules)
+        self.calendar = HolidayCalendar([("05-01", "Emek Günü", 7.5, 0)])
+        self.personnel = {"Ali Veli": {"yevmiyeci": 0, "ozel_durum": None},
+                          "Ayşe Kaya": {"yevmiyeci": 1, "ozel_durum": None}}
+
+    def test_partitions_cover_all_rows_by_tersane_and_month(self):
+        parts = parallel_recalc.partition_records(self.records, max_rows=30)
+        self.assertEqual(sorted(r[0] for _k, rows in parts for r in rows), [r[0] for r in self.records])
+        for (tid, yil_ay), rows in parts:
+            self.assertLessEqual(len(rows), 30)
+            self.assertTrue(all(r[7] == tid and r[1].startswith(yil_ay) for r in rows))
+
+    def test_pool_matches_single_process(self):
+        expected = parallel_recalc.compute_partition(self.records, self.rules, self.rules_fp,
+                                                     self.calendar, self.personnel)
+        parts = parallel_recalc.partition_records(self.records, max_rows=50)
+        got, processed = [], 0
+        for n_rows, updates, _stats in parallel_recalc.iter_results(parts, self.rules, self.rules_fp, self.calendar,
+                                                            self.personnel, max_workers=2):
+            processed += n_rows
+            got.extend(updates)
+        self.assertEqual(processed, len(self.records))
+        self.assertEqual(sorted(got, key=lambda u: u[-1]), sorted(expected, key=lambda u: u[-1]))
+
+    def test_matching_fingerprints_skipped(self):
+        first = parallel_recalc.compute_partition(self.records, self.rules, self.rules_fp,
+                                                  self.calendar, self.personnel)
+        fps = {u[-1]: u[3] for u in first}
+        stamped = [r[:6] + (fps[r[0]],) + r[7:] for r in self.records]
+        self.assertEqual(parallel_recalc.compute_partition(stamped, self.rules, self.rules_fp,
+                                                           self.calendar, self.personnel), [])
+
+    def test_stop_cancels_pending_partitions(self):
+        parts = parallel_recalc.partition_records(self.records, max_rows=5)
+        seen = list(parallel_recalc.iter_results(parts, self.rules, self.rules_fp, self.calendar,
+                                                 self.personnel, max_workers=1, should_stop=lambda: True))
+        self.assertLess(len(seen), len(parts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core import parallel_upload
+from core.database import Database
+from core.holiday_calendar import HolidayCalendar
+from core.upload_ingest import PARSED_FILES, ParsedFileCache, detect_columns, prepare_upload_frame, read_upload_file
+from tests.test_recalc_scope import _rules
+
+
+def _csv(path, firma_rows):
+    lines = ["Tarih,Ad Soyad,Giriş,Çıkış,Kayıp,Firma,Görevi"]
+    for d in range(1, 29):
+        for ad, firma in firma_rows:
+            lines.append(f"{d:02d}.06.2025,{ad},08:{d % 50:02d},1{7 + d % 3}:{d % 60:02d},,{firma},Kaynakçı")
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class ParallelUploadTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for i, firma in enumerate(["Alfa", "Beta", "Alfa"]):
+            path = os.path.join(self._tmp.name, f"tersane_{i}.csv")
+            _csv(path, [(f"Personel {i}-A", firma), (f"Personel {i}-B", "Gama")])
+            self.files.append(path)
+        self.rules = _rules()
+        self.calendar = HolidayCalendar([("05-01", "Emek Günü", 7.5, 0)])
+        self.personnel = {"Personel 0-A": {"yevmiyeci": 1, "ozel_durum": None}}
+        self.options = {'firma_filter_name': "alfa", 'chunk_rows': 10}
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _compute(self, fname, options=None):
+        return parallel_upload.compute_file(fname, options or self.options, self.rules, self.calendar, self.personnel)
+
+    def test_compute_file_matches_full_read(self):
+        df, _found = read_upload_file(self.files[0], cache=None)
+        df = df[df['Firma'] == "Alfa"]
+        frame, _skipped, _gorev = prepare_upload_frame(df, detect_columns(df))
+        expected = parallel_upload.compute_upload_rows(frame, self.rules, self.calendar, self.personnel)
+        result = self._compute(self.files[0])
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['rows'], expected)
+        self.assertEqual(result['gorev'], {"Personel 0-A": "Kaynakçı"})
+        self.assertEqual(self._compute(self.files[1])['rows'], [])  # firma filtresi: Beta dosyası
+
+    def test_skip_keys_and_errors_are_per_file(self):
+        result = self._compute(self.files[2], dict(self.options, skip_keys={"2025-06-01|Personel 2-A"}))
+        self.assertEqual((result['skipped'], len(result['rows'])), (1, 27))
+        bad = os.path.join(self._tmp.name, "bozuk.csv")
+        Path(bad).write_text("a,b\n1,2\n", encoding="utf-8")
+        self.assertEqual(self._compute(bad)['error'][0], "HATA")
+
+    def test_pool_matches_single_process(self):
+        expected = {f: self._compute(f)['rows'] for f in self.files}
+        got = {r['file']: r['rows'] for r in parallel_upload.iter_file_results(
+            self.files, self.options, self.rules, self.calendar, self.personnel, max_workers=2)}
+        self.assertEqual(got, expected)
+
+    def test_cached_file_computed_locally(self):
+        expected = {f: self._compute(f)['rows'] for f in self.files}
+        read_upload_file(self.files[0])  # ön izleme: PARSED_FILES'a girer
+        self.addCleanup(PARSED_FILES.clear)
+        got = {r['file']: r['rows'] for r in parallel_upload.iter_file_results(
+            self.files, self.options, self.rules, self.calendar, self.personnel, max_workers=2,
+            local_files=[self.files[0]])}
+        self.assertEqual(got, expected)
+        # Önbellekteki kopya bu süreçte tüketildi (işçi süreç kendi kopyasını okusaydı burada kalırdı).
+        self.assertIsNone(PARSED_FILES.get(ParsedFileCache.key(self.files[0])))
+
+    def test_write_rows_tags_batch_and_tersane(self):
+        db = Database(os.path.join(self._tmp.name, "puantaj.db"))
+        self.addCleanup(db.close_connections)
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO personel (ad_soyad, maas, ekip_adi, yevmiyeci_mi) VALUES ('Personel 0-A', 1, 'A', 1)")
+            conn.commit()
+        rows = self._compute(self.files[0])['rows']
+        self.assertEqual(db.merge_upload_rows(rows, None, 3, "batch-1"), len(rows))
+        with db.get_connection() as conn:
+            stored = conn.execute(
+                "SELECT COUNT(*), MIN(import_batch_id), MIN(tersane_id) FROM gunluk_kayit").fetchone()
+            tersane = conn.execute("SELECT tersane_id FROM personel WHERE ad_soyad='Personel 0-A'").fetchone()[0]
+        self.assertEqual(stored, (len(rows), "batch-1", 3))
+        self.assertEqual(tersane, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
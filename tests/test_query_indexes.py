@@ -0,0 +1,334 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from core.database import Database, ad_key
+from core.hesaplama import _parse_kayip_dk, hesapla_hakedis_batch, parse_time_to_minutes
+from migrations.migrations import (
+    AD_KEY_INDEXES, MONTH_INDEXES, QUERY_INDEXES, migration_012_query_indexes,
+    migration_013_month_columns, migration_014_ad_key_columns, migration_015_personel_id,
+    migration_016_minute_columns, minute_sql,
+)
+from tools.query_plan_audit import audit, collect_statements
+
+
+class QueryIndexMigrationTests(unittest.TestCase):
+    def test_fresh_database_has_query_indexes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+                    migration_012_query_indexes(conn)  # tekrar çalıştırmak güvenli
+                    scans, _skipped = audit(conn, [
+                        ("payslip", 1, "SELECT tarih FROM gunluk_kayit WHERE ad_soyad=? AND yil_ay=? "
+                                       "AND tersane_id=? ORDER BY tarih"),
+                        ("rollback", 2, "DELETE FROM gunluk_kayit WHERE import_batch_id=?"),
+                        ("dashboard", 3, "SELECT ad_soyad FROM personel WHERE firma_id=? AND tersane_id=?"),
+                        ("hepsi", 4, "SELECT COUNT(*) FROM gunluk_kayit WHERE hesaplanan_mesai > 0"),
+                    ])
+            finally:
+                db.close_connections()
+        self.assertTrue({name for name, _table, _cols in QUERY_INDEXES} <= names)
+        self.assertNotIn('idx_gunluk_tarih', names)  # benzersiz index tarih ile başlıyor
+        self.assertEqual([(s[0], s[3]) for s in scans], [("hepsi", ["gunluk_kayit"])])
+
+    def test_missing_tables_and_columns_are_skipped(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE gunluk_kayit (id INTEGER PRIMARY KEY, tarih TEXT, ad_soyad TEXT)")
+        migration_012_query_indexes(conn)
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        self.assertEqual(names, {'idx_gunluk_tarih'})
+
+
+class MonthColumnTests(unittest.TestCase):
+    def test_yil_ay_follows_date_and_is_indexed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.executemany(
+                        "INSERT INTO gunluk_kayit (tarih, ad_soyad, hesaplanan_normal, tersane_id) VALUES (?, ?, 7.5, 1)",
+                        [("2025-05-31", "Ali Veli"), ("2025-06-02", "Ali Veli"), ("2025-06-03", "Ayşe Kaya")],
+                    )
+                    conn.execute("UPDATE gunluk_kayit SET tarih='2025-07-01' WHERE tarih='2025-06-03'")
+                    conn.commit()
+                    migration_013_month_columns(conn)  # tekrar çalıştırmak güvenli
+                    months = conn.execute("SELECT tarih, yil_ay FROM gunluk_kayit ORDER BY tarih").fetchall()
+                    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+                    plan = " ".join(r[-1] for r in conn.execute(
+                        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM gunluk_kayit WHERE tersane_id=? AND yil_ay=?", (1, "2025-06")))
+                june = db.get_records_by_month(2025, 6, tersane_id=1)
+            finally:
+                db.close_connections()
+        self.assertEqual(months, [("2025-05-31", "2025-05"), ("2025-06-02", "2025-06"), ("2025-07-01", "2025-07")])
+        self.assertTrue({name for name, _table, _cols in MONTH_INDEXES} <= names)
+        self.assertIn("yil_ay", plan)
+        self.assertEqual([r[1] for r in june], ["2025-06-02"])
+
+    def test_only_existing_tables_get_month_column(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE izin_takip (id INTEGER PRIMARY KEY, ad_soyad TEXT, izin_tarihi TEXT)")
+        conn.execute("INSERT INTO izin_takip (ad_soyad, izin_tarihi) VALUES ('Ali Veli', '2025-06-10')")
+        migration_013_month_columns(conn)
+        migration_013_month_columns(conn)
+        conn.execute("INSERT INTO izin_takip (ad_soyad, izin_tarihi) VALUES ('Ali Veli', '2025-08-01')")
+        rows = conn.execute("SELECT yil_ay FROM izin_takip ORDER BY id").fetchall()
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        self.assertEqual(rows, [("2025-06",), ("2025-08",)])
+        self.assertEqual(names, {'idx_izin_takip_yil_ay'})
+
+class AdKeyColumnTests(unittest.TestCase):
+    NAMES = ["Ali Veli", "  IŞIK ÖZTÜRK ", "İsmail Çağ", "şükrü ĞÜNEŞ", "Âdem Kaya"]
+
+    def test_python_key_matches_column_and_lookups_use_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.executemany("INSERT INTO personel (ad_soyad, ozel_durum) VALUES (?, ?)",
+                                     [(name, f"d{i}") for i, name in enumerate(self.NAMES)])
+                    conn.commit()
+                    migration_014_ad_key_columns(conn)  # tekrar çalıştırmak güvenli
+                    keys = conn.execute("SELECT ad_soyad, ad_key FROM personel").fetchall()
+                    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+                    plan = " ".join(r[-1] for r in conn.execute(
+                        "EXPLAIN QUERY PLAN SELECT id FROM gunluk_kayit WHERE ad_key=? AND COALESCE(manuel_kilit,0)=0",
+                        ("ali veli",)))
+                status = db.get_personnel_special_status("IŞIK ÖZTÜRK")
+                missing = db.get_personnel_special_status("ışık öztürk")
+            finally:
+                db.close_connections()
+        self.assertEqual([(name, ad_key(name)) for name, _key in keys], keys)
+        self.assertEqual(dict(keys)["  IŞIK ÖZTÜRK "], "ışık öztürk")
+        self.assertEqual((status, missing), ("d1", None))
+        self.assertTrue({name for name, _table, _cols in AD_KEY_INDEXES} <= names)
+        self.assertIn("idx_gunluk_ad_key_tarih", plan)
+
+    def test_person_reads_do_not_cross_case_variants(self):
+        """Kart ve kişi kayıt okumaları hesaplamayı besler; harf varyantı başka kişinin verisini döndürmez."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.executemany("INSERT INTO personel (ad_soyad, yevmiyeci_mi, ozel_durum) VALUES (?, ?, ?)",
+                                     [("Ali Veli", 1, "X"), ("ALİ VELİ", 0, None)])
+                    conn.executemany("INSERT INTO gunluk_kayit (tarih, ad_soyad) VALUES ('2025-06-02', ?)",
+                                     [("Ali Veli",), ("ALİ VELİ",)])
+                    conn.commit()
+                card = db.get_personnel("ALİ VELİ")
+                status = db.get_personnel_special_status("ALİ VELİ")
+                records = db.get_records_between("2025-06-01", "2025-06-30", person="ALİ VELİ ")
+            finally:
+                db.close_connections()
+        self.assertEqual((card["ad_soyad"], card["yevmiyeci_mi"], status), ("ALİ VELİ", 0, None))
+        self.assertEqual([r[2] for r in records], ["ALİ VELİ"])
+
+    def test_writes_do_not_cross_case_variants(self):
+        """Yalnızca harf büyüklüğü farklı iki kişi: yazmalar ad_key'i paylaşsa da diğerine dokunmaz."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.executemany("INSERT INTO personel (ad_soyad, yillik_izin_hakki) VALUES (?, 14)",
+                                     [("Ali Veli",), ("ALİ VELİ",)])
+                    conn.executemany("INSERT INTO gunluk_kayit (tarih, ad_soyad, aciklama) VALUES ('2025-06-02', ?, 'Rapor')",
+                                     [("Ali Veli",), ("ALİ VELİ",)])
+                    izin_id = conn.execute("INSERT INTO izin_takip (ad_soyad, izin_tarihi, izin_turu, gun_sayisi) "
+                                           "VALUES ('Ali Veli', '2025-06-02', 'Rapor', 1)").lastrowid
+                    conn.commit()
+                db.update_gorevi_bulk_if_empty([("ALİ VELİ", "Kaynakçı")])
+                db.delete_izin(izin_id)
+                with db.get_connection() as conn:
+                    gorev = dict(conn.execute("SELECT ad_soyad, gorevi FROM personel").fetchall())
+                    kalan = [r[0] for r in conn.execute("SELECT ad_soyad FROM gunluk_kayit")]
+            finally:
+                db.close_connections()
+        self.assertEqual(gorev, {"Ali Veli": "", "ALİ VELİ": "Kaynakçı"})
+        self.assertEqual(kalan, ["ALİ VELİ"])
+
+
+class PersonelIdTests(unittest.TestCase):
+    def test_existing_rows_backfilled(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE personel (ad_soyad TEXT PRIMARY KEY, maas REAL)")
+        conn.execute("CREATE TABLE gunluk_kayit (id INTEGER PRIMARY KEY, tarih TEXT, ad_soyad TEXT)")
+        conn.executemany("INSERT INTO personel VALUES (?, 100)", [("Ali Veli",), ("Ayşe Kaya",)])
+        conn.executemany("INSERT INTO gunluk_kayit (tarih, ad_soyad) VALUES (?, ?)",
+                         [("2025-06-02", "Ayşe Kaya"), ("2025-06-02", "Kayıtsız Kişi")])
+        migration_014_ad_key_columns(conn)
+        migration_015_personel_id(conn)
+        migration_015_personel_id(conn)
+        ids = dict(conn.execute("SELECT ad_soyad, personel_id FROM personel").fetchall())
+        linked = conn.execute("SELECT ad_soyad, personel_id FROM gunluk_kayit ORDER BY id").fetchall()
+        self.assertEqual(sorted(ids.values()), [1, 2])
+        self.assertEqual(linked, [("Ayşe Kaya", ids["Ayşe Kaya"]), ("Kayıtsız Kişi", None)])
+
+    def test_padded_names_linked(self):
+        """'Ali Veli ' gibi boşluklu adlar hem doldurmada hem tetikleyicilerde karta bağlanır."""
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE personel (ad_soyad TEXT PRIMARY KEY, maas REAL)")
+        conn.execute("CREATE TABLE gunluk_kayit (id INTEGER PRIMARY KEY, tarih TEXT, ad_soyad TEXT)")
+        conn.execute("INSERT INTO personel VALUES ('Ali Veli', 100)")
+        conn.execute("INSERT INTO gunluk_kayit (tarih, ad_soyad) VALUES ('2025-06-02', 'Ali Veli ')")
+        migration_014_ad_key_columns(conn)
+        migration_015_personel_id(conn)
+        conn.execute("INSERT INTO gunluk_kayit (tarih, ad_soyad) VALUES ('2025-06-03', ' Ali Veli')")
+        conn.execute("INSERT INTO gunluk_kayit (tarih, ad_soyad) VALUES ('2025-06-03', 'Ayşe Kaya ')")
+        conn.execute("INSERT INTO personel (ad_soyad, maas) VALUES ('Ayşe Kaya', 100)")
+        ids = dict(conn.execute("SELECT ad_soyad, personel_id FROM personel").fetchall())
+        linked = [r[0] for r in conn.execute("SELECT personel_id FROM gunluk_kayit ORDER BY id")]
+        self.assertEqual(linked, [ids["Ali Veli"], ids["Ali Veli"], ids["Ayşe Kaya"]])
+
+    def test_padded_record_listed_in_personel_tab(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.execute("INSERT INTO personel (ad_soyad) VALUES ('Ali Veli')")
+                    conn.execute("INSERT INTO gunluk_kayit (tarih, ad_soyad, tersane_id) VALUES ('2025-06-02', 'Ali Veli ', 1)")
+                    conn.commit()
+                rows = db.get_all_personnel_detailed(2025, 6, tersane_id=1, use_records_filter=True)
+            finally:
+                db.close_connections()
+        self.assertEqual([r[0] for r in rows], ["Ali Veli"])
+
+    def test_ids_follow_writes_and_drive_joins(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.executemany(
+                        "INSERT INTO gunluk_kayit (tarih, ad_soyad, hesaplanan_normal, hesaplanan_mesai) VALUES (?, ?, 7.5, ?)",
+                        [("2025-06-02", "Ali Veli", 1.0), ("2025-06-03", "Ali Veli", 2.0), ("2025-06-02", "Ayşe Kaya", 0.0)],
+                    )
+                    conn.execute("INSERT INTO personel (ad_soyad, maas, ekip_adi) VALUES ('Ali Veli', 30000, 'Kaynak')")
+                    conn.execute("INSERT INTO avans_kesinti (tarih, ad_soyad, tur, tutar) VALUES ('2025-06-05', 'Ali Veli', 'Avans', 500)")
+                    conn.commit()
+                    pid = conn.execute("SELECT personel_id FROM personel WHERE ad_soyad='Ali Veli'").fetchone()[0]
+                    linked = conn.execute("SELECT DISTINCT personel_id FROM gunluk_kayit WHERE ad_soyad='Ali Veli' "
+                                          "UNION ALL SELECT personel_id FROM avans_kesinti").fetchall()
+                dashboard = db.get_dashboard_data(2025, 6)
+                records = db.get_records_by_month(2025, 6)
+                db.delete_unused_personnel()
+                with db.get_connection() as conn:
+                    conn.execute("DELETE FROM personel")
+                    conn.commit()
+                    unlinked = conn.execute("SELECT COUNT(*) FROM gunluk_kayit WHERE personel_id IS NOT NULL").fetchone()[0]
+            finally:
+                db.close_connections()
+        self.assertEqual(linked, [(pid,), (pid,)])
+        self.assertEqual([(d["ad_soyad"], d["maas"], d["ekip"], d["top_mesai"], d["avans"]) for d in dashboard],
+                         [("Ali Veli", 30000, "Kaynak", 3.0, 500), ("Ayşe Kaya", 0, "Diğer", 0.0, 0.0)])
+        self.assertEqual([r[9] for r in records], ["Kaynak", None, "Kaynak"])
+        self.assertEqual(unlinked, 0)
+
+
+class MinuteColumnTests(unittest.TestCase):
+    SAAT = ["08:00", "8:5", "07:45:30", "17:30.5", "24:00", "12:60", "1:2:3", "abc", "", None, "08:00:99", " 8:00"]
+    KAYIP = ["", None, "1:30", "0:45:00", ":30", "2:", "1:x", "abc", "10:05"]
+
+    def test_sql_matches_python_parsers(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        g, _c, k = minute_sql()
+        self.assertEqual(conn.execute(f"SELECT {g}, {k} FROM (SELECT '8:05:30.2' AS giris_saati, '1:05' AS kayip_sure_saat)")
+                         .fetchone(), (485, 65))
+        for value in self.SAAT:
+            sql = g.replace("giris_saati", "?")
+            got = conn.execute(f"SELECT {sql}", (value,) * sql.count("?")).fetchone()[0]
+            self.assertIn(got, (parse_time_to_minutes(value), None), value)  # NULL: okuyucu metinden parse eder
+        for value in self.KAYIP:
+            sql = k.replace("kayip_sure_saat", "?")
+            got = conn.execute(f"SELECT {sql}", (value,) * sql.count("?")).fetchone()[0]
+            self.assertIn(got, (_parse_kayip_dk(value), None), value)
+
+    def test_backfill_triggers_and_upload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.execute("INSERT INTO gunluk_kayit (tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat) "
+                                 "VALUES ('2025-06-02', 'Ali Veli', '08:00', '17:30', '0:30')")
+                    conn.execute("UPDATE gunluk_kayit SET cikis_saati='19:00'")
+                    conn.commit()
+                    migration_016_minute_columns(conn)  # tekrar çalıştırmak güvenli
+                    edited = conn.execute("SELECT giris_dk, cikis_dk, kayip_dk FROM gunluk_kayit").fetchone()
+                db.merge_upload_rows([("2025-06-03", "Ali Veli", "07:45", "", "", 7.5, 0.0, "")], tersane_id=1)
+                with db.get_connection() as conn:
+                    uploaded = conn.execute(
+                        "SELECT giris_dk, cikis_dk, kayip_dk FROM gunluk_kayit WHERE tarih='2025-06-03'").fetchone()
+            finally:
+                db.close_connections()
+        self.assertEqual(edited, (480, 1140, 30))
+        self.assertEqual(uploaded, (465, None, 0))
+
+    def test_records_query_flags_late_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "puantaj.db"))
+            try:
+                with db.get_connection() as conn:
+                    conn.executemany("INSERT INTO gunluk_kayit (tarih, ad_soyad, giris_saati) VALUES (?, 'Ali Veli', ?)",
+                                     [("2025-06-02", "08:20"), ("2025-06-03", "08:21"), ("2025-06-04", "")])
+                    conn.commit()
+                records = db.get_records_by_month(2025, 6)
+            finally:
+                db.close_connections()
+        self.assertEqual([r[10] for r in records], [0, 1, None])
+
+    def test_existing_rows_backfilled(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE gunluk_kayit (id INTEGER PRIMARY KEY, giris_saati TEXT, cikis_saati TEXT, "
+                     "kayip_sure_saat TEXT)")
+        conn.execute("INSERT INTO gunluk_kayit (giris_saati, cikis_saati, kayip_sure_saat) VALUES ('8:00', 'x', NULL)")
+        migration_016_minute_columns(conn)
+        migration_016_minute_columns(conn)
+        self.assertEqual(conn.execute("SELECT giris_dk, cikis_dk, kayip_dk FROM gunluk_kayit").fetchone(),
+                         (480, None, 0))
+
+    def test_batch_uses_minutes_when_present(self):
+        df = pd.DataFrame({
+            "tarih": ["2025-06-02", "2025-06-03", "2025-06-06", "2025-06-07"],
+            "giris": ["08:00", "07:30", "08:10", ""],
+            "cikis": ["19:30", "17:30", "20:00", "16:00"],
+            "kayip": ["", "1:00", "0:30", ""],
+        })
+        expected = hesapla_hakedis_batch(df, holiday_set=set())
+        with_dk = df.assign(giris_dk=[480, None, 490, None], cikis_dk=[1170, 1050, None, 960],
+                            kayip_dk=[0, 60, None, 0])
+        pd.testing.assert_frame_equal(hesapla_hakedis_batch(with_dk, holiday_set=set()), expected)
+
+
+class QueryPlanAuditTests(unittest.TestCase):
+    def test_statements_collected_from_source(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp, "ornek.py")
+            src.write_text(
+                "def f(conn, ids, col):\n"
+                "    sql = 'SELECT * FROM gunluk_kayit WHERE ' + 'tarih=?'\n"
+                "    conn.execute(sql, (1,))\n"
+                "    conn.execute(f\"DELETE FROM personel WHERE id IN ({','.join('?' * len(ids))})\", ids)\n"
+                "    conn.execute('CREATE TABLE x (a)')\n"
+                "    conn.execute(\"select 1\")\n"
+                "    conn.execute(sql)\n",
+                encoding="utf-8",
+            )
+            found = collect_statements([src])
+        self.assertEqual([(line, sql) for _f, line, sql in found], [
+            (3, "SELECT * FROM gunluk_kayit WHERE tarih=?"),
+            (4, "DELETE FROM personel WHERE id IN (?)"),
+            (6, "select 1"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
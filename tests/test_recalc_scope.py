@@ -0,0 +1,151 @@
+import itertools
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from core.database import Database
+from core.hesaplama import hesapla_hakedis_batch
+from core.recalc_scope import changed_bands, diff_rules, rules_fingerprint
+
+
+def _rules(**overrides):
+    rules = {
+        'mesai_katsayilari': [(1, 17.5, 18.0, 0.5, ""), (2, 18.0, 19.0, 1.5, ""), (3, 19.0, 24.0, 3.0, "")],
+        'yevmiye_katsayilari': [(1, 17.5, 19.0, 0.25, ""), (2, 19.0, 23.0, 0.5, "")],
+        'mesai_baslangic_saat': "17:30",
+        'en_erken_cikis_saat': "19:30",
+        'pazar_mesaisi': "15.0",
+        'calisma_hesaplama_modu': "cezadan_dus",
+        'ogle_molasi_baslangic': "12:15",
+        'ogle_molasi_bitis': "13:15",
+        'ara_mola_dk': "20",
+        'fiili_saat_yuvarlama': "ondalik",
+        'friday_loss_tolerance_hours': "1.0",
+        'tersane_saatleri': {
+            'sabah_tolerans_dk': 500, 'aksam_referans_dk': 1020, 'erken_cikis_limit_dk': 990,
+            'tolerans_limiti_dk': 1050, 'vardiya_limiti_dk': 1170, 'cuma_kayip_tolerans_dk': 60,
+        },
+    }
+    rules.update(overrides)
+    return rules
+
+
+class RecalcScopeTests(unittest.TestCase):
+    def setUp(self):
+        tarihler = ["2025-06-02", "2025-06-06", "2025-06-07", "2025-06-08"]  # Pzt, Cuma, Cmt, Pazar
+        saatler = ["08:00", "09:00", "16:50", "17:40", "18:20", "19:10", "21:00", None]
+        rows = itertools.product(tarihler, saatler, saatler, [None, "00:30", "01:30"], [False, True])
+        self.df = pd.DataFrame(
+            [dict(tarih=t, giris=g, cikis=c, kayip=k, yevmiyeci=y) for t, g, c, k, y in rows]
+        )
+
+    def _assert_scope_sound(self, old, new):
+        """Kapsam dışındaki hiçbir satırın sonucu değişmemeli."""
+        scope = diff_rules(old, new)
+        before = hesapla_hakedis_batch(self.df, old)
+        after = hesapla_hakedis_batch(self.df, new)
+        changed = (before != after).any(axis=1).to_numpy()
+        mask = scope.mask(self.df)
+        self.assertFalse((changed & ~mask).any(), scope.reasons)
+        return scope, mask
+
+    def test_no_change_is_empty(self):
+        scope = diff_rules(_rules(), _rules(en_erken_cikis_saat="20:00"))
+        self.assertTrue(scope.is_empty)
+
+    def test_changed_bands(self):
+        old = [(1, 18.0, 19.0, 1.5, "")]
+        new = [(1, 18.0, 19.0, 1.5, ""), (2, 19.0, 20.0, 3.0, "")]
+        self.assertEqual(changed_bands(old, new), [(19.0, 20.0)])
+        self.assertEqual(changed_bands(old, list(old)), [])
+
+    def test_mesai_band_change_limited_to_band(self):
+        new = _rules(mesai_katsayilari=[(1, 17.5, 18.0, 0.5, ""), (2, 18.0, 19.0, 2.0, ""), (3, 19.0, 24.0, 3.0, "")])
+        scope, mask = self._assert_scope_sound(_rules(), new)
+        self.assertEqual(scope.mesai_bands, [(18.0, 19.0)])
+        self.assertLess(mask.sum(), len(self.df) / 4)
+
+    def test_yevmiye_band_change_only_yevmiyeci(self):
+        new = _rules(yevmiye_katsayilari=[(1, 17.5, 19.0, 0.25, ""), (2, 19.0, 23.0, 0.75, "")])
+        scope, mask = self._assert_scope_sound(_rules(), new)
+        self.assertTrue(self.df['yevmiyeci'][mask].all())
+
+    def test_friday_tolerance_only_fridays_with_kayip(self):
+        ts = dict(_rules()['tersane_saatleri'], cuma_kayip_tolerans_dk=30)
+        scope, mask = self._assert_scope_sound(_rules(), _rules(tersane_saatleri=ts, friday_loss_tolerance_hours="0.5"))
+        self.assertFalse(scope.full)
+        self.assertEqual(scope.weekday_sql(), ("strftime('%w', tarih) IN (?)", ["5"]))
+        self.assertTrue((self.df['tarih'][mask] == "2025-06-06").all())
+
+    def test_pazar_mesaisi_only_sundays(self):
+        scope, mask = self._assert_scope_sound(_rules(), _rules(pazar_mesaisi="12"))
+        self.assertTrue((self.df['tarih'][mask] == "2025-06-08").all())
+
+    def test_fiili_settings_ignored_in_cezadan_dus_mode(self):
+        self.assertTrue(diff_rules(_rules(), _rules(ara_mola_dk="30")).is_empty)
+        old = _rules(calisma_hesaplama_modu="fiili_calisma")
+        self._assert_scope_sound(old, dict(old, ara_mola_dk="30"))
+
+    def test_unknown_change_is_full(self):
+        ts = dict(_rules()['tersane_saatleri'], sabah_tolerans_dk=510)
+        self.assertTrue(diff_rules(_rules(), _rules(tersane_saatleri=ts)).full)
+
+
+class KuralParmakIziTests(unittest.TestCase):
+    def setUp(self):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self._db_path = Path(db_path)
+        self.db = Database(str(self._db_path))
+        with self.db.get_connection() as conn:
+            conn.execute("INSERT INTO personel (ad_soyad, maas, ekip_adi, yevmiyeci_mi) VALUES ('Ali Veli', 30000, 'A', 0)")
+            conn.executemany(
+                "INSERT INTO gunluk_kayit (tarih, ad_soyad, giris_saati, cikis_saati, kayip_sure_saat) VALUES (?,?,?,?,?)",
+                [("2025-06-02", "Ali Veli", "08:00", "18:30", ""), ("2025-06-03", "Ali Veli", "09:00", "17:00", "")],
+            )
+            conn.commit()
+
+    def tearDown(self):
+        self.db.close_connections()
+        try:
+            self._db_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    def _rows(self):
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                "SELECT id, hesaplanan_normal, aciklama, kural_parmak_izi FROM gunluk_kayit ORDER BY tarih"
+            ).fetchall()
+
+    def test_rules_fingerprint_ignores_derived_keys(self):
+        self.assertEqual(rules_fingerprint(_rules()), rules_fingerprint(_rules(en_erken_cikis_saat="21:00")))
+        self.assertNotEqual(rules_fingerprint(_rules()), rules_fingerprint(_rules(pazar_mesaisi="12")))
+
+    def test_matching_rows_are_skipped(self):
+        self.db.update_records_for_person("Ali Veli")
+        first = self._rows()
+        self.assertTrue(all(r[3] for r in first))
+        self.assertTrue(first[1][2].startswith("Gecikme/Ceza"))
+
+        # Elle yazılan değer parmak izini sıfırlar (trigger); sonraki hesaplama düzeltir.
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE gunluk_kayit SET hesaplanan_normal=0 WHERE id=?", (first[0][0],))
+            conn.commit()
+        self.assertIsNone(self._rows()[0][3])
+
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE gunluk_kayit SET aciklama='dokunulmadi' WHERE id=?", (first[1][0],))
+            conn.execute("UPDATE gunluk_kayit SET kural_parmak_izi=? WHERE id=?", (first[1][3], first[1][0]))
+            conn.commit()
+        self.db.update_records_for_person("Ali Veli")
+        second = self._rows()
+        self.assertEqual(second[0][1], first[0][1])  # yeniden hesaplandı
+        self.assertEqual(second[1][2], "dokunulmadi")  # parmak izi eşleşti, atlandı
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.upload_ingest import (
+    ParsedFileCache,
+    UploadReadError,
+    _sheet_chunks,
+    is_large_upload,
+    iter_file_key_frames,
+    iter_key_frames,
+    iter_upload_chunks,
+    map_column,
+    normalize_tarih_cell,
+    normalize_time_cell,
+    prepare_upload_frame,
+    read_upload_file,
+    read_upload_preview,
+    sniff_csv,
+)
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - opsiyonel bağımlılık
+    openpyxl = None
+
+COLS = {'tarih': 'Tarih', 'ad': 'Ad Soyad', 'giris': 'Giriş', 'cikis': 'Çıkış', 'kayip': 'Kayıp', 'gorevi': 'Görevi'}
+
+
+def _row_loop(df, cols, skip_keys):
+    """UploadWorker'ın eski satır bazlı normalize döngüsü (referans)."""
+    out, skipped, gorev_map = [], 0, {}
+    for _i, (_, row) in enumerate(df.iterrows()):
+        t_val = row[cols['tarih']]
+        if pd.isna(t_val) or str(t_val).strip() == '':
+            continue
+        if isinstance(t_val, datetime):
+            tarih_str = t_val.strftime("%Y-%m-%d")
+        else:
+            t_str = str(t_val).split()[0].replace('/', '-').replace('.', '-')
+            parts = t_str.split('-')
+            tarih_str = f"{parts[2]}-{parts[1]}-{parts[0]}" if len(parts) == 3 and len(parts[2]) == 4 else t_str
+        ad = str(row[cols['ad']]).strip()
+        if not ad or ad.lower() == 'nan':
+            continue
+        if f"{tarih_str}|{ad}" in skip_keys:
+            skipped += 1
+            continue
+        if cols['gorevi'] and ad not in gorev_map:
+            g_val = row.get(cols['gorevi'])
+            if g_val and str(g_val).strip() not in ('', 'nan', 'NaN'):
+                gorev_map[ad] = str(g_val).strip()
+        out.append((tarih_str, ad, normalize_time_cell(row.get(cols['giris'])),
+                    normalize_time_cell(row.get(cols['cikis'])), normalize_time_cell(row.get(cols['kayip']))))
+    return out, skipped, gorev_map
+
+
+class PrepareUploadFrameTests(unittest.TestCase):
+    def test_matches_row_loop(self):
+        df = pd.DataFrame({
+            'Tarih': [datetime(2025, 6, 2), "03.06.2025", "04/06/2025", "2025-06-05", "06.06.2025 00:00:00",
+                      None, "  ", "07.06.2025", "08.06.2025", pd.Timestamp("2025-06-09"), "10.06.2025"],
+            'Ad Soyad': ["Ali Veli", " Ayşe Kaya ", "Ali Veli", "nan", "Mehmet Can", "Ali Veli", "Ali Veli",
+                         np.nan, "Ayşe Kaya", "Mehmet Can", "Ali Veli"],
+            'Giriş': ["08:00", 0.3333333, time(8, 30), "", np.nan, "08:00", "08:00", "08:00", "nan", "8:05", "x"],
+            'Çıkış': ["17:00", "18:30:00", 0.75, "NaT", "17:10", "17:00", "17:00", "17:00", "17:00", 0.99, "19:00"],
+            'Kayıp': [None, "01:00", "", 0.0208333, "00:30", None, None, None, "", "", "bad"],
+            'Görevi': [np.nan, "Kaynakçı", "Usta", "", "nan", "X", "X", "X", "Boyacı", " Montajcı ", None],
+        })
+        skip = {"2025-06-04|Ali Veli", "2025-06-09|Mehmet Can"}
+        frame, skipped, gorev = prepare_upload_frame(df, COLS, skip)
+        exp_rows, exp_skipped, exp_gorev = _row_loop(df, COLS, skip)
+        self.assertEqual(list(frame.itertuples(index=False, name=None)), exp_rows)
+        self.assertEqual(skipped, exp_skipped)
+        self.assertEqual(gorev, exp_gorev)
+        self.assertEqual(skipped, 2)
+
+    def test_missing_optional_columns(self):
+        df = pd.DataFrame({'Tarih': ["02.06.2025"], 'Ad Soyad': ["Ali Veli"]})
+        cols = {'tarih': 'Tarih', 'ad': 'Ad Soyad', 'giris': None, 'cikis': None, 'kayip': None, 'gorevi': None}
+        frame, skipped, gorev = prepare_upload_frame(df, cols)
+        self.assertEqual(list(frame.itertuples(index=False, name=None)), [("2025-06-02", "Ali Veli", "", "", "")])
+        self.assertEqual((skipped, gorev), (0, {}))
+
+    def test_empty_frame(self):
+        frame, skipped, _ = prepare_upload_frame(pd.DataFrame({'Tarih': [], 'Ad Soyad': []}), COLS)
+        self.assertTrue(frame.empty)
+        self.assertEqual(skipped, 0)
+
+
+class ReadUploadFileTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.path = Path(path)
+        self.path.write_text("Rapor,,\nTarih,Ad Soyad,Giriş\n02.06.2025,Ali Veli,08:00\n", encoding="utf-8")
+        self.cache = ParsedFileCache(maxsize=2)
+
+    def tearDown(self):
+        self.path.unlink(missing_ok=True)
+
+    def test_header_detected_and_parsed_once(self):
+        df, found = read_upload_file(str(self.path), 0, cache=self.cache)
+        self.assertTrue(found)
+        self.assertEqual(list(df.columns), ["Tarih", "Ad Soyad", "Giriş"])
+        again, _ = read_upload_file(str(self.path), [0], cache=self.cache)  # CSV'de sayfa seçimi anahtara girmez
+        self.assertIs(again, df)
+        popped, _ = read_upload_file(str(self.path), 0, cache=self.cache, pop=True)
+        self.assertIs(popped, df)
+        self.assertIsNone(self.cache.get(ParsedFileCache.key(str(self.path), 0)))
+
+    def test_changed_file_is_read_again(self):
+        df, _ = read_upload_file(str(self.path), cache=self.cache)
+        self.path.write_text("Tarih,Ad Soyad\n03.06.2025,Ayşe Kaya\n04.06.2025,Ali Veli\n", encoding="utf-8")
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1_000_000))
+        fresh, found = read_upload_file(str(self.path), cache=self.cache)
+        self.assertIsNot(fresh, df)
+        self.assertTrue(found)
+        self.assertEqual(len(fresh), 2)
+
+
+class CsvDialectTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.path = Path(path)
+        self.addCleanup(self.path.unlink, missing_ok=True)
+
+    def test_semicolon_and_windows_encoding_read_once_as_text(self):
+        text = ("Puantaj Raporu;;;\nTarih;Ad Soyad;Giriş;Kayıp\n"
+                "02.06.2025;Şükrü Işık;08:00;1,5\n03.06.2025;Şükrü Işık;0.375;\n")
+        self.path.write_bytes(text.encode("cp1254"))
+        self.assertEqual(sniff_csv(self.path), (";", "cp1254"))
+        df, found = read_upload_file(str(self.path), cache=None)
+        self.assertTrue(found)
+        self.assertEqual(df["Ad Soyad"].tolist(), ["Şükrü Işık"] * 2)
+        self.assertEqual(df["Kayıp"].tolist()[0], "1,5")  # metin olarak kalır, sayıya çevrilmez
+        self.assertTrue(pd.isna(df["Kayıp"].tolist()[1]))
+        frame, _skipped, _gorev = prepare_upload_frame(df, COLS)
+        self.assertEqual(frame["giris"].tolist(), ["08:00", "09:00"])
+
+        chunks = [c for c, _read, _total in iter_upload_chunks(str(self.path), chunk_rows=1, cache=None)]
+        self.assertEqual(pd.concat(chunks, ignore_index=True).values.tolist(), df.values.tolist())
+
+    def test_comma_file_with_utf8(self):
+        self.path.write_text("Tarih,Ad Soyad,Giriş\n02.06.2025,Ayşe Kaya,08:00\n", encoding="utf-8")
+        self.assertEqual(sniff_csv(self.path), (",", "utf-8"))
+
+
+class UploadChunkTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.path = Path(path)
+        lines = ["Turnike Raporu,,,", ",,,", "Tarih,Ad Soyad,Giriş,Çıkış"]
+        lines += [f"{d % 28 + 1:02d}.06.2025,Personel {d % 7},08:00,17:{d % 60:02d}" for d in range(53)]
+        self.path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.path.unlink(missing_ok=True)
+
+    def test_csv_chunks_match_full_read(self):
+        full, found = read_upload_file(str(self.path), cache=None)
+        self.assertTrue(found)
+        chunks = list(iter_upload_chunks(str(self.path), chunk_rows=10, cache=None))
+        self.assertGreater(len(chunks), 1)
+        streamed = pd.concat([c for c, _done, _total in chunks], ignore_index=True)
+        self.assertEqual(list(streamed.columns), list(full.columns))
+        self.assertEqual(streamed.astype(str).values.tolist(), full.astype(str).values.tolist())
+
+    def test_cached_frame_is_sliced(self):
+        cache = ParsedFileCache()
+        full, _ = read_upload_file(str(self.path), cache=cache)
+        chunks = list(iter_upload_chunks(str(self.path), chunk_rows=20, cache=cache))
+        self.assertEqual([done for _c, done, _t in chunks], [20, 40, 53])
+        self.assertEqual(chunks[0][2], len(full))  # toplam satır biliniyor
+        self.assertIsNone(cache.get(ParsedFileCache.key(str(self.path))))  # worker kullandıktan sonra bellekten atılır
+
+    def test_preview_reads_first_rows_only(self):
+        cache = ParsedFileCache()
+        full, _ = read_upload_file(str(self.path), cache=None)
+        head = read_upload_preview(str(self.path), nrows=12)
+        self.assertTrue(0 < len(head) <= 12)  # başlık üstündeki satırlar da okunan satıra dahil
+        self.assertEqual(head.astype(str).values.tolist(), full.head(len(head)).astype(str).values.tolist())
+        self.assertIsNone(cache.get(ParsedFileCache.key(str(self.path))))
+        self.assertFalse(is_large_upload(str(self.path)))
+
+    def test_key_frames_streamed_per_chunk(self):
+        chunks = iter_upload_chunks(str(self.path), chunk_rows=20, cache=None)
+        frames = list(iter_key_frames(chunks, {'tarih': 'Tarih', 'ad': 'Ad Soyad'}))
+        full, _ = read_upload_file(str(self.path), cache=None)
+        expected, _skipped, _gorev = prepare_upload_frame(full, {'tarih': 'Tarih', 'ad': 'Ad Soyad'})
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(set(pd.concat(frames).itertuples(index=False, name=None)),
+                         set(expected[['tarih', 'ad_soyad']].itertuples(index=False, name=None)))
+
+    def test_file_key_frames_use_own_header_and_firma(self):
+        fd, name = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        other = Path(name)
+        self.addCleanup(other.unlink, missing_ok=True)
+        other.write_text("Firma,Giriş,Ad Soyad,Tarih\nSARAL,08:00,Ali Veli,02.06.2025\n"
+                         "Diğer,08:00,Ayşe Kaya,02.06.2025\nsaral,08:10,Ali Veli,02.06.2025\n", encoding="utf-8")
+        frames = list(iter_file_key_frames(str(other), firma_name="Saral"))
+        self.assertEqual(list(pd.concat(frames).itertuples(index=False, name=None)), [("2025-06-02", "Ali Veli")])
+        other.write_text("Kod,Saat\n1,08:00\n", encoding="utf-8")
+        with self.assertRaises(UploadReadError):  # yükleme sayfası loglar, worker da raporlar
+            list(iter_file_key_frames(str(other)))
+
+    def test_sheet_rows_header_in_data_row(self):
+        rows = [("Rapor", None, None), (None, None, None), ("Tarih", "Ad Soyad", "Giriş")]
+        rows += [(f"{d:02d}.06.2025", f"P{d}", "08:00") for d in range(1, 26)]
+        chunks = list(_sheet_chunks(iter(rows), 10))
+        self.assertEqual([len(c) for c, _ in chunks], [10, 10, 5])
+        self.assertEqual(list(chunks[0][0].columns), ["Tarih", "Ad Soyad", "Giriş"])
+        self.assertEqual(chunks[0][0].iloc[0].tolist(), ["01.06.2025", "P1", "08:00"])
+        self.assertEqual(chunks[-1][1], len(rows))
+
+    @unittest.skipUnless(openpyxl, "openpyxl yok")
+    def test_xlsx_stream_matches_full_read(self):
+        fd, name = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        path = Path(name)
+        self.addCleanup(path.unlink, missing_ok=True)
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Ocak"
+        ws.append(["Turnike Raporu"])
+        ws.append(["Tarih", "Ad Soyad", "Giriş", "Çıkış"])
+        for d in range(1, 36):
+            ws.append([datetime(2025, 1, d % 28 + 1), f"P{d % 7}", time(8, d), "17:30"])
+        wb.save(path)
+
+        full, _ = read_upload_file(str(path), ["Ocak"], cache=None)
+        chunks = list(iter_upload_chunks(str(path), ["Ocak"], chunk_rows=10, cache=None))
+        self.assertEqual([len(c) for c, _d, _t in chunks], [10, 10, 10, 5])
+        streamed = pd.concat([c for c, _d, _t in chunks], ignore_index=True)
+        self.assertEqual(list(streamed.columns), list(full.columns))
+        self.assertEqual(list(map_column(streamed['Tarih'], normalize_tarih_cell)),
+                         list(map_column(full['Tarih'], normalize_tarih_cell)))
+        self.assertEqual(list(map_column(streamed['Giriş'], normalize_time_cell)),
+                         list(map_column(full['Giriş'], normalize_time_cell)))
+
+    def test_missing_header_raises(self):
+        rows = [("a", "b")] + [("x", "y")] * 30
+        with self.assertRaises(UploadReadError):
+            list(_sheet_chunks(iter(rows), 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
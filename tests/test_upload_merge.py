@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from core.database import Database
+from migrations.migrations import migration_011_gunluk_kayit_upsert_index
+
+
+def _row(tarih, ad, cikis, aciklama=""):
+    return (tarih, ad, "08:00", cikis, "", 7.5, 1.0, aciklama)
+
+
+class MergeUploadRowsTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self._tmp.name, "puantaj.db"))
+        with self.db.get_connection() as conn:
+            conn.execute("INSERT INTO personel (ad_soyad, maas, ekip_adi, yevmiyeci_mi) VALUES ('Ali Veli', 1, 'A', 0)")
+            conn.commit()
+
+    def tearDown(self):
+        self.db.close_connections()
+        self._tmp.cleanup()
+
+    def _records(self):
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                "SELECT id, tarih, cikis_saati, import_batch_id, manuel_kilit FROM gunluk_kayit ORDER BY tarih"
+            ).fetchall()
+
+    def test_upsert_keeps_ids(self):
+        self.db.merge_upload_rows([_row("2025-06-02", "Ali Veli", "17:30"), _row("2025-06-03", "Ali Veli", "17:30")],
+                                  tersane_id=1, batch_id="b1")
+        first = self._records()
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE gunluk_kayit SET manuel_kilit=1 WHERE id=?", (first[0][0],))
+            conn.commit()
+
+        # Aynı anahtar iki kez gelirse son satır kazanır (eski INSERT OR REPLACE gibi).
+        self.db.merge_upload_rows([_row("2025-06-02", "Ali Veli", "18:00"), _row("2025-06-02", "Ali Veli", "19:00"),
+                                   _row("2025-06-04", "Ali Veli", "17:30")], tersane_id=1, batch_id="b2")
+        second = self._records()
+        self.assertEqual(len(second), 3)
+        self.assertEqual(second[0], (first[0][0], "2025-06-02", "19:00", "b2", 0))
+        self.assertEqual(second[1], first[1])
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT tersane_id FROM personel").fetchone()[0], 1)
+
+    def test_other_tersane_is_separate_record(self):
+        self.db.merge_upload_rows([_row("2025-06-02", "Ali Veli", "17:30")], tersane_id=1, batch_id="b1")
+        self.db.merge_upload_rows([_row("2025-06-02", "Ali Veli", "18:30")], tersane_id=2, batch_id="b2")
+        self.assertEqual([r[2] for r in self._records()], ["17:30", "18:30"])
+
+    def test_conflicts_matched_per_tersane(self):
+        self.db.merge_upload_rows([_row("2025-06-02", "Ali Veli", "17:30"), _row("2025-06-05", "Ali Veli", "17:30")],
+                                  tersane_id=1, batch_id="b1")
+        self.db.merge_upload_rows([_row("2025-06-03", "Ali Veli", "17:30")], batch_id="b2")
+        keys = [("2025-06-05", "Ali Veli"), ("2025-06-03", "Ali Veli"), ("2025-06-02", "Ali Veli"),
+                ("2025-06-02", "Ayşe Kaya")]
+        self.assertEqual(self.db.find_conflicting_keys(keys, 1), [("2025-06-05", "Ali Veli"), ("2025-06-02", "Ali Veli")])
+        self.assertEqual(self.db.find_conflicting_keys(keys, 2), [])
+        self.assertEqual(self.db.find_conflicting_keys(keys, None), [("2025-06-03", "Ali Veli")])
+        self.assertEqual(self.db.find_conflicting_keys([], 1), [])
+
+    def test_duplicates_block_index_and_fall_back(self):
+        with self.db.get_connection() as conn:
+            conn.execute("DROP INDEX idx_gunluk_unique_tersane")
+            conn.executemany("INSERT INTO gunluk_kayit (tarih, ad_soyad, cikis_saati) VALUES (?,?,?)",
+                             [("2025-06-02", "Ali Veli", "17:00")] * 2)
+            conn.commit()
+            migration_011_gunluk_kayit_upsert_index(conn)
+            self.assertIsNone(conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name='idx_gunluk_unique_tersane'").fetchone())
+        self.assertEqual(self.db.merge_upload_rows([_row("2025-06-03", "Ali Veli", "17:30")]), 1)
+        self.assertEqual(len(self._records()), 3)
+
+
+class UpsertIndexMigrationTests(unittest.TestCase):
+    def test_legacy_inline_unique_left_to_migration_009(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE gunluk_kayit (id INTEGER PRIMARY KEY, tarih TEXT, ad_soyad TEXT, "
+                     "tersane_id INTEGER, UNIQUE(tarih, ad_soyad))")
+        migration_011_gunluk_kayit_upsert_index(conn)
+        self.assertIsNone(conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' "
+                                       "AND name='idx_gunluk_unique_tersane'").fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from core import parallel_upload
+from core.database import Database
+from core.upload_ingest import iter_upload_chunks, skip_consumed
+from core.upload_registry import (UPLOAD_CHECKPOINT_KEY, UPLOAD_PROGRESS_KEY, file_fingerprint, firma_key,
+                                  new_checkpoint, open_readonly, resume_plan, sheet_key, unchanged_mask)
+from tests.test_recalc_scope import _rules
+
+
+class UploadRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self._tmp.name, "puantaj.db")
+        self.db = Database(self.db_file)
+        self.db.merge_upload_rows([
+            ("2025-06-02", "Ali Veli", "08:00", "17:30", "", 7.5, 0.0, ""),
+            ("2025-06-03", "Ali Veli", "08:00", "18:30", "", 7.5, 1.0, ""),
+        ], tersane_id=1, batch_id="b1")
+
+    def tearDown(self):
+        self.db.close_connections()
+        self._tmp.cleanup()
+
+    def test_fingerprint_and_sheet_key(self):
+        a = Path(self._tmp.name, "a.csv")
+        b = Path(self._tmp.name, "kopya.csv")
+        a.write_text("Tarih,Ad Soyad\n", encoding="utf-8")
+        b.write_text("Tarih,Ad Soyad\n", encoding="utf-8")
+        self.assertEqual(file_fingerprint(a), file_fingerprint(b))
+        b.write_text("Tarih,Ad Soyad\n01.06.2025,X\n", encoding="utf-8")
+        self.assertNotEqual(file_fingerprint(a), file_fingerprint(b))
+        self.assertEqual([sheet_key(None), sheet_key(0), sheet_key([0])], ['', '', ''])
+        self.assertNotEqual(sheet_key(["Ocak"]), sheet_key(["Ocak", "Şubat"]))
+        self.assertEqual(sheet_key(["Ocak"], ["Ocak", "Şubat"]), '')  # ilk sayfa adıyla seçim = klasör izleme
+        self.assertEqual(sheet_key(["Şubat"], ["Ocak", "Şubat"]), "Şubat")
+        self.assertEqual(firma_key("  ALFA   Ltd "), firma_key("alfa ltd"))
+        self.assertEqual(firma_key(None), '')
+
+    def test_unchanged_rows_detected_in_sql(self):
+        frame = pd.DataFrame({
+            'tarih': ["2025-06-02", "2025-06-03", "2025-06-04", "2025-06-02"],
+            'ad_soyad': ["Ali Veli", "Ali Veli", "Ali Veli", "Ayşe Kaya"],
+            'giris': ["08:00", "08:00", "08:00", "08:00"],
+            'cikis': ["17:30", "19:00", "17:30", "17:30"],
+            'kayip': ["", "", "", ""],
+        })
+        with self.db.get_connection() as conn:
+            self.assertEqual(unchanged_mask(conn, frame, 1).tolist(), [True, False, False, False])
+            self.assertEqual(unchanged_mask(conn, frame, 2).tolist(), [False] * 4)
+        ro = open_readonly(self.db_file)
+        self.addCleanup(ro.close)
+        self.assertEqual(unchanged_mask(ro, frame, 1).tolist(), [True, False, False, False])
+
+    def test_delta_compute_file_skips_unchanged(self):
+        path = Path(self._tmp.name, "puantaj.csv")
+        path.write_text("Tarih,Ad Soyad,Giriş,Çıkış\n02.06.2025,Ali Veli,08:00,17:30\n03.06.2025,Ali Veli,08:00,19:00\n",
+                        encoding="utf-8")
+        result = parallel_upload.compute_file(str(path), {'delta_db': self.db_file, 'tersane_id': 1},
+                                              _rules(), None, {})
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['unchanged'], 1)
+        self.assertEqual([r[0] for r in result['rows']], ["2025-06-03"])
+
+    def test_registry_cleared_by_rollback(self):
+        self.db.record_upload_import("abc", sheet_key(["Ocak"]), "Alfa", 1, None, "b1", "puantaj.xlsx", 2)
+        prev = self.db.find_upload_import("abc", sheet_key(["Ocak"]), "Alfa", 1)
+        self.assertEqual((prev['batch_id'], prev['row_count']), ("b1", 2))
+        self.assertIsNone(self.db.find_upload_import("abc", sheet_key(["Ocak"]), "Alfa", 2))
+        ok, trashed, _warning = self.db.rollback_upload_batch_full("b1")
+        self.assertTrue(ok)
+        self.assertEqual(trashed, 2)
+        self.assertIsNone(self.db.find_upload_import("abc", sheet_key(["Ocak"]), "Alfa", 1))
+
+
+class UploadCheckpointTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self._tmp.name, "puantaj.db"))
+        self.path = os.path.join(self._tmp.name, "puantaj.csv")
+        lines = ["Tarih,Ad Soyad,Giriş,Çıkış"] + [f"{d:02d}.06.2025,Ali Veli,08:00,17:30" for d in range(1, 26)]
+        Path(self.path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.db.close_connections()
+        self._tmp.cleanup()
+
+    def _tarihler(self, chunk_rows, skip):
+        chunks = skip_consumed(iter_upload_chunks(self.path, chunk_rows=chunk_rows, cache=None), skip)
+        return [t for chunk, _read, _total, _consumed in chunks for t in chunk['Tarih'].tolist()]
+
+    def test_skip_is_row_based_across_chunk_sizes(self):
+        full = self._tarihler(7, 0)
+        self.assertEqual(len(full), 25)
+        for chunk_rows in (4, 10, 100):
+            self.assertEqual(self._tarihler(chunk_rows, 10), full[10:])
+        consumed = [c for _chunk, _r, _t, c in skip_consumed(iter_upload_chunks(self.path, chunk_rows=10, cache=None), 15)]
+        self.assertEqual(consumed, [20, 25])
+
+    def test_checkpoint_written_with_merge_and_cleared_by_rollback(self):
+        cp = new_checkpoint("b1", [self.path], {self.path: file_fingerprint(self.path)}, tersane_id=1,
+                            skip_keys=[f"2025-06-{d:02d}|Ali Veli" for d in range(1, 26)])
+        self.db.save_upload_checkpoint(cp)
+        with self.db.get_connection() as conn:
+            static = conn.execute("SELECT value FROM app_meta WHERE key=?", (UPLOAD_CHECKPOINT_KEY,)).fetchone()
+        cp['progress'][self.path]['rows'] = 10
+        self.db.merge_upload_rows([("2025-06-02", "Ali Veli", "08:00", "17:30", "", 7.5, 0.0, "")],
+                                  tersane_id=1, batch_id="b1", checkpoint=cp)
+        with self.db.get_connection() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM app_meta WHERE key IN (?, ?)",
+                                     (UPLOAD_CHECKPOINT_KEY, UPLOAD_PROGRESS_KEY)).fetchall())
+        stored = self.db.get_upload_checkpoint()
+        self.assertEqual(meta[UPLOAD_CHECKPOINT_KEY], static[0])  # ayarlar parça commit'inde yeniden yazılmaz
+        self.assertNotIn("skip_keys", meta[UPLOAD_PROGRESS_KEY])
+        self.assertEqual(stored['progress'][self.path]['rows'], 10)
+        self.assertEqual(len(stored['settings']['skip_keys']), 25)
+        self.assertEqual(resume_plan(stored), ([self.path], {self.path: 10}, []))
+
+        self.db.clear_upload_checkpoint("baska")
+        self.assertIsNotNone(self.db.get_upload_checkpoint())
+        ok, _trashed, _warning = self.db.rollback_upload_batch_full("b1")
+        self.assertTrue(ok)
+        self.assertIsNone(self.db.get_upload_checkpoint())
+        with self.db.get_connection() as conn:
+            left = conn.execute("SELECT COUNT(*) FROM app_meta WHERE key=?", (UPLOAD_PROGRESS_KEY,)).fetchone()[0]
+        self.assertEqual(left, 0)
+
+    def test_resume_plan_skips_done_and_reports_changed(self):
+        other = os.path.join(self._tmp.name, "diger.csv")
+        Path(other).write_text("Tarih,Ad Soyad\n", encoding="utf-8")
+        cp = new_checkpoint("b1", [self.path, other], {self.path: file_fingerprint(self.path),
+                                                       other: file_fingerprint(other)})
+        cp['progress'][other]['done'] = True
+        self.assertEqual(resume_plan(cp)[0], [self.path])
+        Path(self.path).write_text("Tarih,Ad Soyad\n01.06.2025,Ayşe Kaya\n", encoding="utf-8")
+        files, _rows, problems = resume_plan(cp)
+        self.assertEqual(files, [])
+        self.assertEqual(len(problems), 1)
+
+    def test_compute_file_resumes_after_written_rows(self):
+        full = parallel_upload.compute_file(self.path, {'chunk_rows': 7}, _rules(), None, {})
+        resumed = parallel_upload.compute_file(self.path, {'chunk_rows': 7, 'resume_rows': {self.path: 12}},
+                                               _rules(), None, {})
+        self.assertEqual(resumed['rows'], full['rows'][12:])
+
+
+if __name__ == "__main__":
+    unittest.main()
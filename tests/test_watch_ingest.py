@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core import watch_ingest
+from core.database import Database
+from core.upload_registry import file_fingerprint, firma_key, sheet_key
+
+
+def _write(path, cikis_by_day):
+    lines = ["Tarih,Ad Soyad,Giriş,Çıkış"] + [f"{d:02d}.06.2025,Ali Veli,08:00,{c}" for d, c in cikis_by_day]
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class FolderWatcherTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.now = 0.0
+        self.watcher = watch_ingest.FolderWatcher(self._tmp.name, debounce=5, clock=lambda: self.now)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_file_ready_after_debounce_and_once_per_content(self):
+        path = os.path.join(self._tmp.name, "A", "B", "gun.csv")
+        _write(path, [(2, "17:30")])
+        Path(self._tmp.name, "A", "B", "~$gun.xlsx").write_text("x", encoding="utf-8")
+        self.assertEqual(self.watcher.scan(), [])
+        self.now = 3
+        _write(path, [(2, "17:30"), (3, "18:00")])  # hâlâ yazılıyor: süre baştan başlar
+        self.assertEqual(self.watcher.scan(), [])
+        self.now = 7
+        self.assertEqual(self.watcher.scan(), [])
+        self.now = 8
+        self.assertEqual(self.watcher.scan(), [path])
+        self.watcher.mark_processed(path)
+        self.now = 20
+        self.assertEqual(self.watcher.scan(), [])
+
+
+class WatchIngestTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "izlenen")
+        self.db = Database(os.path.join(self._tmp.name, "puantaj.db"))
+        self.tersane_id = self.db.add_tersane("İstanbul Tersanesi")
+
+    def tearDown(self):
+        self.db.close_connections()
+        self._tmp.cleanup()
+
+    def _records(self):
+        with self.db.get_connection() as conn:
+            return conn.execute("SELECT tarih, cikis_saati, tersane_id, firma_id, import_batch_id "
+                                "FROM gunluk_kayit ORDER BY tarih").fetchall()
+
+    def test_target_from_folder_names(self):
+        path = os.path.join(self.root, "istanbul  TERSANESİ", "Alfa Ltd", "gun.csv")
+        tersane_id, firma_id, firma_name = watch_ingest.resolve_target(self.db, self.root, path)
+        self.assertEqual((tersane_id, firma_name), (self.tersane_id, "Alfa Ltd"))
+        self.assertIn((firma_id, "Alfa Ltd"), self.db.get_firmalar())
+        self.assertIsInstance(watch_ingest.resolve_target(self.db, self.root, os.path.join(self.root, "gun.csv")), str)
+        self.assertIsInstance(watch_ingest.resolve_target(
+            self.db, self.root, os.path.join(self.root, "Yok", "Alfa", "gun.csv")), str)
+
+    def test_daily_files_ingested_incrementally(self):
+        path = os.path.join(self.root, "İstanbul Tersanesi", "Alfa", "gun.csv")
+        _write(path, [(2, "17:30"), (3, "18:30")])
+        results = []
+        self.assertEqual(watch_ingest.run_watch(self.db, self.root, once=True, on_result=results.append), 2)
+        first = self._records()
+        self.assertEqual([r[2] for r in first], [self.tersane_id] * 2)
+        self.assertEqual(first[0][4], results[0]['batch_id'])
+
+        # Yükleme sayfası da aynı anahtarla bulur (ilk sayfa, hedef firma).
+        self.assertIsNotNone(self.db.find_upload_import(file_fingerprint(path), sheet_key(["Sayfa1"], ["Sayfa1"]),
+                                                        firma_key("ALFA"), self.tersane_id))
+
+        # Aynı içerik: kayıt defterinden atlanır.
+        res = watch_ingest.ingest_file(self.db, self.root, path)
+        self.assertEqual((res['status'], res['saved']), ('skipped', 0))
+
+        # Ertesi günün dosyası: yalnızca yeni gün yazılır, değişmeyen satırlar atlanır.
+        _write(path, [(2, "17:30"), (3, "18:30"), (4, "17:30")])
+        res = watch_ingest.ingest_file(self.db, self.root, path)
+        self.assertEqual((res['status'], res['saved'], res['unchanged']), ('ok', 1, 2))
+        records = self._records()
+        self.assertEqual([r[0] for r in records], ["2025-06-02", "2025-06-03", "2025-06-04"])
+        self.assertEqual(records[:2], first)
+
+        ok, trashed, _warning = self.db.rollback_upload_batch_full(res['batch_id'])
+        self.assertTrue(ok)
+        self.assertEqual(trashed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+SQL sorgularının EXPLAIN QUERY PLAN denetimi.
+
+core/ ve pages/ altındaki execute/executemany/read_sql çağrılarındaki SQL metinleri (sabit metin,
+metin birleştirme, aynı fonksiyonda değişkene atanmış metin; f-string'lerde ifade yerine '?')
+toplanır ve güncel şemaya sahip geçici bir veritabanında (veya --db ile verilen kopyada)
+EXPLAIN QUERY PLAN ile çalıştırılır. İndeks kullanmadan tüm tabloyu tarayan sorgular raporlanır.
+
+Kullanım:
+    python -m tools.query_plan_audit              # büyük tablolardaki tam taramalar
+    python -m tools.query_plan_audit --all-tables # küçük ayar tabloları dahil
+    python -m tools.query_plan_audit --strict     # tarama varsa çıkış kodu 1
+"""
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCAN_DIRS = ('core', 'pages')
+SQL_METHODS = {'execute', 'executemany', 'read_sql_query', 'read_sql'}
+SQL_START = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT|REPLACE)\b', re.IGNORECASE)
+SCAN_LINE = re.compile(r'^SCAN (\w+)\b(?! USING)', re.IGNORECASE)
+# Satır sayısı küçük kalan ayar/sözlük tabloları: taramaları varsayılan raporda gösterilmez.
+SMALL_TABLES = {
+    'settings', 'genel_ayarlar', 'tersane', 'tersane_ayarlar', 'firma', 'app_meta', 'mesai_katsayilari',
+    'yevmiye_katsayilari', 'resmi_tatiller', 'izin_tur_ayarlari', 'vardiya', 'trash_batches',
+    'sqlite_master', 'sqlite_schema', 'ay_kilit', 'users',
+}
+
+
+def _literal(node, env):
+    """SQL metnini AST düğümünden çıkarır; çözülemezse None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(str(value.value))
+            else:
+                parts.append('?')  # WHY: çoğunlukla IN (?,?,...) yer tutucuları veya değer listesi.
+        return ''.join(parts)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mod)):
+        left = _literal(node.left, env)
+        if isinstance(node.op, ast.Mod):
+            return left
+        right = _literal(node.right, env)
+        return left + right if left is not None and right is not None else None
+    if isinstance(node, ast.Name):
+        return env.get(node.id)
+    return None
+
+
+def _scopes(tree):
+    yield tree
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node
+
+
+def collect_statements(paths):
+    """(dosya, satır, sql) listesi; aynı metin bir kez."""
+    seen = set()
+    found = []
+    for path in paths:
+        tree = ast.parse(Path(path).read_text(encoding='utf-8'), filename=str(path))
+        for scope in _scopes(tree):
+            env = {}
+            for node in ast.walk(scope):
+                if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                    text = _literal(node.value, env)
+                    if text is not None:
+                        env[node.targets[0].id] = text
+            for node in ast.walk(scope):
+                if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                        and node.func.attr in SQL_METHODS and node.args):
+                    continue
+                sql = _literal(node.args[0], env)
+                if not sql or not SQL_START.match(sql):
+                    continue
+                key = ' '.join(sql.split())
+                if key in seen:
+                    continue
+                seen.add(key)
+                found.append((os.path.relpath(path, ROOT), node.lineno, key))
+    return found
+
+
+def _explain(conn, sql):
+    params = ()
+    for _ in range(3):
+        try:
+            return conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.ProgrammingError as e:
+            m = re.search(r'uses (\d+)', str(e))
+            if not m:
+                raise
+            params = (None,) * int(m.group(1))  # WHY: yer tutucu sayısı SQLite'tan öğrenilir.
+    raise sqlite3.ProgrammingError("parametre sayısı bulunamadı")
+
+
+def full_scans(plan, all_tables=False):
+    """Plan satırlarından indekssiz taranan tablolar."""
+    tables = []
+    for row in plan:
+        m = SCAN_LINE.match(row[-1])
+        if not m:
+            continue
+        table = m.group(1)
+        if all_tables or table.lower() not in SMALL_TABLES:
+            tables.append(table)
+    return tables
+
+
+def audit(conn, statements, all_tables=False):
+    """Dönüş: (taramalar [(dosya, satır, sql, [tablo])], atlananlar [(dosya, satır, hata)])."""
+    scans, skipped = [], []
+    for fname, line, sql in statements:
+        try:
+            plan = _explain(conn, sql)
+        except sqlite3.Error as e:
+            skipped.append((fname, line, str(e)))  # WHY: geçici tablolar, dinamik kolon adları vb.
+            continue
+        tables = full_scans(plan, all_tables)
+        if tables:
+            scans.append((fname, line, sql, tables))
+    return scans, skipped
+
+
+def _source_files():
+    files = []
+    for d in SCAN_DIRS:
+        files.extend(sorted((ROOT / d).glob('*.py')))
+    return files
+
+
+def _open_db(db_path):
+    if db_path:
+        return sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True), None
+    sys.path.insert(0, str(ROOT))
+    from core.database import Database
+    tmp = tempfile.TemporaryDirectory()
+    db = Database(os.path.join(tmp.name, 'audit.db'), use_cache=False)
+    db.close_connections()
+    return sqlite3.connect(os.path.join(tmp.name, 'audit.db')), tmp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQL sorguları için EXPLAIN QUERY PLAN denetimi")
+    parser.add_argument("--db", help="denetlenecek veritabanı (salt okunur); varsayılan: güncel şemalı boş veritabanı")
+    parser.add_argument("--all-tables", action="store_true", help="küçük ayar tablolarındaki taramaları da göster")
+    parser.add_argument("--show-skipped", action="store_true", help="planı çıkarılamayan sorguları listele")
+    parser.add_argument("--strict", action="store_true", help="tam tarama bulunursa çıkış kodu 1")
+    args = parser.parse_args(argv)
+
+    statements = collect_statements(_source_files())
+    conn, tmp = _open_db(args.db)
+    try:
+        scans, skipped = audit(conn, statements, args.all_tables)
+    finally:
+        conn.close()
+        if tmp is not None:
+            tmp.cleanup()
+
+    for fname, line, sql, tables in scans:
+        print(f"{fname}:{line}: SCAN {', '.join(tables)}")
+        print(f"    {sql[:200]}")
+    print(f"\n{len(statements)} sorgu, {len(scans)} tam tarama, {len(skipped)} plan çıkarılamadı.")
+    if args.show_skipped:
+        for fname, line, err in skipped:
+            print(f"  atlandı {fname}:{line}: {err}")
+    return 1 if (args.strict and scans) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())